@@ -0,0 +1,217 @@
+"""
+Admission control: per-route concurrency limits and per-client rate limits.
+
+Expensive routes get a ConcurrencyLimiter: at most `limit` requests run at
+once, up to `queue_size` more wait (for at most queue_timeout seconds), and
+anything beyond that is rejected immediately with 503 and Retry-After, so a
+burst on one route cannot take every event-loop slot and pool connection from
+cheap routes. Public and login routes get token buckets and answer 429 with
+Retry-After when a client runs dry.
+
+A bucket is keyed by session only when session_validator accepts the token
+(the server checks it against recently authenticated sessions); any other
+request, including one carrying a made-up token, is keyed by client address,
+so minting tokens does not mint buckets. Rules suffixed with ":ip" are
+always keyed by address, which is what login and signup routes need.
+
+The client address is the connection's peer unless trust_forwarded_for is
+set, in which case it is the last X-Forwarded-For entry (the one appended by
+the reverse proxy; earlier entries are client-supplied). Behind an ingress
+without trust_forwarded_for every anonymous client shares the ingress's
+address and therefore one bucket, so deployments behind a proxy must enable it.
+
+Rules are written as "METHOD /path=a/b" entries separated by commas, where
+the path may end in * to match a prefix and {name} matches one segment.
+For concurrency rules a/b is limit/queue size; for rate rules it is tokens
+per second/burst. The first matching rule of each kind applies.
+"""
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+import metrics
+from auth_cache import token_key
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float = 5.0, name: str = ""):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns None on success or the reason the request was shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[future] = None
+        metrics.admission_queued.set(len(self._waiters), route=self.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed this waiter a slot just as the timer fired.
+            if not future.done():
+                return "queue_timeout"
+        except BaseException:
+            if future.done():
+                self.release()
+            raise
+        finally:
+            self._waiters.pop(future, None)
+            metrics.admission_queued.set(len(self._waiters), route=self.name)
+        return None
+
+    def release(self):
+        while self._waiters:
+            future, _ = self._waiters.popitem(last=False)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+
+class TokenBuckets:
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Spend one token for key; returns 0 when allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class Rule:
+    def __init__(self, method: Optional[str], path: str, first: float, second: float, by_ip: bool = False):
+        self.method = method
+        self.path = path
+        self.first = first
+        self.second = second
+        self.by_ip = by_ip
+        pattern = re.escape(path.rstrip("*"))
+        pattern = re.sub(r"\\\{[^/]+?\\\}", "[^/]+", pattern)
+        self.regex = re.compile(pattern + (".*" if path.endswith("*") else "") + "$")
+        self.name = f"{method} {path}" if method else path
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and self.regex.match(path) is not None
+
+
+def parse_rules(spec: str) -> List[Rule]:
+    rules = []
+    for entry in filter(None, (e.strip() for e in (spec or "").split(","))):
+        target, _, values = entry.rpartition("=")
+        values, _, scope = values.partition(":")
+        first, _, second = values.partition("/")
+        method, _, path = target.strip().rpartition(" ")
+        rules.append(Rule(method.upper() or None, path, float(first), float(second or first),
+                          by_ip=scope.strip() == "ip"))
+    return rules
+
+
+def _first_match(rules, method: str, path: str):
+    for rule in rules:
+        if rule.matches(method, path):
+            return rule
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, concurrency_rules: List[Rule] = (), rate_rules: List[Rule] = (),
+                 queue_timeout: float = 5.0, retry_after: int = 1, trust_forwarded_for: bool = False,
+                 session_validator: Optional[Callable[[str], bool]] = None):
+        self.app = app
+        self.concurrency_rules = list(concurrency_rules)
+        self.rate_rules = list(rate_rules)
+        self.retry_after = retry_after
+        self.trust_forwarded_for = trust_forwarded_for
+        self.session_validator = session_validator
+        self.limiters = {
+            rule.name: ConcurrencyLimiter(int(rule.first), int(rule.second), queue_timeout, name=rule.name)
+            for rule in self.concurrency_rules
+        }
+        self.buckets = {rule.name: TokenBuckets(rule.first, rule.second) for rule in self.rate_rules}
+
+    def client_key(self, scope, by_ip: bool = False) -> str:
+        headers = Headers(scope=scope)
+        if not by_ip and self.session_validator is not None:
+            token = None
+            for part in headers.get("cookie", "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == "session_token" and value:
+                    token = value
+            authorization = headers.get("authorization", "")
+            if not token and authorization.startswith("Bearer "):
+                token = authorization[len("Bearer "):]
+            if token and self.session_validator(token):
+                return f"session:{token_key(token)}"
+        if self.trust_forwarded_for and headers.get("x-forwarded-for"):
+            return f"ip:{headers['x-forwarded-for'].split(',')[-1].strip()}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def _reject(self, scope, receive, send, status: int, detail: str, retry_after: int):
+        response = JSONResponse({"detail": detail}, status_code=status, headers={"Retry-After": str(retry_after)})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+
+        rate_rule = _first_match(self.rate_rules, method, path)
+        if rate_rule is not None:
+            wait = self.buckets[rate_rule.name].take(self.client_key(scope, rate_rule.by_ip))
+            if wait:
+                metrics.admission_shed.inc(route=rate_rule.name, reason="rate_limited")
+                await self._reject(scope, receive, send, 429, "Too many requests", max(1, math.ceil(wait)))
+                return
+
+        rule = _first_match(self.concurrency_rules, method, path)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[rule.name]
+        start = time.perf_counter()
+        shed = await limiter.acquire()
+        metrics.admission_wait.observe(time.perf_counter() - start, route=rule.name)
+        if shed:
+            metrics.admission_shed.inc(route=rule.name, reason=shed)
+            await self._reject(scope, receive, send, 503, "Server busy, retry shortly", self.retry_after)
+            return
+        metrics.admission_in_flight.inc(route=rule.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.admission_in_flight.dec(route=rule.name)
+            limiter.release()
@@ -0,0 +1,79 @@
+"""
+Short-lived in-process cache of resolved authentication contexts.
+
+Maps a session token to the authenticated user plus, for artists, their
+artist_id, so authenticated endpoints skip the session, user and artist
+lookups on repeat requests. Entries expire after ttl seconds (never past the
+session's own expiry) and are dropped explicitly on logout and when the
+user's record or artist profile changes. Entries are keyed by a digest of the token so
+invalidation messages can name a session without carrying the token itself.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class AuthContext:
+    __slots__ = ("user", "artist_id")
+
+    def __init__(self, user, artist_id: Optional[str] = None):
+        self.user = user
+        self.artist_id = artist_id
+
+
+def token_key(session_token: str) -> str:
+    return hashlib.sha256(session_token.encode()).hexdigest()[:32]
+
+
+class AuthContextCache:
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+
+    def get(self, session_token: str) -> Optional[AuthContext]:
+        key = token_key(session_token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        ctx, expires = entry
+        if expires < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return ctx
+
+    def put(self, session_token: str, ctx: AuthContext, max_age: Optional[float] = None):
+        if self.ttl <= 0:
+            return
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        key = token_key(session_token)
+        self._drop(key)
+        self._entries[key] = (ctx, time.monotonic() + ttl)
+        self._keys_by_user.setdefault(ctx.user.user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0].user.user_id
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def invalidate_key(self, key: str):
+        self._drop(key)
+
+    def invalidate_user(self, user_id: str):
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_user.clear()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local load-test and benchmark harness for the backend.
+
+Boots the FastAPI app in-process against a local mongod (--mongo local, uses
+MONGO_URL) or a mongomock-motor stand-in (--mongo mock), stubs the Stripe
+checkout integration, seeds a configurable dataset and drives concurrent async
+load on the hot endpoints. Latency percentiles, throughput and error counts
+are compared against a stored baseline.
+
+Run with: python benchmark.py --mongo mock --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_BASELINE = ROOT_DIR / "benchmark_baseline.json"
+
+
+class StubStripeCheckout:
+    """Stand-in for emergentintegrations' StripeCheckout with a fixed upstream delay."""
+
+    latency = 0.05
+
+    def __init__(self, api_key=None, webhook_url=None):
+        self.api_key = api_key
+        self.webhook_url = webhook_url
+
+    async def create_checkout_session(self, checkout_request):
+        from types import SimpleNamespace
+        await asyncio.sleep(self.latency)
+        session_id = f"cs_bench_{uuid.uuid4().hex}"
+        return SimpleNamespace(session_id=session_id, url=f"https://checkout.stripe.test/{session_id}")
+
+    async def get_checkout_status(self, session_id):
+        from types import SimpleNamespace
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(status="complete", payment_status="paid", amount_total=500, currency="usd")
+
+    async def handle_webhook(self, body, signature):
+        return None
+
+
+class StubCheckoutSessionRequest:
+    """Stand-in for emergentintegrations' CheckoutSessionRequest."""
+
+    def __init__(self, metadata=None, **fields):
+        self.metadata = metadata
+        self.fields = fields
+
+
+def load_app(mongo_mode: str, db_name: str):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("STRIPE_API_KEY", "sk_test_bench")
+    os.environ.setdefault("STRIPE_PRICE_REUSE", "false")
+    os.environ.setdefault("ADMISSION_RATE_LIMITS", "")
+
+    if mongo_mode == "mock":
+        import mongomock_motor
+        import motor.motor_asyncio
+        motor.motor_asyncio.AsyncIOMotorClient = lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient()
+
+    sys.path.insert(0, str(ROOT_DIR))
+    import server
+    server.StripeCheckout = StubStripeCheckout
+    server.CheckoutSessionRequest = StubCheckoutSessionRequest
+    return server
+
+
+async def seed(db, args, rng: random.Random) -> dict:
+    """Insert artists, fans, tiers, content and subscriptions; return handles for the load phase."""
+    now = datetime.now(timezone.utc)
+    words = ["Echo", "Velvet", "Neon", "Static", "Lunar", "Amber", "Golden", "Midnight", "Paper", "Silver"]
+
+    for name in ("users", "user_sessions", "artists", "subscription_tiers", "gated_content", "subscriptions", "payment_transactions"):
+        await db[name].delete_many({})
+
+    users, sessions, artists, tiers, content, subs = [], [], [], [], [], []
+    for i in range(args.artists):
+        user_id = f"user_bench_artist_{i}"
+        artist_id = f"artist_bench_{i}"
+        name = f"{rng.choice(words)} {rng.choice(words)} {i}"
+        users.append({"user_id": user_id, "email": f"artist{i}@bench.test", "name": name, "role": "artist",
+                      "picture": None, "created_at": now.isoformat()})
+        artists.append({"artist_id": artist_id, "user_id": user_id, "name": name, "bio": "Benchmark artist " * 5,
+                        "profile_image": None, "status": "approved" if rng.random() < 0.8 else "pending",
+                        "spotify_link": f"https://open.spotify.com/artist/bench{i}", "submitted_at": now.isoformat(),
+                        "approved_at": now.isoformat(), "created_at": now.isoformat()})
+        for t in range(args.tiers_per_artist):
+            tier_id = f"tier_bench_{i}_{t}"
+            tiers.append({"tier_id": tier_id, "artist_id": artist_id, "name": f"Tier {t}", "price": 5.0 * (t + 1),
+                          "benefits": ["Early access", "Behind the scenes"], "stripe_price_id": None,
+                          "created_at": now.isoformat()})
+        for c in range(args.content_per_artist):
+            content.append({"content_id": f"content_bench_{i}_{c}", "artist_id": artist_id, "title": f"Post {c}",
+                            "content_type": "text", "content_text": "Lorem ipsum dolor sit amet. " * args.content_words,
+                            "external_link": None, "tier_ids": [f"tier_bench_{i}_{t}" for t in range(args.tiers_per_artist)],
+                            "created_at": now.isoformat()})
+
+    approved = [a["artist_id"] for a in artists if a["status"] == "approved"]
+    fan_tokens = []
+    for i in range(args.fans):
+        user_id = f"user_bench_fan_{i}"
+        token = f"session_bench_fan_{i}"
+        fan_tokens.append(token)
+        users.append({"user_id": user_id, "email": f"fan{i}@bench.test", "name": f"Fan {i}", "role": "fan",
+                      "picture": None, "created_at": now.isoformat()})
+        sessions.append({"user_id": user_id, "session_token": token, "expires_at": now + timedelta(days=7),
+                         "created_at": now})
+        for artist_index in rng.sample(range(len(approved)), min(args.subscriptions_per_fan, len(approved))):
+            artist_id = approved[artist_index]
+            subs.append({"subscription_id": f"sub_bench_{i}_{artist_index}", "fan_user_id": user_id,
+                         "artist_id": artist_id, "tier_id": f"tier_bench_{artist_id.rsplit('_', 1)[1]}_0",
+                         "stripe_subscription_id": None, "status": "active", "started_at": now.isoformat(),
+                         "ends_at": None})
+
+    for name, docs in (("users", users), ("user_sessions", sessions), ("artists", artists),
+                       ("subscription_tiers", tiers), ("gated_content", content), ("subscriptions", subs)):
+        for start in range(0, len(docs), 1000):
+            await db[name].insert_many(docs[start:start + 1000])
+
+    return {
+        "approved_artists": approved,
+        "tiers": [t["tier_id"] for t in tiers if t["artist_id"] in set(approved)],
+        "fan_tokens": fan_tokens,
+        "subscriptions": [(s["fan_user_id"], s["artist_id"]) for s in subs],
+    }
+
+
+def build_scenarios(handles: dict, rng: random.Random) -> dict:
+    """Map scenario name to a factory producing (method, path, json, headers)."""
+    def fan_headers():
+        return {"Authorization": f"Bearer {rng.choice(handles['fan_tokens'])}"}
+
+    def subscribed_content():
+        fan_user_id, artist_id = rng.choice(handles["subscriptions"])
+        token = "session_bench_fan_" + fan_user_id.rsplit("_", 1)[1]
+        return "GET", f"/api/fan/content/{artist_id}", None, {"Authorization": f"Bearer {token}"}
+
+    return {
+        "artists_public": lambda: ("GET", "/api/artists/public", None, {}),
+        "artists_search": lambda: ("GET", f"/api/artists/search?q={rng.choice(['echo', 'neon', 'amber', 'lunar'])}", None, {}),
+        "artist_page": lambda: ("GET", f"/api/artist/{rng.choice(handles['approved_artists'])}", None, {}),
+        "artist_tiers": lambda: ("GET", f"/api/artist/{rng.choice(handles['approved_artists'])}/tiers", None, {}),
+        "auth_me": lambda: ("GET", "/api/auth/me", None, fan_headers()),
+        "fan_subscriptions": lambda: ("GET", "/api/fan/subscriptions", None, fan_headers()),
+        "fan_content": subscribed_content,
+        "checkout": lambda: ("POST", "/api/subscribe/checkout",
+                             {"tier_id": rng.choice(handles["tiers"]), "origin_url": "http://bench.test"}, fan_headers()),
+    }
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, factory, total: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, path, body, headers = factory()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            if current["errors"]:
+                regressions.append(f"{name}: {current['errors']} errors with no baseline")
+            continue
+        # Failed requests are often fast, so errors are checked on their own, not through latency.
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+async def main(args) -> int:
+    import httpx
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    StubStripeCheckout.latency = args.stripe_latency_ms / 1000
+
+    cold_start = time.perf_counter()
+    server = load_app(args.mongo, args.db_name)
+    imported = time.perf_counter()
+    await server.app.router.startup()
+    started = time.perf_counter()
+    await server.warmup.wait()
+    ready = time.perf_counter()
+    cold_start_ms = {
+        "import": (imported - cold_start) * 1000,
+        "startup": (started - imported) * 1000,
+        "warmup": (ready - started) * 1000,
+        "ready": (ready - cold_start) * 1000,
+    }
+
+    try:
+        handles = await seed(server.db, args, rng)
+        # Warmup prefilled the public lists from the pre-seed database.
+        await server.on_trending_recomputed(0)
+        scenarios = build_scenarios(handles, rng)
+        selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+
+        transport = httpx.ASGITransport(app=server.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench.test") as client:
+            for name in selected:
+                await run_scenario(client, scenarios[name], min(args.warmup, args.requests), args.concurrency)
+                results[name] = await run_scenario(client, scenarios[name], args.requests, args.concurrency)
+                r = results[name]
+                print(f"{name:<20} {r['throughput_rps']:>9} rps  p50 {r['p50_ms']:>8}ms  "
+                      f"p95 {r['p95_ms']:>8}ms  p99 {r['p99_ms']:>8}ms  errors {r['errors']}")
+    finally:
+        await server.app.router.shutdown()
+
+    print("cold start: " + "  ".join(f"{phase} {ms:.1f}ms" for phase, ms in cold_start_ms.items()))
+    print("warmup steps: " + "  ".join(f"{step} {ms:.1f}ms" for step, ms in server.warmup.durations_ms.items()))
+
+    baseline_path = Path(args.baseline)
+    profile = f"{args.mongo}-c{args.concurrency}"
+    stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+    if args.save_baseline:
+        stored[profile] = results
+        baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"✓ Baseline '{profile}' saved to {baseline_path}")
+        return 0
+
+    if profile not in stored:
+        print(f"No baseline for profile '{profile}'; run with --save-baseline to record one.")
+    regressions = compare(results, stored.get(profile, {}), args.tolerance)
+    if regressions:
+        print("✗ Regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    if profile in stored:
+        print(f"✓ Within {args.tolerance:.0%} of baseline '{profile}'")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", choices=["mock", "local"], default="mock")
+    parser.add_argument("--db-name", default="favatis_bench")
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--fans", type=int, default=1000)
+    parser.add_argument("--tiers-per-artist", type=int, default=3)
+    parser.add_argument("--content-per-artist", type=int, default=10)
+    parser.add_argument("--content-words", type=int, default=50)
+    parser.add_argument("--subscriptions-per-fan", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="warmup requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--stripe-latency-ms", type=float, default=50)
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
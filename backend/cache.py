@@ -0,0 +1,215 @@
+"""
+Pluggable cache with cross-worker invalidation.
+
+Values are bytes (typically pre-rendered JSON bodies). MemoryBackend keeps
+them per process; RedisBackend shares them between workers over any
+Redis-protocol server. Writes call Cache.invalidate(), which deletes the keys
+and publishes an invalidation message on an InvalidationBus so every worker
+drops its in-process copies (memory backend entries, cached auth contexts,
+revoked tokens) as soon as the message arrives.
+
+Every invalidation also bumps a per-key generation. A reader that renders a
+value from the database takes generation(key) before reading and passes it
+to set(); if the key was invalidated in between, the set is skipped instead
+of caching the pre-write render for a full TTL. Invalidations from other
+workers count once their message arrives.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    shared = False
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        self.discard(keys)
+
+    def discard(self, keys: Iterable[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def close(self):
+        self._entries.clear()
+
+
+class RedisBackend:
+    shared = True
+
+    def __init__(self, redis, prefix: str = "favatis:cache:"):
+        self.redis = redis
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.redis.delete(*(self.prefix + k for k in keys))
+
+    def discard(self, keys: Iterable[str]):
+        pass
+
+    async def close(self):
+        pass
+
+
+class InvalidationBus:
+    """Fan out invalidation messages to local handlers and, with Redis, to other workers."""
+
+    def __init__(self, redis=None, channel: str = "favatis:invalidate"):
+        self.redis = redis
+        self.channel = channel
+        self.worker_id = uuid.uuid4().hex
+        self._handlers = []
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, handler: Callable[[dict], None]):
+        self._handlers.append(handler)
+
+    def _dispatch(self, message: dict):
+        for handler in self._handlers:
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Invalidation handler failed")
+
+    async def publish(self, message: dict):
+        self._dispatch(message)
+        if self.redis is not None:
+            await self.redis.publish(self.channel, json.dumps({**message, "origin": self.worker_id}))
+
+    async def start(self):
+        if self.redis is None or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+
+        async def _listen():
+            try:
+                while True:
+                    try:
+                        raw = await pubsub.get_message(timeout=1.0)
+                    except Exception:
+                        logger.exception("Invalidation listener error")
+                        await asyncio.sleep(1.0)
+                        continue
+                    if raw is None:
+                        continue
+                    try:
+                        message = json.loads(raw["data"])
+                        if message.pop("origin", None) != self.worker_id:
+                            self._dispatch(message)
+                    except Exception:
+                        logger.exception("Skipping malformed invalidation message")
+            finally:
+                await pubsub.unsubscribe(self.channel)
+                await pubsub.aclose()
+
+        self._listener = asyncio.create_task(_listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+class Cache:
+    def __init__(self, backend, bus: InvalidationBus, default_ttl: float = 60.0):
+        self.backend = backend
+        self.bus = bus
+        self.default_ttl = default_ttl
+        self._generations = {}
+        bus.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, message: dict):
+        keys = message.get("keys", ())
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self.backend.discard(keys)
+
+    def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            logger.exception(f"Cache get failed for {key}")
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation(key):
+            return
+        try:
+            await self.backend.set(key, value, ttl or self.default_ttl)
+        except Exception:
+            logger.exception(f"Cache set failed for {key}")
+
+    async def invalidate(self, *keys: str, **extra):
+        """Delete keys everywhere; extra fields (users, tokens, ...) go to bus handlers."""
+        if self.backend.shared and keys:
+            await self.backend.delete(*keys)
+        message = {"keys": list(keys), **{k: list(v) for k, v in extra.items() if v}}
+        try:
+            await self.bus.publish(message)
+        except Exception:
+            logger.exception("Publishing cache invalidation failed")
+
+    async def start(self):
+        await self.bus.start()
+
+    async def close(self):
+        await self.bus.stop()
+        await self.backend.close()
+        if self.bus.redis is not None:
+            await self.bus.redis.aclose()
+
+
+def create_cache(backend_name: str = "memory", redis_url: Optional[str] = None, default_ttl: float = 60.0,
+                 max_entries: int = 10000) -> Cache:
+    redis = None
+    if redis_url:
+        import redis.asyncio as aioredis
+        redis = aioredis.from_url(redis_url)
+    if backend_name == "redis":
+        if redis is None:
+            raise ValueError("CACHE_BACKEND=redis requires REDIS_URL")
+        backend = RedisBackend(redis)
+    else:
+        backend = MemoryBackend(max_entries=max_entries)
+    return Cache(backend, InvalidationBus(redis), default_ttl=default_ttl)
@@ -0,0 +1,178 @@
+"""
+Change-stream watcher for writes that bypass the API.
+
+Scripts such as add_test_artist.py write to Mongo directly, so the API's own
+cache invalidation never sees them. ChangeStreamWatcher tails the change
+streams of selected collections (requires a replica set; a single-node one is
+enough), hands each event to a per-collection handler and persists the resume
+token after every handled event, so a restart picks up exactly where the
+previous run stopped. Handlers must be idempotent: an event can be delivered
+again if the process dies between handling it and saving its token. A handler
+that keeps failing on the same event is retried max_handler_failures times,
+then the event is logged and skipped so the stream does not stall behind it.
+
+Delete events carry only the documentKey (_id). With pre_images the watcher
+enables pre-images on its collections (MongoDB 6.0+) and requests them, so
+changed_document() can return the deleted document; where that is not
+available handlers get an empty document and must fall back to a broader
+refresh.
+
+ArtistStatsView is the derived view the watcher keeps fresh: per-artist
+subscriber and tier counts in artist_stats.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# ChangeStreamHistoryLost / ChangeStreamFatalError: the saved token fell off
+# the oplog, so the stream has to start fresh and derived state be rebuilt.
+RESUME_FAILED_CODES = {280, 286}
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class ChangeStreamWatcher:
+    def __init__(self, db, handlers: Dict[str, Handler], state_collection, name: str = "default",
+                 retry_delay: float = 5.0, on_resync: Optional[Callable[[], Awaitable[None]]] = None,
+                 pre_images: bool = False, max_handler_failures: int = 5):
+        self.db = db
+        self.handlers = handlers
+        self.state = state_collection
+        self.name = name
+        self.retry_delay = retry_delay
+        self.on_resync = on_resync
+        self.pre_images = pre_images
+        self.max_handler_failures = max_handler_failures
+        self._pre_images_enabled = set()
+        self._failures = {}
+        self._tasks = []
+
+    def _state_id(self, collection: str) -> str:
+        return f"{self.name}:{collection}"
+
+    async def load_token(self, collection: str) -> Optional[dict]:
+        doc = await self.state.find_one({"_id": self._state_id(collection)}, {"resume_token": 1})
+        return doc["resume_token"] if doc else None
+
+    async def save_token(self, collection: str, token: dict):
+        await self.state.update_one(
+            {"_id": self._state_id(collection)},
+            {"$set": {"resume_token": token, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    async def clear_token(self, collection: str):
+        await self.state.delete_one({"_id": self._state_id(collection)})
+
+    async def _enable_pre_images(self, collection: str):
+        try:
+            await self.db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+            self._pre_images_enabled.add(collection)
+        except PyMongoError as e:
+            logger.warning(f"Pre-images unavailable for {collection}, deletes will trigger full refreshes: {e}")
+
+    async def _handle(self, collection: str, change: dict):
+        try:
+            await self.handlers[collection](change)
+        except Exception:
+            token, failures = self._failures.get(collection, (None, 0))
+            failures = failures + 1 if token == change["_id"] else 1
+            if failures < self.max_handler_failures:
+                self._failures[collection] = (change["_id"], failures)
+                raise
+            logger.exception(f"Change handler for {collection} failed {failures} times, skipping event {change['_id']}")
+        self._failures.pop(collection, None)
+
+    async def _consume(self, collection: str, token: Optional[dict]):
+        options = {"full_document": "updateLookup", "start_after": token}
+        if collection in self._pre_images_enabled:
+            options["full_document_before_change"] = "whenAvailable"
+        async with self.db[collection].watch(**options) as stream:
+            async for change in stream:
+                if change["operationType"] != "invalidate":
+                    await self._handle(collection, change)
+                await self.save_token(collection, change["_id"])
+
+    async def _run(self, collection: str):
+        if self.pre_images:
+            await self._enable_pre_images(collection)
+        while True:
+            try:
+                token = await self.load_token(collection)
+                await self._consume(collection, token)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code not in RESUME_FAILED_CODES:
+                    logger.exception(f"Change stream on {collection} failed")
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                logger.warning(f"Resume token for {collection} is no longer valid, resyncing")
+                await self.clear_token(collection)
+                if self.on_resync:
+                    await self.on_resync()
+            except PyMongoError:
+                logger.exception(f"Change stream on {collection} failed")
+                await asyncio.sleep(self.retry_delay)
+            except Exception:
+                logger.exception(f"Change handler for {collection} failed")
+                await asyncio.sleep(self.retry_delay)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(c)) for c in self.handlers]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+def changed_document(change: dict) -> dict:
+    """The document after the change, or before it for deletes; {} when neither was delivered."""
+    return change.get("fullDocument") or change.get("fullDocumentBeforeChange") or {}
+
+
+class ArtistStatsView:
+    def __init__(self, db):
+        self.db = db
+
+    async def ensure_indexes(self):
+        await self.db.artist_stats.create_index("artist_id", unique=True)
+
+    async def compute(self, artist_id: str) -> dict:
+        subscriber_count, tier_count = await asyncio.gather(
+            self.db.subscriptions.count_documents({"artist_id": artist_id, "status": "active"}),
+            self.db.subscription_tiers.count_documents({"artist_id": artist_id})
+        )
+        return {"artist_id": artist_id, "subscriber_count": subscriber_count, "tier_count": tier_count}
+
+    async def refresh(self, artist_id: str) -> dict:
+        stats = await self.compute(artist_id)
+        await self.db.artist_stats.update_one(
+            {"artist_id": artist_id},
+            {"$set": {**stats, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        return stats
+
+    async def get(self, artist_id: str) -> Optional[dict]:
+        return await self.db.artist_stats.find_one(
+            {"artist_id": artist_id}, {"_id": 0, "artist_id": 1, "subscriber_count": 1, "tier_count": 1}
+        )
+
+    async def rebuild(self):
+        artist_ids = await self.db.artists.distinct("artist_id")
+        for artist_id in artist_ids:
+            await self.refresh(artist_id)
+        await self.db.artist_stats.delete_many({"artist_id": {"$nin": artist_ids}})
@@ -0,0 +1,84 @@
+"""
+Storage helpers for gated content bodies.
+
+List endpoints only read a short excerpt stored next to each item; the full
+content_text is fetched one item at a time. Bodies of at least
+min_compress_bytes are stored compressed in content_body (zstd when the
+zstandard package is installed, gzip otherwise) with content_encoding naming
+the codec, and content_text left unset.
+"""
+import gzip
+from typing import Optional
+
+from bson.binary import Binary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXCERPT_LENGTH = 280
+
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    "content_id": 1,
+    "artist_id": 1,
+    "title": 1,
+    "content_type": 1,
+    "excerpt": 1,
+    "has_more": 1,
+    "external_link": 1,
+    "tier_ids": 1,
+    "created_at": 1,
+}
+
+
+def make_excerpt(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return text
+    # Leading whitespace would leave rsplit nothing to keep when a post opens with a blank block.
+    text = text.strip()
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    return text[:EXCERPT_LENGTH].rsplit(None, 1)[0].rstrip() + "…"
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard else "gzip"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    # A fixed mtime keeps equal bodies byte-identical.
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def body_fields(text: Optional[str], codec: Optional[str] = None, min_compress_bytes: int = 4096) -> dict:
+    """Document fields for a content body: excerpt and either plain or compressed text."""
+    fields = {
+        "excerpt": make_excerpt(text),
+        "has_more": bool(text) and len(text.strip()) > EXCERPT_LENGTH,
+        "content_text": text,
+    }
+    if codec and codec != "none" and text:
+        raw = text.encode("utf-8")
+        if len(raw) >= min_compress_bytes:
+            fields["content_text"] = None
+            fields["content_body"] = Binary(compress(raw, codec))
+            fields["content_encoding"] = codec
+    return fields
+
+
+def read_body(doc: dict) -> Optional[str]:
+    if doc.get("content_body") is not None:
+        return decompress(bytes(doc["content_body"]), doc["content_encoding"]).decode("utf-8")
+    return doc.get("content_text")
@@ -0,0 +1,164 @@
+"""
+Mongo command monitoring.
+
+A pymongo CommandListener attributes every command issued by the Motor client
+to the HTTP request that triggered it (through a contextvar that Motor copies
+into its executor threads), logs slow queries with the shape of their filter,
+and keeps aggregate per-route totals for the admin stats endpoint.
+"""
+import contextvars
+import logging
+import threading
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildInfo", "endSessions",
+    "saslStart", "saslContinue", "getnonce", "authenticate",
+}
+
+FILTER_KEYS = {
+    "find": "filter",
+    "count": "query",
+    "delete": "deletes",
+    "update": "updates",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+    "distinct": "query",
+}
+
+
+class RequestDBStats:
+    __slots__ = ("calls", "duration_ms", "documents", "errors", "_lock")
+
+    def __init__(self):
+        self.calls = 0
+        self.duration_ms = 0.0
+        self.documents = 0
+        self.errors = 0
+        # Listener callbacks run on Motor's executor threads, possibly several at once per request.
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms: float, documents: int = 0, failed: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.duration_ms += duration_ms
+            self.documents += documents
+            if failed:
+                self.errors += 1
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.1f};desc="{self.calls} queries, {self.documents} docs"'
+
+
+current_db_stats: contextvars.ContextVar = contextvars.ContextVar("current_db_stats", default=None)
+
+
+def filter_shape(value):
+    """Replace literal values with '?' so filters group by structure, not data."""
+    if isinstance(value, dict):
+        return {k: filter_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [filter_shape(value[0])] if value else []
+    return "?"
+
+
+def _command_filter(command_name: str, command):
+    key = FILTER_KEYS.get(command_name)
+    if key is None:
+        return None
+    value = command.get(key)
+    if command_name in ("delete", "update") and value:
+        value = value[0].get("q")
+    return value
+
+
+def _returned_documents(reply) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch else 0
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+
+class RouteDBStats:
+    """Aggregate DB usage per route template, e.g. 'GET /api/artist/{artist_id}'."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, stats: RequestDBStats):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0, "calls": 0, "duration_ms": 0.0,
+                    "documents": 0, "errors": 0, "max_calls": 0,
+                }
+            entry["requests"] += 1
+            entry["calls"] += stats.calls
+            entry["duration_ms"] += stats.duration_ms
+            entry["documents"] += stats.documents
+            entry["errors"] += stats.errors
+            entry["max_calls"] = max(entry["max_calls"], stats.calls)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for route, entry in self._routes.items():
+                requests = entry["requests"] or 1
+                result[route] = {
+                    **entry,
+                    "duration_ms": round(entry["duration_ms"], 3),
+                    "avg_calls": round(entry["calls"] / requests, 2),
+                    "avg_duration_ms": round(entry["duration_ms"] / requests, 3),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+class DBCommandMonitor(monitoring.CommandListener):
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        self._pending[(event.connection_id, event.request_id)] = (
+            current_db_stats.get(),
+            event.database_name,
+            event.command_name,
+            event.command,
+        )
+
+    def _finish(self, event, reply=None, failed=False):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        stats, database_name, command_name, command = pending
+        duration_ms = event.duration_micros / 1000
+        documents = _returned_documents(reply) if reply else 0
+        if stats is not None:
+            stats.record(duration_ms, documents, failed)
+
+        if duration_ms >= self.slow_query_ms:
+            collection = command.get(command_name, command.get("collection"))
+            logger.warning(
+                "Slow query %.1fms: %s %s.%s filter=%s docs=%d",
+                duration_ms, command_name, database_name, collection,
+                filter_shape(_command_filter(command_name, command)), documents,
+            )
+
+    def succeeded(self, event):
+        self._finish(event, reply=event.reply)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
@@ -0,0 +1,127 @@
+"""
+Batched audit log of state changes.
+
+Handlers call record(), which only appends to an in-memory buffer; a
+background task writes the buffer to the events collection with insert_many
+once max_batch events are waiting or flush_interval has passed, so auditing
+adds no round trip to the request that caused it. The buffer is bounded by
+max_buffer: when Mongo is slow or down, new events beyond it are dropped and
+counted rather than growing memory. stop() flushes whatever is left.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class EventLog:
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 1.0, max_buffer: int = 10000,
+                 retry_delay: float = 5.0):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retry_delay = retry_delay
+        self._buffer = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await asyncio.gather(
+            self.collection.create_index([("type", ASCENDING), ("at", DESCENDING)]),
+            self.collection.create_index([("actor_id", ASCENDING), ("at", DESCENDING)]),
+        )
+
+    def record(self, event_type: str, actor_id: Optional[str] = None, **data):
+        if len(self._buffer) >= self.max_buffer:
+            metrics.event_log_events.inc(result="dropped")
+            return
+        self._buffer.append({
+            "event_id": uuid.uuid4().hex,
+            "type": event_type,
+            "actor_id": actor_id,
+            "data": data,
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+        if len(self._buffer) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self) -> int:
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.max_batch, len(self._buffer)))]
+            # insert_many sets _id on each document, so a retried event that already reached the
+            # server fails with a duplicate key instead of being written twice.
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                failed = [batch[error["index"]] for error in errors if error.get("code") != DUPLICATE_KEY]
+                written += len(batch) - len(failed)
+                metrics.event_log_events.inc(len(batch) - len(failed), result="written")
+                if failed:
+                    self._requeue(failed)
+                    raise
+                continue
+            except Exception:
+                self._requeue(batch)
+                raise
+            written += len(batch)
+            metrics.event_log_events.inc(len(batch), result="written")
+        return written
+
+    def _requeue(self, batch: list):
+        # Put the batch back in front (as far as the bound allows) for the next attempt.
+        room = max(0, self.max_buffer - len(self._buffer))
+        self._buffer.extendleft(reversed(batch[:room]))
+        if len(batch) > room:
+            metrics.event_log_events.inc(len(batch) - room, result="dropped")
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+        async def _run():
+            delay = self.flush_interval
+            while not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                try:
+                    await self.flush()
+                    delay = self.flush_interval
+                except Exception:
+                    logger.exception(f"Event log flush failed; {len(self._buffer)} events buffered")
+                    delay = self.retry_delay
+
+        self._task = asyncio.create_task(_run())
+
+    async def stop(self):
+        # Let the flusher finish its current batch instead of cancelling it mid-write.
+        if self._task:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(f"Event log final flush failed; {len(self._buffer)} events lost")
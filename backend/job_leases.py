@@ -0,0 +1,23 @@
+"""
+Run-once-per-interval leases for periodic jobs.
+
+Each job has one document in job_leases keyed by its name. claim() moves the
+lease forward only if it has run out, so when every worker schedules the same
+job, only one of them runs it per interval.
+"""
+from datetime import datetime, timezone, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+async def claim(collection, job: str, seconds: float) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await collection.update_one(
+            {"_id": job, "until": {"$lt": now.isoformat()}},
+            {"$set": {"until": (now + timedelta(seconds=seconds)).isoformat()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
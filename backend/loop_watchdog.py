@@ -0,0 +1,176 @@
+"""
+Event loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine sleeps for `interval` and measures how late it wakes
+up; that lag is how long any ready request had to wait for the loop. A
+watchdog thread checks the heartbeat and, once the loop has been stuck for
+more than `threshold`, captures the event loop thread's stack and the task
+that is running. When the heartbeat resumes the stall is recorded with its
+measured duration under the route of that task (requests are mapped to their
+tasks by WatchdogMiddleware) or the background task's coroutine name.
+
+Offenders are kept per route and stack, so the admin view shows which code
+blocked the loop, how often and for how long.
+"""
+import asyncio
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import metrics
+from request_profiler import thread_stack
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_offenders_per_route: int = 20,
+                 recent_size: int = 1200):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_offenders_per_route = max_offenders_per_route
+        self.recent_size = recent_size
+        self.tasks: Dict[asyncio.Task, dict] = {}
+        self._lock = threading.Lock()
+        self._offenders: Dict[str, dict] = {}
+        self._recent = []
+        self._pending = None
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread_id = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(0.0, now - before - self.interval)
+            self.record_lag(lag)
+
+    def _label(self, task) -> str:
+        scope = self.tasks.get(task)
+        if scope is not None:
+            route = scope.get("route")
+            return f"{scope['method']} {route.path if route is not None else scope['path']}"
+        if task is None:
+            return "loop callbacks"
+        coro = task.get_coro()
+        return f"task {getattr(coro, '__qualname__', task.get_name())}"
+
+    def _watch(self):
+        check = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(check):
+            beat = self._beat
+            if self._pending is not None or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            task = asyncio.current_task(self._loop)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                label, stack = self._label(task), thread_stack(frame)
+            except Exception:
+                continue
+            with self._lock:
+                if self._beat == beat:
+                    self._pending = (label, stack)
+
+    def record_lag(self, lag: float):
+        metrics.event_loop_lag.observe(lag)
+        with self._lock:
+            self._recent.append(lag)
+            if len(self._recent) > self.recent_size:
+                del self._recent[:len(self._recent) - self.recent_size]
+            pending, self._pending = self._pending, None
+        if lag < self.threshold:
+            return
+        label, stack = pending or ("unattributed", ())
+        metrics.event_loop_stalls.inc(route=label)
+        self._record_stall(label, stack, lag)
+
+    def _record_stall(self, label: str, stack: tuple, lag: float):
+        with self._lock:
+            route = self._offenders.setdefault(label, {})
+            entry = route.get(stack)
+            if entry is None:
+                if len(route) >= self.max_offenders_per_route:
+                    smallest = min(route, key=lambda s: route[s]["max_ms"])
+                    if route[smallest]["max_ms"] >= lag * 1000:
+                        return
+                    del route[smallest]
+                entry = route[stack] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_at": None}
+            entry["count"] += 1
+            entry["total_ms"] += lag * 1000
+            entry["max_ms"] = max(entry["max_ms"], lag * 1000)
+            entry["last_at"] = datetime.now(timezone.utc).isoformat()
+
+    def snapshot(self, limit: int = 5) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            routes = {
+                label: sorted(
+                    ({"stack": list(stack), **entry, "total_ms": round(entry["total_ms"], 3),
+                      "max_ms": round(entry["max_ms"], 3)} for stack, entry in offenders.items()),
+                    key=lambda e: e["max_ms"], reverse=True
+                )[:limit]
+                for label, offenders in self._offenders.items()
+            }
+
+        def percentile(q):
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))] * 1000, 3) if recent else 0.0
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "max": percentile(1.0)},
+            "routes": dict(sorted(routes.items(), key=lambda item: item[1][0]["max_ms"], reverse=True)),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._offenders.clear()
+            self._recent.clear()
+
+
+class WatchdogMiddleware:
+    """Maps each request's task to its scope; add it innermost, next to ProfilerMiddleware."""
+
+    def __init__(self, app, watchdog: LoopWatchdog):
+        self.app = app
+        self.watchdog = watchdog
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.watchdog.tasks[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.watchdog.tasks.pop(task, None)
@@ -0,0 +1,236 @@
+"""
+Content-addressed object storage for uploaded media.
+
+Uploads are streamed chunk by chunk into the store while being hashed; the
+object key is the SHA-256 of the bytes, so identical uploads are stored once
+and every key names immutable content. LocalObjectStore keeps objects under a
+directory (dev and tests); GridFSObjectStore keeps them in a GridFS bucket.
+Image thumbnails are rendered with Pillow in a process pool so resizing never
+blocks the event loop.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pillow is only imported by the thumbnail worker processes.
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+
+class ObjectTooLarge(Exception):
+    pass
+
+
+class EmptyObject(Exception):
+    pass
+
+
+class LocalObjectStore:
+    def __init__(self, root: Path, chunk_size: int = 256 * 1024):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    @staticmethod
+    def _write(f, digest, chunk: bytes):
+        digest.update(chunk)
+        f.write(chunk)
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> Tuple[str, int, bool]:
+        """Store a stream; returns (key, size, created) where created is False for a duplicate."""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ObjectTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    await asyncio.to_thread(self._write, f, digest, chunk)
+            if size == 0:
+                raise EmptyObject("Empty upload")
+            key = digest.hexdigest()
+            path = self._path(key)
+            if path.exists():
+                os.unlink(tmp_path)
+                return key, size, False
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+            return key, size, True
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    async def put_bytes(self, data: bytes) -> Tuple[str, bool]:
+        async def single():
+            yield data
+
+        key, _, created = await self.put_stream(single())
+        return key, created
+
+    async def get_bytes(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(self._path(key).stat)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes start..end inclusive."""
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+
+class GridFSObjectStore:
+    def __init__(self, db, bucket_name: str = "media", chunk_size: int = 255 * 1024):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name, chunk_size_bytes=chunk_size)
+        self.files = db[f"{bucket_name}.files"]
+        self.chunk_size = chunk_size
+
+    async def _exists(self, key: str) -> bool:
+        return await self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> Tuple[str, int, bool]:
+        digest = hashlib.sha256()
+        size = 0
+        grid_in = self.bucket.open_upload_stream(f"tmp-{uuid.uuid4().hex}")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ObjectTooLarge(f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await grid_in.write(chunk)
+            if size == 0:
+                raise EmptyObject("Empty upload")
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+        key = digest.hexdigest()
+        if await self._exists(key):
+            await self.bucket.delete(grid_in._id)
+            return key, size, False
+        await self.bucket.rename(grid_in._id, key)
+        return key, size, True
+
+    async def put_bytes(self, data: bytes) -> Tuple[str, bool]:
+        key = hashlib.sha256(data).hexdigest()
+        if await self._exists(key):
+            return key, False
+        await self.bucket.upload_from_stream(key, data)
+        return key, True
+
+    async def get_bytes(self, key: str) -> bytes:
+        grid_out = await self.bucket.open_download_stream_by_name(key)
+        return await grid_out.read()
+
+    async def size(self, key: str) -> Optional[int]:
+        doc = await self.files.find_one({"filename": key}, {"length": 1})
+        return doc["length"] if doc else None
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream_by_name(key)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=" range into inclusive (start, end); None means the whole object.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        else:
+            start = max(size - int(end_s), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def render_thumbnails(data: bytes, sizes: Iterable[int]) -> Dict[int, bytes]:
+    """Runs in a worker process: WebP thumbnails bounded to size x size."""
+    from PIL import Image, ImageOps
+    thumbnails = {}
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for size in sizes:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, "WEBP", quality=80)
+            thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+
+class ThumbnailRenderer:
+    def __init__(self, sizes: Iterable[int] = (128, 512), workers: int = 2):
+        self.sizes = tuple(sizes)
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        return PILLOW_AVAILABLE and bool(self.sizes)
+
+    async def render(self, data: bytes) -> Dict[int, bytes]:
+        if not self.available:
+            return {}
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, render_thumbnails, data, self.sizes)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,240 @@
+"""
+Low-overhead in-process metrics rendered in the Prometheus text format.
+
+Metrics are plain dicts keyed by label tuples behind a per-metric lock, so
+recording is cheap from both the event loop and pymongo's monitoring threads.
+"""
+import bisect
+import threading
+import time
+from contextlib import asynccontextmanager
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+http_request_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+http_requests_in_flight = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.")
+
+mongo_pool_connections = REGISTRY.gauge(
+    "mongo_pool_connections", "Open connections in the Mongo pool.", ("address",))
+mongo_pool_checked_out = REGISTRY.gauge(
+    "mongo_pool_checked_out_connections", "Mongo connections currently checked out.", ("address",))
+mongo_pool_checkout_failures = REGISTRY.counter(
+    "mongo_pool_checkout_failures_total", "Failed Mongo connection checkouts.", ("address", "reason"))
+
+cache_requests = REGISTRY.counter(
+    "cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+upstream_duration = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream services.", ("service", "operation"))
+upstream_errors = REGISTRY.counter(
+    "upstream_errors_total", "Failed calls to upstream services.", ("service", "operation"))
+
+subscription_transitions = REGISTRY.counter(
+    "subscription_transitions_total", "Due subscriptions renewed or expired by the scheduler.", ("result",))
+
+admission_queued = REGISTRY.gauge(
+    "admission_queued_requests", "Requests waiting for a concurrency slot.", ("route",))
+admission_in_flight = REGISTRY.gauge(
+    "admission_in_flight_requests", "Requests holding a concurrency slot.", ("route",))
+admission_wait = REGISTRY.histogram(
+    "admission_wait_seconds", "Time spent waiting for a concurrency slot.", ("route",))
+admission_shed = REGISTRY.counter(
+    "admission_shed_total", "Requests rejected by admission control.", ("route", "reason"))
+
+event_loop_lag = REGISTRY.histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+event_loop_stalls = REGISTRY.counter(
+    "event_loop_stalls_total", "Event loop stalls above the watchdog threshold.", ("route",))
+
+event_log_events = REGISTRY.counter(
+    "event_log_events_total", "Audit events written or dropped by the event log.", ("result",))
+
+single_flight_calls = REGISTRY.counter(
+    "single_flight_calls_total", "Reads that started a query (leader) or joined one in flight (coalesced).",
+    ("group", "result"))
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+@asynccontextmanager
+async def track_upstream(service: str, operation: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_errors.inc(service=service, operation=operation)
+        raise
+    finally:
+        upstream_duration.observe(time.perf_counter() - start, service=service, operation=operation)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        mongo_pool_connections.set(0, address=_address(event))
+        mongo_pool_checked_out.set(0, address=_address(event))
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(address=_address(event))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc(address=_address(event), reason=event.reason)
+
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.inc(address=_address(event))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(address=_address(event))
@@ -0,0 +1,98 @@
+"""
+Mongo client settings from the environment.
+
+Pool size, timeouts, wire compression and the default read preference are
+read from MONGO_* variables and passed to the client as keyword options, so
+they apply whatever MONGO_URL says. Compressors whose Python support is not
+installed (zstandard for zstd, python-snappy for snappy) are dropped rather
+than failing the handshake.
+
+public_read_preference() gives the preference for anonymous catalogue reads:
+secondaries when available, never more than max_staleness seconds behind the
+primary. MongoDB requires a max staleness of at least 90 seconds; 0 disables
+the bound.
+"""
+import importlib.util
+import logging
+import os
+from typing import Mapping, Optional
+
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+logger = logging.getLogger(__name__)
+
+MIN_MAX_STALENESS_SECONDS = 90
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+# (environment variable, client option, type)
+CLIENT_OPTIONS = (
+    ("MONGO_MAX_POOL_SIZE", "maxPoolSize", int),
+    ("MONGO_MIN_POOL_SIZE", "minPoolSize", int),
+    ("MONGO_MAX_CONNECTING", "maxConnecting", int),
+    ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS", int),
+    ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS", int),
+    ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS", int),
+    ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS", int),
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", int),
+    ("MONGO_TIMEOUT_MS", "timeoutMS", int),
+    ("MONGO_APP_NAME", "appname", str),
+)
+
+
+def available_compressors(names: str) -> list:
+    compressors = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            raise ValueError(f"Unknown Mongo compressor: {name}")
+        if importlib.util.find_spec(module) is None:
+            logger.warning(f"Mongo compressor {name} requested but {module} is not installed; skipping")
+            continue
+        compressors.append(name)
+    return compressors
+
+
+def read_preference(mode: str, max_staleness: int = 0):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    if max_staleness and max_staleness < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"Max staleness must be at least {MIN_MAX_STALENESS_SECONDS} seconds")
+    return READ_PREFERENCES[mode](max_staleness=max_staleness or -1)
+
+
+def client_options(environ: Optional[Mapping[str, str]] = None) -> dict:
+    environ = os.environ if environ is None else environ
+    options = {}
+    for variable, option, cast in CLIENT_OPTIONS:
+        if environ.get(variable):
+            options[option] = cast(environ[variable])
+    if environ.get("MONGO_COMPRESSORS"):
+        compressors = available_compressors(environ["MONGO_COMPRESSORS"])
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+            if "zlib" in compressors and environ.get("MONGO_ZLIB_LEVEL"):
+                options["zlibCompressionLevel"] = int(environ["MONGO_ZLIB_LEVEL"])
+    if environ.get("MONGO_READ_PREFERENCE"):
+        options["read_preference"] = read_preference(
+            environ["MONGO_READ_PREFERENCE"], int(environ.get("MONGO_MAX_STALENESS_SECONDS", "0"))
+        )
+    return options
+
+
+def public_read_preference(environ: Optional[Mapping[str, str]] = None):
+    environ = os.environ if environ is None else environ
+    return read_preference(
+        environ.get("MONGO_PUBLIC_READ_PREFERENCE", "secondaryPreferred"),
+        int(environ.get("MONGO_PUBLIC_MAX_STALENESS_SECONDS", "120")),
+    )
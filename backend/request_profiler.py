@@ -0,0 +1,214 @@
+"""
+Opt-in statistical profiler for production requests.
+
+A fraction of requests (sample_rate), plus any request carrying the debug
+header with the configured token, is profiled. While at least one profiled
+request is in flight a background thread wakes every `interval` seconds and
+records one stack per profiled request: the event loop thread's real stack if
+that request's task is running, otherwise the chain of coroutines it is
+suspended in (so time spent awaiting Mongo or Stripe shows up too). Samples
+are aggregated per route template in memory and exported as collapsed stacks
+(flamegraph.pl, speedscope) or speedscope's JSON format. Nothing runs when no
+request is being profiled.
+
+ProfilerMiddleware must wrap the router directly (be added before any
+BaseHTTPMiddleware), so that the endpoint runs in the task it registers.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+
+MAX_DEPTH = 128
+TRUNCATED = ("[truncated]",)
+
+
+def _frame_label(code, lineno: int) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+def thread_stack(frame) -> Tuple[str, ...]:
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(_frame_label(frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def coroutine_stack(coro) -> Tuple[str, ...]:
+    """The await chain of a suspended coroutine, outermost first."""
+    stack = []
+    while coro is not None and len(stack) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame.f_code, frame.f_lineno))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return tuple(stack)
+
+
+class _Profiled:
+    __slots__ = ("task", "samples", "started")
+
+    def __init__(self, task):
+        self.task = task
+        self.samples = Counter()
+        self.started = time.perf_counter()
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float = 0.0, interval: float = 0.005, debug_header: str = "x-debug-profile",
+                 debug_token: Optional[str] = None, max_stacks_per_route: int = 5000):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.debug_header = debug_header.lower()
+        self.debug_token = debug_token
+        self.max_stacks_per_route = max_stacks_per_route
+        self._lock = threading.Lock()
+        self._active: Dict[int, _Profiled] = {}
+        self._routes: Dict[str, dict] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop = None
+        self._loop_thread_id = None
+
+    def should_profile(self, headers: Headers) -> bool:
+        if self.debug_token and headers.get(self.debug_header) == self.debug_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self) -> _Profiled:
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+        profiled = _Profiled(asyncio.current_task())
+        with self._lock:
+            self._active[id(profiled)] = profiled
+        self._wake.set()
+        return profiled
+
+    def end(self, profiled: _Profiled, route: str):
+        elapsed = time.perf_counter() - profiled.started
+        with self._lock:
+            self._active.pop(id(profiled), None)
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {"requests": 0, "duration_s": 0.0, "samples": 0, "stacks": Counter()}
+            entry["requests"] += 1
+            entry["duration_s"] += elapsed
+            stacks = entry["stacks"]
+            for stack, count in profiled.samples.items():
+                if stack not in stacks and len(stacks) >= self.max_stacks_per_route:
+                    stack = TRUNCATED
+                stacks[stack] += count
+                entry["samples"] += count
+
+    def sample(self):
+        """Record one stack for every profiled request; called from the sampler thread."""
+        running = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        with self._lock:
+            active = list(self._active.values())
+        for profiled in active:
+            try:
+                if profiled.task is running and frame is not None:
+                    stack = ("[running]",) + thread_stack(frame)
+                else:
+                    stack = ("[waiting]",) + coroutine_stack(profiled.task.get_coro())
+            except Exception:
+                continue
+            with self._lock:
+                profiled.samples[stack] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            while self._active:
+                self.sample()
+                time.sleep(self.interval)
+            self._wake.clear()
+            if self._active:
+                self._wake.set()
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "routes": {
+                    route: {
+                        "requests": entry["requests"],
+                        "avg_ms": round(entry["duration_s"] * 1000 / entry["requests"], 3),
+                        "samples": entry["samples"],
+                        "stacks": len(entry["stacks"]),
+                    }
+                    for route, entry in self._routes.items()
+                },
+            }
+
+    def _stacks(self, route: Optional[str]) -> List[Tuple[str, Counter]]:
+        with self._lock:
+            return [(name, Counter(entry["stacks"])) for name, entry in self._routes.items()
+                    if route is None or name == route]
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        lines = []
+        for name, stacks in self._stacks(route):
+            for stack, count in stacks.most_common():
+                lines.append(";".join((name,) + stack) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, route: Optional[str] = None) -> dict:
+        frames, index = [], {}
+        profiles = []
+        for name, stacks in self._stacks(route):
+            samples, weights = [], []
+            for stack, count in stacks.most_common():
+                ids = []
+                for label in stack:
+                    if label not in index:
+                        index[label] = len(frames)
+                        frames.append({"name": label})
+                    ids.append(index[label])
+                samples.append(ids)
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled", "name": name, "unit": "seconds",
+                "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "favatis request profile",
+            "exporter": "favatis",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+        profiled = self.profiler.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            self.profiler.end(profiled, f"{scope['method']} {route.path if route is not None else 'unmatched'}")
@@ -0,0 +1,179 @@
+"""
+Response compression negotiated via Accept-Encoding.
+
+CompressionMiddleware compresses compressible responses (JSON, text, JS, XML,
+SVG) of at least minimum_size bytes with brotli (when the brotli package is
+installed) or gzip, streaming bodies chunk by chunk. Responses that already
+carry a Content-Encoding are passed through untouched, which is how cached
+public responses serve variants compressed once at cache-fill time with
+precompress()/pack_variants().
+"""
+import json
+import zlib
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+PACKED_MAGIC = b"\x00cv1"
+
+
+def available_encodings() -> tuple:
+    return ENCODINGS if brotli else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, supported: Optional[Iterable[str]] = None) -> Optional[str]:
+    prefs = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            prefs[name] = q
+    best, best_q = None, 0.0
+    for encoding in (available_encodings() if supported is None else supported):
+        q = prefs.get(encoding, prefs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = _Compressor(encoding, level if level is not None else (5 if encoding == "br" else 6))
+    return compressor.compress(data) + compressor.finish()
+
+
+def precompress(body: bytes, minimum_size: int) -> Dict[str, bytes]:
+    """All variants of a body, compressed at high levels since this runs once per cache fill."""
+    variants = {"identity": body}
+    if len(body) >= minimum_size:
+        for encoding in available_encodings():
+            variants[encoding] = compress(body, encoding, 9)
+    return variants
+
+
+def pack_variants(variants: Dict[str, bytes]) -> bytes:
+    offsets, blobs, position = {}, [], 0
+    for encoding, data in variants.items():
+        offsets[encoding] = [position, len(data)]
+        blobs.append(data)
+        position += len(data)
+    return PACKED_MAGIC + json.dumps(offsets).encode() + b"\n" + b"".join(blobs)
+
+
+def unpack_variants(packed: bytes) -> Dict[str, bytes]:
+    if not packed.startswith(PACKED_MAGIC):
+        return {"identity": packed}
+    header, _, data = packed[len(PACKED_MAGIC):].partition(b"\n")
+    return {encoding: data[start:start + length] for encoding, (start, length) in json.loads(header).items()}
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: MutableHeaders) -> bool:
+        return (
+            is_compressible(headers.get("content-type", ""))
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+        )
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(scope=self.start_message)
+            compressible = self._should_compress(headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": self.compressor.compress(body),
+                                  "more_body": True})
+                return
+            body = self.compressor.compress(body) + self.compressor.finish()
+            headers["Content-Length"] = str(len(body))
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
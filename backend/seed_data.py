@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Synthetic data seeder for scale testing.
+
+Generates users, sessions, artists in every status, tiers, gated content,
+subscriptions and payment transactions at 10k-10M scale with pymongo bulk
+inserts spread over a thread pool. Every document is derived from
+(seed, kind, index), so a given seed always produces the same dataset
+regardless of batch size or worker count. Content bodies are stored the way
+the API writes them (excerpt, has_more and, with --content-compression, a
+compressed content_body); trending scores and artist stats are left to the
+server's jobs.
+
+Run with: python seed_data.py --users 1M --seed 42 --workers 8 --drop
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import content_bodies
+
+ROOT_DIR = Path(__file__).parent
+
+COLLECTIONS = ["users", "user_sessions", "artists", "subscription_tiers", "gated_content",
+               "subscriptions", "payment_transactions"]
+
+ARTIST_STATUSES = [("approved", 0.70), ("pending", 0.15), ("draft", 0.10), ("rejected", 0.05)]
+CONTENT_TYPES = [("text", 0.6), ("link", 0.25), ("video", 0.15)]
+FIRST_WORDS = ["Echo", "Velvet", "Neon", "Static", "Lunar", "Amber", "Golden", "Midnight", "Paper", "Silver",
+               "Crimson", "Hollow", "Wild", "Electric", "Quiet", "Northern", "Glass", "Honey", "Iron", "Coral"]
+SECOND_WORDS = ["Waves", "Foxes", "Avenue", "Garden", "Signal", "Harbor", "Choir", "Engine", "Parade", "Theory",
+                "Atlas", "Kites", "Bloom", "Machine", "Rivers", "Tapes", "Lights", "Ghosts", "Season", "Circuit"]
+FAN_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+             "Deniz", "Mina", "Leo", "Ada", "Noor", "Kai", "Iris", "Omar", "Lena", "Theo"]
+LOREM = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco laboris").split()
+BENEFITS = ["Early access to releases", "Behind the scenes posts", "Monthly livestream", "Exclusive demos",
+            "Discord role", "Signed merch discount", "Vote on setlists", "Credits on next album"]
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 270
+
+
+def parse_count(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    number = value[:-1] if multiplier > 1 else value
+    return int(float(number) * multiplier)
+
+
+class Generator:
+    """Deterministic document factory; every method is a pure function of (seed, index)."""
+
+    def __init__(self, seed: int, users: int, artist_ratio: float, content_codec: str = "none",
+                 content_compress_min_bytes: int = 4096):
+        self.seed = seed
+        self.users = users
+        self.artists = max(1, int(users * artist_ratio))
+        self.content_codec = content_codec
+        self.content_compress_min_bytes = content_compress_min_bytes
+
+    def _hash(self, kind: str, key) -> bytes:
+        return hashlib.blake2b(f"{self.seed}:{kind}:{key}".encode(), digest_size=16).digest()
+
+    def id(self, prefix: str, key) -> str:
+        return f"{prefix}_{self._hash(prefix, key).hex()[:12]}"
+
+    def unit(self, kind: str, key) -> float:
+        return int.from_bytes(self._hash(kind, key)[:8], "big") / 2 ** 64
+
+    def rng(self, kind: str, key) -> random.Random:
+        return random.Random(self._hash(kind, key))
+
+    @staticmethod
+    def _weighted(choices, u: float) -> str:
+        for value, weight in choices:
+            if u < weight:
+                return value
+            u -= weight
+        return choices[-1][0]
+
+    def _timestamp(self, u: float, after: datetime = EPOCH) -> datetime:
+        remaining = (EPOCH + timedelta(days=SPAN_DAYS) - after).total_seconds()
+        return after + timedelta(seconds=max(0.0, remaining) * u)
+
+    def artist_status(self, artist_index: int) -> str:
+        return self._weighted(ARTIST_STATUSES, self.unit("artist_status", artist_index))
+
+    def tier_count(self, artist_index: int) -> int:
+        if self.artist_status(artist_index) != "approved":
+            return 0
+        return 1 + int(self.unit("tier_count", artist_index) * 4)
+
+    def user_created_at(self, user_index: int) -> datetime:
+        return self._timestamp(self.unit("user_created", user_index) * 0.6)
+
+    def user(self, i: int) -> dict:
+        rng = self.rng("user", i)
+        is_artist = i < self.artists
+        name = (f"{rng.choice(FIRST_WORDS)} {rng.choice(SECOND_WORDS)}" if is_artist
+                else f"{rng.choice(FAN_NAMES)} {rng.choice(FAN_NAMES)[0]}.")
+        return {
+            "user_id": self.id("user", i),
+            "email": f"{'artist' if is_artist else 'fan'}{i}@seed.favatis.test",
+            "name": name,
+            "role": "artist" if is_artist else "fan",
+            "picture": None,
+            "created_at": self.user_created_at(i).isoformat(),
+        }
+
+    def sessions(self, i: int) -> list:
+        rng = self.rng("sessions", i)
+        created = self.user_created_at(i)
+        docs = []
+        for s in range(rng.choice([0, 1, 1, 1, 2, 3])):
+            started = self._timestamp(rng.random(), created)
+            docs.append({
+                "user_id": self.id("user", i),
+                "session_token": f"session_{self._hash('session', f'{i}:{s}').hex()}",
+                "expires_at": started + timedelta(days=7),
+                "created_at": started,
+            })
+        return docs
+
+    def artist(self, i: int) -> dict:
+        rng = self.rng("artist", i)
+        status = self.artist_status(i)
+        created = self.user_created_at(i)
+        submitted = self._timestamp(rng.random() * 0.2, created) if status != "draft" else None
+        approved = self._timestamp(rng.random() * 0.1, submitted) if status == "approved" else None
+        bio_words = rng.randint(10, 80)
+        return {
+            "artist_id": self.id("artist", i),
+            "user_id": self.id("user", i),
+            "name": self.user(i)["name"],
+            "bio": " ".join(rng.choice(LOREM) for _ in range(bio_words)).capitalize() + ".",
+            "profile_image": None,
+            "status": status,
+            "spotify_link": f"https://open.spotify.com/artist/{self._hash('spotify', i).hex()[:22]}",
+            "submitted_at": submitted.isoformat() if submitted else None,
+            "approved_at": approved.isoformat() if approved else None,
+            "created_at": created.isoformat(),
+        }
+
+    def tiers(self, i: int) -> list:
+        rng = self.rng("tiers", i)
+        created = self.user_created_at(i)
+        return [{
+            "tier_id": self.id("tier", f"{i}:{t}"),
+            "artist_id": self.id("artist", i),
+            "name": ["Supporter", "Insider", "Backstage", "Producer"][t],
+            "price": [3.0, 5.0, 10.0, 25.0][t],
+            "benefits": rng.sample(BENEFITS, 2 + t),
+            "stripe_price_id": None,
+            "created_at": self._timestamp(rng.random() * 0.3, created).isoformat(),
+        } for t in range(self.tier_count(i))]
+
+    def content(self, i: int) -> list:
+        tier_count = self.tier_count(i)
+        if not tier_count:
+            return []
+        rng = self.rng("content", i)
+        created = self.user_created_at(i)
+        count = int(rng.expovariate(1 / 12))
+        docs = []
+        for c in range(min(count, 200)):
+            content_type = self._weighted(CONTENT_TYPES, rng.random())
+            lowest_tier = rng.randrange(tier_count)
+            title = " ".join(rng.choice(LOREM) for _ in range(rng.randint(2, 6))).title()
+            text = (" ".join(rng.choice(LOREM) for _ in range(int(rng.lognormvariate(5, 1))))
+                    if content_type == "text" else None)
+            docs.append({
+                "content_id": self.id("content", f"{i}:{c}"),
+                "artist_id": self.id("artist", i),
+                "title": title,
+                "content_type": content_type,
+                **content_bodies.body_fields(text, self.content_codec, self.content_compress_min_bytes),
+                "external_link": (f"https://media.example.com/{self._hash('media', f'{i}:{c}').hex()[:16]}"
+                                  if content_type != "text" else None),
+                "tier_ids": [self.id("tier", f"{i}:{t}") for t in range(lowest_tier, tier_count)],
+                "created_at": self._timestamp(rng.random(), created).isoformat(),
+            })
+        return docs
+
+    def popular_artist(self, rng: random.Random) -> int:
+        """Pick an approved artist with a long-tailed popularity skew."""
+        index = int(self.artists * rng.random() ** 3)
+        for probe in range(self.artists):
+            candidate = (index + probe) % self.artists
+            if self.tier_count(candidate):
+                return candidate
+        return -1
+
+    def subscriptions_and_transactions(self, i: int):
+        rng = self.rng("subscriptions", i)
+        fan_id = self.id("user", i)
+        created = self.user_created_at(i)
+        subs, txns = [], []
+        seen = set()
+        for s in range(min(int(rng.expovariate(1 / 1.5)), 20)):
+            artist_index = self.popular_artist(rng)
+            if artist_index < 0 or artist_index in seen:
+                continue
+            seen.add(artist_index)
+            tier = rng.randrange(self.tier_count(artist_index))
+            tier_id = self.id("tier", f"{artist_index}:{tier}")
+            artist_id = self.id("artist", artist_index)
+            amount = [3.0, 5.0, 10.0, 25.0][tier]
+
+            for attempt in range(rng.choice([0, 0, 0, 1, 2])):
+                txns.append(self._transaction(rng, fan_id, artist_id, tier_id, amount, created,
+                                              f"{i}:{s}:abandoned:{attempt}", paid=False))
+            txn = self._transaction(rng, fan_id, artist_id, tier_id, amount, created, f"{i}:{s}", paid=True)
+            txns.append(txn)
+            status = "active" if rng.random() < 0.85 else "cancelled"
+            subs.append({
+                "subscription_id": self.id("sub", f"{i}:{s}"),
+                "fan_user_id": fan_id,
+                "artist_id": artist_id,
+                "tier_id": tier_id,
+                "stripe_subscription_id": txn["session_id"],
+                "status": status,
+                "started_at": txn["created_at"],
+                "ends_at": (datetime.fromisoformat(txn["created_at"]) + timedelta(days=30)).isoformat(),
+                "renewals_remaining": 0,
+            })
+        return subs, txns
+
+    def _transaction(self, rng, fan_id, artist_id, tier_id, amount, after, key, paid: bool) -> dict:
+        return {
+            "transaction_id": self.id("txn", key),
+            "session_id": f"cs_seed_{self._hash('checkout', key).hex()}",
+            "user_id": fan_id,
+            "artist_id": artist_id,
+            "tier_id": tier_id,
+            "amount": amount,
+            "currency": "usd",
+            "status": "completed" if paid else "pending",
+            "payment_status": "paid" if paid else "initiated",
+            "metadata": {"user_id": fan_id, "artist_id": artist_id, "tier_id": tier_id,
+                         "subscription_type": "monthly"},
+            "created_at": self._timestamp(rng.random(), after).isoformat(),
+        }
+
+
+def _insert(db, batches: dict) -> dict:
+    counts = {}
+    for name, docs in batches.items():
+        if docs:
+            db[name].insert_many(docs, ordered=False)
+        counts[name] = len(docs)
+    return counts
+
+
+def seed_users(db, gen: Generator, start: int, end: int) -> dict:
+    users, sessions = [], []
+    for i in range(start, end):
+        users.append(gen.user(i))
+        sessions.extend(gen.sessions(i))
+    return _insert(db, {"users": users, "user_sessions": sessions})
+
+
+def seed_artists(db, gen: Generator, start: int, end: int) -> dict:
+    artists, tiers, content = [], [], []
+    for i in range(start, end):
+        artists.append(gen.artist(i))
+        tiers.extend(gen.tiers(i))
+        content.extend(gen.content(i))
+    return _insert(db, {"artists": artists, "subscription_tiers": tiers, "gated_content": content})
+
+
+def seed_fans(db, gen: Generator, start: int, end: int) -> dict:
+    subs, txns = [], []
+    for i in range(start, end):
+        s, t = gen.subscriptions_and_transactions(i)
+        subs.extend(s)
+        txns.extend(t)
+    return _insert(db, {"subscriptions": subs, "payment_transactions": txns})
+
+
+def run(db, gen: Generator, batch_size: int, workers: int) -> dict:
+    jobs = []
+    for start in range(0, gen.users, batch_size):
+        jobs.append((seed_users, start, min(start + batch_size, gen.users)))
+    for start in range(0, gen.artists, batch_size):
+        jobs.append((seed_artists, start, min(start + batch_size, gen.artists)))
+    for start in range(gen.artists, gen.users, batch_size):
+        jobs.append((seed_fans, start, min(start + batch_size, gen.users)))
+
+    totals = {name: 0 for name in COLLECTIONS}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, db, gen, start, end) for fn, start, end in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            for name, count in future.result().items():
+                totals[name] += count
+            if done % max(1, len(futures) // 20) == 0 or done == len(futures):
+                elapsed = time.perf_counter() - started
+                print(f"  {done}/{len(futures)} batches, {sum(totals.values()):,} docs, {elapsed:.1f}s")
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="10k", help="total users, e.g. 10k, 250k, 10M")
+    parser.add_argument("--artist-ratio", type=float, default=0.02, help="fraction of users that are artists")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--content-compression", help="none, gzip, zstd or auto; defaults to CONTENT_COMPRESSION")
+    parser.add_argument("--db-name", help="defaults to DB_NAME from .env")
+    parser.add_argument("--drop", action="store_true", help="drop seeded collections first")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+
+    load_dotenv(ROOT_DIR / '.env')
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = args.db_name or os.environ.get('DB_NAME')
+    if not mongo_url or not db_name:
+        print("Error: MONGO_URL and DB_NAME must be set in .env file")
+        return 1
+
+    client = MongoClient(mongo_url, maxPoolSize=args.workers + 2)
+    db = client[db_name]
+    try:
+        if args.drop:
+            for name in COLLECTIONS:
+                db.drop_collection(name)
+
+        codec = args.content_compression or os.environ.get('CONTENT_COMPRESSION', 'none')
+        if codec == 'auto':
+            codec = content_bodies.default_codec()
+        gen = Generator(args.seed, parse_count(args.users), args.artist_ratio, codec,
+                        int(os.environ.get('CONTENT_COMPRESSION_MIN_BYTES', '4096')))
+        print(f"Seeding {gen.users:,} users ({gen.artists:,} artists) into {db_name} "
+              f"with seed {args.seed}, {args.workers} workers")
+        started = time.perf_counter()
+        totals = run(db, gen, args.batch_size, args.workers)
+        elapsed = time.perf_counter() - started
+        print(f"✓ Inserted {sum(totals.values()):,} documents in {elapsed:.1f}s")
+        for name in COLLECTIONS:
+            print(f"  {name:<22} {totals[name]:>12,}")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
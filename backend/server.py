@@ -1,8 +1,13 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Header, Depends, BackgroundTasks
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout, OperationFailure, WTimeoutError
+import asyncio
+import hmac
 import os
 import logging
 from pathlib import Path
@@ -11,19 +16,190 @@ from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 import re
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
+import time
+from db_monitoring import DBCommandMonitor, RequestDBStats, RouteDBStats, current_db_stats
+import metrics
+import mongo_settings
+from session_store import SessionStore
+from signed_tokens import TokenSigner, RevocationList, InvalidToken, ExpiredToken, is_signed_token
+from auth_cache import AuthContext, AuthContextCache, token_key
+from cache import create_cache
+from change_streams import ArtistStatsView, ChangeStreamWatcher, changed_document
+import content_bodies
+import unique_keys
+import response_compression
+from response_compression import CompressionMiddleware
+from admission import AdmissionMiddleware, parse_rules
+from request_profiler import RequestProfiler, ProfilerMiddleware
+from loop_watchdog import LoopWatchdog, WatchdogMiddleware
+from warmup import ReadinessGate, Warmup
+from stripe_prices import PriceProvisioner
+from subscription_scheduler import SubscriptionScheduler
+from trending import PUBLIC_ORDER as TRENDING_PUBLIC_ORDER, TrendingRanker
+from similar_artists import SimilarArtists
+from transaction_archive import ArchiveNotConfigured, TransactionArchive
+from event_log import EventLog
+from single_flight import SingleFlight
+from media_store import LocalObjectStore, GridFSObjectStore, ThumbnailRenderer, ObjectTooLarge, EmptyObject, parse_range
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+db_monitor = DBCommandMonitor(slow_query_ms=float(os.environ.get('SLOW_QUERY_MS', '100')))
+db_route_stats = RouteDBStats()
+client = AsyncIOMotorClient(
+    mongo_url,
+    event_listeners=[db_monitor, metrics.PoolMetricsListener()],
+    **mongo_settings.client_options()
+)
 db = client[os.environ['DB_NAME']]
+# Anonymous catalogue reads tolerate bounded staleness; auth and payments stay on db.
+public_db = client.get_database(os.environ['DB_NAME'], read_preference=mongo_settings.public_read_preference())
+
+session_ttl_days = int(os.environ.get('SESSION_TTL_DAYS', '7'))
+session_store = SessionStore(
+    db.user_sessions,
+    ttl=timedelta(days=session_ttl_days),
+    max_sessions_per_user=int(os.environ.get('MAX_SESSIONS_PER_USER', '5')),
+    renew_interval=timedelta(minutes=int(os.environ.get('SESSION_RENEW_INTERVAL_MINUTES', '60'))),
+)
+
+token_signer = None
+if os.environ.get('SESSION_TOKEN_MODE', 'opaque') == 'signed':
+    token_signer = TokenSigner(os.environ['SESSION_SIGNING_SECRET'], ttl=timedelta(days=session_ttl_days))
+revocation_list = RevocationList(db.revoked_tokens)
+auth_cache = AuthContextCache(
+    ttl=float(os.environ.get('AUTH_CACHE_TTL_SECONDS', '30')),
+    max_entries=int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '10000')),
+)
+cache = create_cache(
+    os.environ.get('CACHE_BACKEND', 'memory'),
+    redis_url=os.environ.get('REDIS_URL'),
+    default_ttl=float(os.environ.get('PUBLIC_CACHE_TTL_SECONDS', '60')),
+)
+public_reads = SingleFlight("public")
+# Public reads may lag on a secondary; keys invalidated by a write are rebuilt
+# from the primary until the lag bound has passed, so the re-render cannot
+# cache the pre-write data again.
+primary_read_window = float(os.environ.get('PRIMARY_READ_WINDOW_SECONDS',
+                                           os.environ.get('MONGO_PUBLIC_MAX_STALENESS_SECONDS', '120')))
+primary_reads_until = {}
+
+def read_db_for(key: str):
+    until = primary_reads_until.get(key)
+    if until is None:
+        return public_db
+    if until > time.monotonic():
+        return db
+    primary_reads_until.pop(key, None)
+    return public_db
+
+def apply_invalidation(message: dict):
+    for user_id in message.get("users", ()):
+        auth_cache.invalidate_user(user_id)
+    for key in message.get("sessions", ()):
+        auth_cache.invalidate_key(key)
+    for jti, exp in message.get("revoked", ()):
+        revocation_list.add(jti, exp)
+    keys = message.get("keys", ())
+    public_reads.forget(*keys)
+    if keys and primary_read_window > 0:
+        now = time.monotonic()
+        for key, until in list(primary_reads_until.items()):
+            if until <= now:
+                del primary_reads_until[key]
+        for key in keys:
+            primary_reads_until[key] = now + primary_read_window
+
+cache.bus.subscribe(apply_invalidation)
+subscription_scheduler = SubscriptionScheduler(
+    db.subscriptions,
+    period=timedelta(days=int(os.environ.get('SUBSCRIPTION_PERIOD_DAYS', '30'))),
+    batch_size=int(os.environ.get('SUBSCRIPTION_BATCH_SIZE', '200')),
+    concurrency=int(os.environ.get('SUBSCRIPTION_CONCURRENCY', '8')),
+    lease=timedelta(seconds=int(os.environ.get('SUBSCRIPTION_LEASE_SECONDS', '120'))),
+    on_transition=lambda sub, result: metrics.subscription_transitions.inc(result=result),
+)
+trending_ranker = TrendingRanker(
+    db,
+    half_life=timedelta(days=float(os.environ.get('TRENDING_HALF_LIFE_DAYS', '7'))),
+    window=timedelta(days=float(os.environ.get('TRENDING_WINDOW_DAYS', '60'))),
+    content_weight=float(os.environ.get('TRENDING_CONTENT_WEIGHT', '0.5')),
+)
+MAX_TRENDING = 50
+similar_artists = SimilarArtists(
+    db,
+    top_k=int(os.environ.get('SIMILAR_ARTISTS_TOP_K', '10')),
+    min_overlap=int(os.environ.get('SIMILAR_ARTISTS_MIN_OVERLAP', '1')),
+)
+transaction_archive = TransactionArchive(
+    db,
+    os.environ.get('ARCHIVE_ROOT') or None,
+    paid_after=timedelta(days=float(os.environ.get('ARCHIVE_PAID_AFTER_DAYS', '90'))),
+    abandoned_after=timedelta(days=float(os.environ.get('ARCHIVE_ABANDONED_AFTER_DAYS', '7'))),
+    batch_size=int(os.environ.get('ARCHIVE_BATCH_SIZE', '5000')),
+)
+compression_min_size = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+if os.environ.get('MEDIA_STORE', 'local') == 'gridfs':
+    media_store = GridFSObjectStore(db, bucket_name="media")
+else:
+    media_store = LocalObjectStore(Path(os.environ.get('MEDIA_ROOT', str(ROOT_DIR / 'media'))))
+media_max_bytes = int(os.environ.get('MEDIA_MAX_BYTES', str(25 * 1024 * 1024)))
+thumbnail_renderer = ThumbnailRenderer(
+    sizes=[int(s) for s in os.environ.get('MEDIA_THUMBNAIL_SIZES', '128,512').split(',') if s],
+    workers=int(os.environ.get('MEDIA_THUMBNAIL_WORKERS', '2')),
+)
+stats_view = ArtistStatsView(db)
+event_log = EventLog(
+    db.events,
+    max_batch=int(os.environ.get('EVENT_LOG_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('EVENT_LOG_FLUSH_INTERVAL_SECONDS', '1')),
+    max_buffer=int(os.environ.get('EVENT_LOG_MAX_BUFFER', '10000')),
+)
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('PROFILER_SAMPLE_RATE', '0')),
+    interval=float(os.environ.get('PROFILER_INTERVAL_MS', '5')) / 1000,
+    debug_token=os.environ.get('PROFILER_DEBUG_TOKEN') or None,
+)
+loop_watchdog = LoopWatchdog(
+    interval=float(os.environ.get('LOOP_WATCHDOG_INTERVAL_MS', '50')) / 1000,
+    threshold=float(os.environ.get('LOOP_STALL_THRESHOLD_MS', '100')) / 1000,
+)
+change_watcher = None
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 stripe_api_key = os.environ.get('STRIPE_API_KEY')
+# The payment integration is imported on first use to keep cold starts
+# short; the benchmark assigns stubs here instead.
+StripeCheckout = None
+CheckoutSessionRequest = None
+
+def stripe_checkout_for(request: Request):
+    global StripeCheckout
+    if StripeCheckout is None:
+        from emergentintegrations.payments.stripe.checkout import StripeCheckout
+    return StripeCheckout(api_key=stripe_api_key, webhook_url=f"{str(request.base_url)}api/webhook/stripe")
+
+def checkout_session_request(**fields):
+    global CheckoutSessionRequest
+    if CheckoutSessionRequest is None:
+        from emergentintegrations.payments.stripe.checkout import CheckoutSessionRequest
+    return CheckoutSessionRequest(**fields)
+
+price_provisioner = None
+if stripe_api_key and os.environ.get('STRIPE_PRICE_REUSE', 'true').lower() == 'true':
+    price_provisioner = PriceProvisioner(
+        db.subscription_tiers,
+        stripe_api_key,
+        api_base=os.environ.get('STRIPE_API_BASE'),
+    )
+content_codec = os.environ.get('CONTENT_COMPRESSION', 'none')
+if content_codec == 'auto':
+    content_codec = content_bodies.default_codec()
+content_compress_min_bytes = int(os.environ.get('CONTENT_COMPRESSION_MIN_BYTES', '4096'))
 
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -102,6 +278,18 @@ class GatedContent(BaseModel):
     tier_ids: List[str]
     created_at: datetime
 
+class GatedContentSummary(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    content_id: str
+    artist_id: str
+    title: str
+    content_type: str
+    excerpt: Optional[str] = None
+    has_more: bool = False
+    external_link: Optional[str] = None
+    tier_ids: List[str]
+    created_at: datetime
+
 class GatedContentCreate(BaseModel):
     title: str
     content_type: str
@@ -137,24 +325,29 @@ class PaymentTransaction(BaseModel):
 class ApprovalRequest(BaseModel):
     approved: bool
 
-async def get_current_user(request: Request, authorization: Optional[str] = Header(None)) -> User:
+def get_session_token(request: Request, authorization: Optional[str]) -> Optional[str]:
     session_token = request.cookies.get('session_token')
     if not session_token and authorization:
         session_token = authorization.replace('Bearer ', '')
-    
-    if not session_token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    session = await db.user_sessions.find_one({"session_token": session_token}, {"_id": 0})
+    return session_token
+
+async def authenticate(session_token: str):
+    if token_signer and is_signed_token(session_token):
+        try:
+            claims = token_signer.verify(session_token)
+        except ExpiredToken:
+            raise HTTPException(status_code=401, detail="Session expired")
+        except InvalidToken:
+            raise HTTPException(status_code=401, detail="Invalid session")
+        if revocation_list.is_revoked(claims["jti"]):
+            raise HTTPException(status_code=401, detail="Invalid session")
+        return User(**TokenSigner.user_fields(claims)), claims["exp"] - time.time(), False
+    
+    session = await session_store.get(session_token)
     if not session:
         raise HTTPException(status_code=401, detail="Invalid session")
     
-    expires_at = session["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-    if expires_at < datetime.now(timezone.utc):
+    if session_store.is_expired(session):
         raise HTTPException(status_code=401, detail="Session expired")
     
     user_doc = await db.users.find_one({"user_id": session["user_id"]}, {"_id": 0})
@@ -164,7 +357,102 @@ async def get_current_user(request: Request, authorization: Optional[str] = Head
     if isinstance(user_doc['created_at'], str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
-    return User(**user_doc)
+    max_age = (session_store.expires_at(session) - datetime.now(timezone.utc)).total_seconds()
+    return User(**user_doc), max_age, session.get("renewed", False)
+
+def set_session_cookie(response: Response, session_token: str, max_age: float = session_ttl_days * 24 * 60 * 60):
+    response.set_cookie(
+        key="session_token",
+        value=session_token,
+        httponly=True,
+        secure=True,
+        samesite="none",
+        path="/",
+        max_age=int(max_age)
+    )
+
+async def get_auth_context(request: Request, authorization: Optional[str] = Header(None)) -> AuthContext:
+    ctx = getattr(request.state, "auth_context", None)
+    if ctx is not None:
+        return ctx
+    
+    session_token = get_session_token(request, authorization)
+    if not session_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    ctx = auth_cache.get(session_token)
+    metrics.record_cache("auth", ctx is not None)
+    if ctx is None:
+        user, max_age, renewed = await authenticate(session_token)
+        if renewed and request.cookies.get('session_token') == session_token:
+            # Sliding expiration moved expires_at; the browser cookie must follow.
+            request.state.renewed_session = (session_token, max_age)
+        ctx = AuthContext(user)
+        if user.role == "artist":
+            artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0, "artist_id": 1})
+            if artist_doc:
+                ctx.artist_id = artist_doc["artist_id"]
+        auth_cache.put(session_token, ctx, max_age)
+    
+    request.state.auth_context = ctx
+    return ctx
+
+async def get_current_user(request: Request, authorization: Optional[str] = Header(None)) -> User:
+    ctx = await get_auth_context(request, authorization)
+    return ctx.user
+
+async def cached_json(request: Request, key: str, build) -> Response:
+    packed = await cache.get(key)
+    metrics.record_cache("public", packed is not None)
+    if packed is None:
+        async def render():
+            generation = cache.generation(key)
+            body = JSONResponse(jsonable_encoder(await build(read_db_for(key)))).body
+            packed = response_compression.pack_variants(response_compression.precompress(body, compression_min_size))
+            await cache.set(key, packed, generation=generation)
+            return packed
+        
+        # Concurrent misses for the same key share one query and render.
+        packed = await public_reads.do(key, render)
+    
+    variants = response_compression.unpack_variants(packed)
+    encoding = response_compression.choose_encoding(
+        request.headers.get("accept-encoding", ""),
+        [e for e in response_compression.ENCODINGS if e in variants]
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding or "identity"], media_type="application/json", headers=headers)
+
+async def get_artist_context(ctx: AuthContext = Depends(get_auth_context)) -> AuthContext:
+    if ctx.user.role != "artist":
+        raise HTTPException(status_code=403, detail="Not an artist")
+    if not ctx.artist_id:
+        raise HTTPException(status_code=404, detail="Artist profile not found")
+    return ctx
+
+async def issue_session(user_doc: dict, session_token: Optional[str] = None, new_user: bool = False) -> str:
+    if token_signer:
+        return token_signer.issue(user_doc)
+    return await session_store.create(user_doc["user_id"], session_token, enforce_cap=not new_user)
+
+async def upsert_google_user(email: str, name: str, picture: Optional[str]) -> dict:
+    return await db.users.find_one_and_update(
+        {"email": email},
+        {
+            "$set": {"name": name, "picture": picture},
+            "$setOnInsert": {
+                "user_id": f"user_{uuid.uuid4().hex[:12]}",
+                "email": email,
+                "role": "fan",
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+        },
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
 
 @api_router.post("/auth/google-session")
 async def process_google_session(request: Request, response: Response):
@@ -176,14 +464,15 @@ async def process_google_session(request: Request, response: Response):
     
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data',
-                headers={'X-Session-ID': session_id}
-            ) as resp:
-                if resp.status != 200:
-                    raise HTTPException(status_code=400, detail="Invalid session_id")
-                user_data = await resp.json()
+        async with metrics.track_upstream("oauth", "session_data"):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(
+                    'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data',
+                    headers={'X-Session-ID': session_id}
+                ) as resp:
+                    if resp.status != 200:
+                        raise HTTPException(status_code=400, detail="Invalid session_id")
+                    user_data = await resp.json()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch session data: {str(e)}")
     
@@ -192,44 +481,19 @@ async def process_google_session(request: Request, response: Response):
     picture = user_data.get('picture')
     session_token = user_data['session_token']
     
-    user_doc = await db.users.find_one({"email": email}, {"_id": 0})
-    
-    if user_doc:
-        user_id = user_doc['user_id']
-        await db.users.update_one(
-            {"user_id": user_id},
-            {"$set": {"name": name, "picture": picture}}
-        )
-    else:
-        user_id = f"user_{uuid.uuid4().hex[:12]}"
-        user_doc = {
-            "user_id": user_id,
-            "email": email,
-            "name": name,
-            "role": "fan",
-            "picture": picture,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.users.insert_one(user_doc)
+    try:
+        user_doc = await upsert_google_user(email, name, picture)
+    except DuplicateKeyError:
+        # A concurrent first login for the same email won the insert; the
+        # retry matches the existing document and only applies $set.
+        user_doc = await upsert_google_user(email, name, picture)
     
-    await db.user_sessions.insert_one({
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-        "created_at": datetime.now(timezone.utc)
-    })
+    await cache.invalidate(users=[user_doc["user_id"]])
+    session_token = await issue_session(user_doc, session_token)
+    event_log.record("user.login", actor_id=user_doc["user_id"], method="google")
     
-    response.set_cookie(
-        key="session_token",
-        value=session_token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7 * 24 * 60 * 60
-    )
+    set_session_cookie(response, session_token)
     
-    user_doc = await db.users.find_one({"user_id": user_id}, {"_id": 0})
     if isinstance(user_doc['created_at'], str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
@@ -237,12 +501,7 @@ async def process_google_session(request: Request, response: Response):
 
 @api_router.post("/auth/email-signup")
 async def email_signup(signup_request: EmailSignupRequest, response: Response):
-    existing = await db.users.find_one({"email": signup_request.email}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    session_token = f"session_{uuid.uuid4().hex}"
     
     user_doc = {
         "user_id": user_id,
@@ -252,24 +511,15 @@ async def email_signup(signup_request: EmailSignupRequest, response: Response):
         "picture": None,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    await db.user_sessions.insert_one({
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-        "created_at": datetime.now(timezone.utc)
-    })
+    session_token = await issue_session(user_doc, new_user=True)
+    event_log.record("user.signup", actor_id=user_id, role=signup_request.role, method="email")
     
-    response.set_cookie(
-        key="session_token",
-        value=session_token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7 * 24 * 60 * 60
-    )
+    set_session_cookie(response, session_token)
     
     if isinstance(user_doc['created_at'], str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
@@ -284,17 +534,21 @@ async def get_me(request: Request, authorization: Optional[str] = Header(None)):
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     session_token = request.cookies.get('session_token')
-    if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+    if session_token and token_signer and is_signed_token(session_token):
+        try:
+            claims = token_signer.verify(session_token)
+            await revocation_list.revoke(claims)
+            await cache.invalidate(sessions=[token_key(session_token)], revoked=[[claims["jti"], claims["exp"]]])
+        except InvalidToken:
+            pass
+    elif session_token:
+        await session_store.delete(session_token)
+        await cache.invalidate(sessions=[token_key(session_token)])
     response.delete_cookie(key="session_token", path="/")
     return {"message": "Logged out successfully"}
 
 @api_router.post("/artist/apply")
 async def apply_as_artist(application: ArtistApplicationRequest):
-    existing = await db.users.find_one({"email": application.email}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
     user_id = f"user_{uuid.uuid4().hex[:12]}"
     user_doc = {
         "user_id": user_id,
@@ -305,7 +559,10 @@ async def apply_as_artist(application: ArtistApplicationRequest):
         "spotify_link": application.spotify_link,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     artist_id = f"artist_{uuid.uuid4().hex[:12]}"
     artist_doc = {
@@ -320,25 +577,17 @@ async def apply_as_artist(application: ArtistApplicationRequest):
         "approved_at": None,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.artists.insert_one(artist_doc)
-    
-    session_token = f"session_{uuid.uuid4().hex}"
-    await db.user_sessions.insert_one({
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-        "created_at": datetime.now(timezone.utc)
-    })
+    _, session_token = await asyncio.gather(
+        db.artists.insert_one(artist_doc),
+        issue_session(user_doc, new_user=True)
+    )
+    event_log.record("artist.applied", actor_id=user_id, artist_id=artist_id)
     
     return {"message": "Artist application created", "session_token": session_token, "user_id": user_id}
 
 @api_router.get("/artist/profile")
-async def get_artist_profile(request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
+async def get_artist_profile(ctx: AuthContext = Depends(get_artist_context)):
+    artist_doc = await db.artists.find_one({"artist_id": ctx.artist_id}, {"_id": 0})
     if not artist_doc:
         raise HTTPException(status_code=404, detail="Artist profile not found")
     
@@ -349,18 +598,21 @@ async def get_artist_profile(request: Request, authorization: Optional[str] = He
     return ArtistProfile(**artist_doc)
 
 @api_router.put("/artist/profile")
-async def update_artist_profile(update: ArtistProfileUpdate, request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
+async def update_artist_profile(update: ArtistProfileUpdate, ctx: AuthContext = Depends(get_artist_context)):
     update_data = {k: v for k, v in update.dict(exclude_unset=True).items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    await db.artists.update_one({"user_id": user.user_id}, {"$set": update_data})
+    artist_doc = await db.artists.find_one_and_update(
+        {"artist_id": ctx.artist_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not artist_doc:
+        raise HTTPException(status_code=404, detail="Artist profile not found")
+    await cache.invalidate(f"artist:{ctx.artist_id}", "artists:public")
     
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
     for field in ['created_at', 'submitted_at', 'approved_at']:
         if artist_doc.get(field) and isinstance(artist_doc[field], str):
             artist_doc[field] = datetime.fromisoformat(artist_doc[field])
@@ -368,30 +620,55 @@ async def update_artist_profile(update: ArtistProfileUpdate, request: Request, a
     return ArtistProfile(**artist_doc)
 
 @api_router.post("/artist/submit")
-async def submit_artist_profile(request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
+async def submit_artist_profile(ctx: AuthContext = Depends(get_artist_context)):
     await db.artists.update_one(
-        {"user_id": user.user_id},
+        {"artist_id": ctx.artist_id},
         {"$set": {"status": "pending", "submitted_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await cache.invalidate(f"artist:{ctx.artist_id}", "artists:public")
     
     return {"message": "Profile submitted for review"}
 
 @api_router.get("/artists/public", response_model=List[ArtistProfile])
-async def get_public_artists():
-    artists = await db.artists.find({"status": "approved"}, {"_id": 0}).to_list(1000)
-    for artist in artists:
-        for field in ['created_at', 'submitted_at', 'approved_at']:
-            if artist.get(field) and isinstance(artist[field], str):
-                artist[field] = datetime.fromisoformat(artist[field])
-    return [ArtistProfile(**a) for a in artists]
+async def get_public_artists(request: Request):
+    async def build(database):
+        artists = await database.artists.find(
+            {"status": "approved"}, {"_id": 0}
+        ).sort(TRENDING_PUBLIC_ORDER).to_list(1000)
+        for artist in artists:
+            for field in ['created_at', 'submitted_at', 'approved_at']:
+                if artist.get(field) and isinstance(artist[field], str):
+                    artist[field] = datetime.fromisoformat(artist[field])
+        return [ArtistProfile(**a) for a in artists]
+    
+    return await cached_json(request, "artists:public", build)
+
+@api_router.get("/artists/trending", response_model=List[ArtistProfile])
+async def get_trending_artists(request: Request, limit: int = 12):
+    limit = max(1, min(limit, MAX_TRENDING))
+    
+    async def build(database):
+        ranked = await trending_ranker.top(limit)
+        artists = await database.artists.find(
+            {"artist_id": {"$in": ranked}, "status": "approved"}, {"_id": 0}
+        ).to_list(limit)
+        rank = {artist_id: i for i, artist_id in enumerate(ranked)}
+        artists.sort(key=lambda a: rank[a['artist_id']])
+        if len(artists) < limit:
+            artists += await database.artists.find(
+                {"status": "approved", "artist_id": {"$nin": ranked}}, {"_id": 0}
+            ).sort("approved_at", -1).limit(limit - len(artists)).to_list(limit)
+        for artist in artists:
+            for field in ['created_at', 'submitted_at', 'approved_at']:
+                if artist.get(field) and isinstance(artist[field], str):
+                    artist[field] = datetime.fromisoformat(artist[field])
+        return [ArtistProfile(**a) for a in artists]
+    
+    return await cached_json(request, f"artists:trending:{limit}", build)
 
 @api_router.get("/artists/search")
 async def search_artists(q: str):
-    artists = await db.artists.find(
+    artists = await public_db.artists.find(
         {"status": "approved", "name": {"$regex": q, "$options": "i"}},
         {"_id": 0}
     ).to_list(100)
@@ -404,36 +681,33 @@ async def search_artists(q: str):
     return [ArtistProfile(**a) for a in artists]
 
 @api_router.get("/artist/tiers")
-async def get_artist_tiers(request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
-    if not artist_doc:
-        raise HTTPException(status_code=404, detail="Artist profile not found")
-    
-    tiers = await db.subscription_tiers.find({"artist_id": artist_doc["artist_id"]}, {"_id": 0}).to_list(100)
+async def get_artist_tiers(ctx: AuthContext = Depends(get_artist_context)):
+    tiers = await db.subscription_tiers.find({"artist_id": ctx.artist_id}, {"_id": 0}).to_list(100)
     for tier in tiers:
         if isinstance(tier['created_at'], str):
             tier['created_at'] = datetime.fromisoformat(tier['created_at'])
     
     return [SubscriptionTier(**t) for t in tiers]
 
+async def provision_tier_price(tier_doc: dict) -> Optional[str]:
+    if not price_provisioner:
+        return None
+    if tier_doc.get("stripe_price_id"):
+        return tier_doc["stripe_price_id"]
+    async with metrics.track_upstream("stripe", "create_price"):
+        price_id = await price_provisioner.ensure_price(tier_doc)
+    if price_id:
+        tier_doc["stripe_price_id"] = price_id
+        await cache.invalidate(f"tiers:{tier_doc['artist_id']}")
+    return price_id
+
 @api_router.post("/artist/tiers")
-async def create_tier(tier: SubscriptionTierCreate, request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
-    if not artist_doc:
-        raise HTTPException(status_code=404, detail="Artist profile not found")
-    
+async def create_tier(tier: SubscriptionTierCreate, background_tasks: BackgroundTasks,
+                      ctx: AuthContext = Depends(get_artist_context)):
     tier_id = f"tier_{uuid.uuid4().hex[:12]}"
     tier_doc = {
         "tier_id": tier_id,
-        "artist_id": artist_doc["artist_id"],
+        "artist_id": ctx.artist_id,
         "name": tier.name,
         "price": tier.price,
         "benefits": tier.benefits,
@@ -441,6 +715,10 @@ async def create_tier(tier: SubscriptionTierCreate, request: Request, authorizat
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.subscription_tiers.insert_one(tier_doc)
+    await cache.invalidate(f"tiers:{ctx.artist_id}")
+    background_tasks.add_task(provision_tier_price, dict(tier_doc))
+    event_log.record("tier.created", actor_id=ctx.user.user_id, artist_id=ctx.artist_id, tier_id=tier_id,
+                     price=tier.price)
     
     if isinstance(tier_doc['created_at'], str):
         tier_doc['created_at'] = datetime.fromisoformat(tier_doc['created_at'])
@@ -448,12 +726,15 @@ async def create_tier(tier: SubscriptionTierCreate, request: Request, authorizat
     return SubscriptionTier(**tier_doc)
 
 @api_router.get("/artist/{artist_id}/tiers")
-async def get_artist_tiers_public(artist_id: str):
-    tiers = await db.subscription_tiers.find({"artist_id": artist_id}, {"_id": 0}).to_list(100)
-    for tier in tiers:
-        if isinstance(tier['created_at'], str):
-            tier['created_at'] = datetime.fromisoformat(tier['created_at'])
-    return [SubscriptionTier(**t) for t in tiers]
+async def get_artist_tiers_public(artist_id: str, request: Request):
+    async def build(database):
+        tiers = await database.subscription_tiers.find({"artist_id": artist_id}, {"_id": 0}).to_list(100)
+        for tier in tiers:
+            if isinstance(tier['created_at'], str):
+                tier['created_at'] = datetime.fromisoformat(tier['created_at'])
+        return [SubscriptionTier(**t) for t in tiers]
+    
+    return await cached_json(request, f"tiers:{artist_id}", build)
 
 @api_router.post("/subscribe/checkout")
 async def create_subscription_checkout(data: dict, request: Request, authorization: Optional[str] = Header(None)):
@@ -477,24 +758,34 @@ async def create_subscription_checkout(data: dict, request: Request, authorizati
     success_url = f"{origin_url}/fan/subscription-success?session_id={{{{CHECKOUT_SESSION_ID}}}}"
     cancel_url = f"{origin_url}/artist/{tier_doc['artist_id']}"
     
-    host_url = str(request.base_url)
-    webhook_url = f"{host_url}api/webhook/stripe"
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
-    
-    checkout_request = CheckoutSessionRequest(
-        amount=amount,
-        currency=currency,
-        success_url=success_url,
-        cancel_url=cancel_url,
-        metadata={
-            "user_id": user.user_id,
-            "artist_id": tier_doc['artist_id'],
-            "tier_id": tier_id,
-            "subscription_type": "monthly"
-        }
-    )
+    stripe_checkout = stripe_checkout_for(request)
     
-    session: CheckoutSessionResponse = await stripe_checkout.create_checkout_session(checkout_request)
+    metadata = {
+        "user_id": user.user_id,
+        "artist_id": tier_doc['artist_id'],
+        "tier_id": tier_id,
+        "subscription_type": "monthly"
+    }
+    stripe_price_id = await provision_tier_price(tier_doc)
+    if stripe_price_id:
+        checkout_request = checkout_session_request(
+            stripe_price_id=stripe_price_id,
+            quantity=1,
+            success_url=success_url,
+            cancel_url=cancel_url,
+            metadata=metadata
+        )
+    else:
+        checkout_request = checkout_session_request(
+            amount=amount,
+            currency=currency,
+            success_url=success_url,
+            cancel_url=cancel_url,
+            metadata=metadata
+        )
+    
+    async with metrics.track_upstream("stripe", "create_checkout_session"):
+        session = await stripe_checkout.create_checkout_session(checkout_request)
     
     transaction_id = f"txn_{uuid.uuid4().hex[:12]}"
     await db.payment_transactions.insert_one({
@@ -513,6 +804,35 @@ async def create_subscription_checkout(data: dict, request: Request, authorizati
     
     return {"checkout_url": session.url, "session_id": session.session_id}
 
+async def activate_subscription(txn: dict, session_id: str):
+    # A repeat payment for a tier the fan already holds prepays one more
+    # period, which the scheduler applies when the current one ends.
+    renewed = await db.subscriptions.find_one_and_update(
+        {"fan_user_id": txn['user_id'], "artist_id": txn['artist_id'], "tier_id": txn['tier_id'], "status": "active"},
+        {"$inc": {"renewals_remaining": 1}},
+        projection={"_id": 1}
+    )
+    if renewed:
+        event_log.record("subscription.prepaid", actor_id=txn['user_id'], artist_id=txn['artist_id'],
+                         tier_id=txn['tier_id'], session_id=session_id)
+        return
+    
+    now = datetime.now(timezone.utc)
+    subscription_id = f"sub_{uuid.uuid4().hex[:12]}"
+    await db.subscriptions.insert_one({
+        "subscription_id": subscription_id,
+        "fan_user_id": txn['user_id'],
+        "artist_id": txn['artist_id'],
+        "tier_id": txn['tier_id'],
+        "stripe_subscription_id": session_id,
+        "status": "active",
+        "started_at": now.isoformat(),
+        "ends_at": subscription_scheduler.period_end(now),
+        "renewals_remaining": 0
+    })
+    event_log.record("subscription.activated", actor_id=txn['user_id'], artist_id=txn['artist_id'],
+                     tier_id=txn['tier_id'], subscription_id=subscription_id, session_id=session_id)
+
 @api_router.get("/subscribe/status/{session_id}")
 async def check_subscription_status(session_id: str, request: Request, authorization: Optional[str] = Header(None)):
     user = await get_current_user(request, authorization)
@@ -524,29 +844,18 @@ async def check_subscription_status(session_id: str, request: Request, authoriza
     if txn['payment_status'] == 'paid':
         return {"status": "paid", "message": "Subscription already active"}
     
-    host_url = str(request.base_url)
-    webhook_url = f"{host_url}api/webhook/stripe"
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
+    stripe_checkout = stripe_checkout_for(request)
     
-    checkout_status: CheckoutStatusResponse = await stripe_checkout.get_checkout_status(session_id)
+    async with metrics.track_upstream("stripe", "get_checkout_status"):
+        checkout_status = await stripe_checkout.get_checkout_status(session_id)
     
     if checkout_status.payment_status == 'paid' and txn['payment_status'] != 'paid':
-        await db.payment_transactions.update_one(
-            {"session_id": session_id},
+        marked = await db.payment_transactions.update_one(
+            {"session_id": session_id, "payment_status": {"$ne": "paid"}},
             {"$set": {"status": "completed", "payment_status": "paid"}}
         )
-        
-        subscription_id = f"sub_{uuid.uuid4().hex[:12]}"
-        await db.subscriptions.insert_one({
-            "subscription_id": subscription_id,
-            "fan_user_id": txn['user_id'],
-            "artist_id": txn['artist_id'],
-            "tier_id": txn['tier_id'],
-            "stripe_subscription_id": session_id,
-            "status": "active",
-            "started_at": datetime.now(timezone.utc).isoformat(),
-            "ends_at": None
-        })
+        if marked.modified_count:
+            await activate_subscription(txn, session_id)
     
     return {
         "status": checkout_status.status,
@@ -586,71 +895,219 @@ async def get_accessible_content(artist_id: str, request: Request, authorization
     
     content_list = await db.gated_content.find(
         {"artist_id": artist_id, "tier_ids": sub['tier_id']},
-        {"_id": 0}
+        content_bodies.SUMMARY_PROJECTION
     ).to_list(100)
     
     for content in content_list:
         if isinstance(content['created_at'], str):
             content['created_at'] = datetime.fromisoformat(content['created_at'])
     
-    return [GatedContent(**c) for c in content_list]
+    return [GatedContentSummary(**c) for c in content_list]
 
-@api_router.post("/artist/content")
-async def create_gated_content(content: GatedContentCreate, request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
+@api_router.get("/content/{content_id}")
+async def get_content_detail(content_id: str, ctx: AuthContext = Depends(get_auth_context)):
+    content_doc = await db.gated_content.find_one({"content_id": content_id}, {"_id": 0})
+    if not content_doc:
+        raise HTTPException(status_code=404, detail="Content not found")
+    
+    user = ctx.user
+    if user.role == "artist":
+        allowed = ctx.artist_id == content_doc['artist_id']
+    elif user.role == "fan":
+        allowed = await db.subscriptions.find_one(
+            {"fan_user_id": user.user_id, "artist_id": content_doc['artist_id'], "status": "active",
+             "tier_id": {"$in": content_doc['tier_ids']}},
+            {"_id": 1}
+        ) is not None
+    else:
+        allowed = user.role == "admin"
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Not subscribed to this content")
     
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
-    if not artist_doc:
-        raise HTTPException(status_code=404, detail="Artist profile not found")
+    content_doc['content_text'] = content_bodies.read_body(content_doc)
+    if isinstance(content_doc['created_at'], str):
+        content_doc['created_at'] = datetime.fromisoformat(content_doc['created_at'])
     
+    return GatedContent(**content_doc)
+
+@api_router.post("/artist/content")
+async def create_gated_content(content: GatedContentCreate, ctx: AuthContext = Depends(get_artist_context)):
     content_id = f"content_{uuid.uuid4().hex[:12]}"
     content_doc = {
         "content_id": content_id,
-        "artist_id": artist_doc["artist_id"],
+        "artist_id": ctx.artist_id,
         "title": content.title,
         "content_type": content.content_type,
-        "content_text": content.content_text,
+        **content_bodies.body_fields(content.content_text, content_codec, content_compress_min_bytes),
         "external_link": content.external_link,
         "tier_ids": content.tier_ids,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.gated_content.insert_one(content_doc)
+    event_log.record("content.created", actor_id=ctx.user.user_id, artist_id=ctx.artist_id, content_id=content_id,
+                     tier_ids=content.tier_ids)
     
     if isinstance(content_doc['created_at'], str):
         content_doc['created_at'] = datetime.fromisoformat(content_doc['created_at'])
+    content_doc['content_text'] = content.content_text
     
     return GatedContent(**content_doc)
 
 @api_router.get("/artist/content")
-async def get_artist_content(request: Request, authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, authorization)
-    if user.role != "artist":
-        raise HTTPException(status_code=403, detail="Not an artist")
-    
-    artist_doc = await db.artists.find_one({"user_id": user.user_id}, {"_id": 0})
-    if not artist_doc:
-        raise HTTPException(status_code=404, detail="Artist profile not found")
-    
-    content_list = await db.gated_content.find({"artist_id": artist_doc["artist_id"]}, {"_id": 0}).to_list(100)
+async def get_artist_content(ctx: AuthContext = Depends(get_artist_context)):
+    content_list = await db.gated_content.find(
+        {"artist_id": ctx.artist_id}, content_bodies.SUMMARY_PROJECTION
+    ).to_list(100)
     for content in content_list:
         if isinstance(content['created_at'], str):
             content['created_at'] = datetime.fromisoformat(content['created_at'])
     
-    return [GatedContent(**c) for c in content_list]
+    return [GatedContentSummary(**c) for c in content_list]
 
 @api_router.get("/artist/{artist_id}")
-async def get_artist_by_id(artist_id: str):
-    artist_doc = await db.artists.find_one({"artist_id": artist_id, "status": "approved"}, {"_id": 0})
-    if not artist_doc:
-        raise HTTPException(status_code=404, detail="Artist not found")
+async def get_artist_by_id(artist_id: str, request: Request):
+    async def build(database):
+        artist_doc = await database.artists.find_one({"artist_id": artist_id, "status": "approved"}, {"_id": 0})
+        if not artist_doc:
+            raise HTTPException(status_code=404, detail="Artist not found")
+        
+        for field in ['created_at', 'submitted_at', 'approved_at']:
+            if artist_doc.get(field) and isinstance(artist_doc[field], str):
+                artist_doc[field] = datetime.fromisoformat(artist_doc[field])
+        
+        return ArtistProfile(**artist_doc)
     
-    for field in ['created_at', 'submitted_at', 'approved_at']:
-        if artist_doc.get(field) and isinstance(artist_doc[field], str):
-            artist_doc[field] = datetime.fromisoformat(artist_doc[field])
+    return await cached_json(request, f"artist:{artist_id}", build)
+
+@api_router.get("/artist/{artist_id}/stats")
+async def get_artist_stats(artist_id: str):
+    if change_watcher:
+        stats = await stats_view.get(artist_id)
+        if stats:
+            return stats
+    # Rows are written only by the change handlers and rebuild(), so unknown ids cannot grow the view.
+    return await stats_view.compute(artist_id)
+
+@api_router.get("/artist/{artist_id}/similar")
+async def get_similar_artists(artist_id: str):
+    return await similar_artists.get(artist_id)
+
+MEDIA_CONTENT_TYPES = {
+    "image/jpeg", "image/png", "image/webp", "image/gif",
+    "audio/mpeg", "audio/mp4", "audio/wav", "video/mp4", "application/pdf",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def media_url(request: Request, media_id: str) -> str:
+    return f"{str(request.base_url)}api/media/{media_id}"
+
+async def create_thumbnails(media_id: str) -> dict:
+    try:
+        rendered = await thumbnail_renderer.render(await media_store.get_bytes(media_id))
+    except Exception:
+        logger.exception(f"Thumbnail rendering failed for {media_id}")
+        return {}
+    
+    thumbnails = {}
+    for size, data in rendered.items():
+        thumb_id, _ = await media_store.put_bytes(data)
+        await db.media.update_one(
+            {"media_id": thumb_id},
+            {"$setOnInsert": {
+                "media_id": thumb_id,
+                "content_type": "image/webp",
+                "size": len(data),
+                "kind": "thumbnail",
+                "source": media_id,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        thumbnails[str(size)] = thumb_id
+    if thumbnails:
+        await db.media.update_one({"media_id": media_id}, {"$set": {"thumbnails": thumbnails}})
+    return thumbnails
+
+@api_router.post("/media/upload")
+async def upload_media(request: Request, ctx: AuthContext = Depends(get_artist_context)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in MEDIA_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported media type")
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > media_max_bytes:
+        raise HTTPException(status_code=413, detail="File too large")
     
-    return ArtistProfile(**artist_doc)
+    try:
+        media_id, size, created = await media_store.put_stream(request.stream(), max_bytes=media_max_bytes)
+    except ObjectTooLarge:
+        raise HTTPException(status_code=413, detail="File too large")
+    except EmptyObject:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    
+    media_doc = await db.media.find_one_and_update(
+        {"media_id": media_id},
+        {
+            "$setOnInsert": {
+                "media_id": media_id,
+                "content_type": content_type,
+                "size": size,
+                "kind": "original",
+                "created_at": datetime.now(timezone.utc).isoformat()
+            },
+            "$addToSet": {"uploaded_by": ctx.artist_id}
+        },
+        projection={"_id": 0, "content_type": 1, "thumbnails": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    
+    thumbnails = media_doc.get("thumbnails")
+    if thumbnails is None and media_doc["content_type"].startswith("image/") and thumbnail_renderer.available:
+        thumbnails = await create_thumbnails(media_id)
+    
+    return {
+        "media_id": media_id,
+        "url": media_url(request, media_id),
+        "content_type": media_doc["content_type"],
+        "size": size,
+        "deduplicated": not created,
+        "thumbnails": {s: media_url(request, t) for s, t in (thumbnails or {}).items()}
+    }
+
+@api_router.get("/media/{media_id}")
+async def get_media(media_id: str, request: Request):
+    if not re.fullmatch(r"[0-9a-f]{64}", media_id):
+        raise HTTPException(status_code=404, detail="Media not found")
+    media_doc = await db.media.find_one({"media_id": media_id}, {"_id": 0, "content_type": 1, "size": 1})
+    if not media_doc:
+        raise HTTPException(status_code=404, detail="Media not found")
+    
+    etag = f'"{media_id}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    size = media_doc["size"]
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    start, end = byte_range or (0, size - 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    return StreamingResponse(
+        media_store.iter_range(media_id, start, end),
+        status_code=206 if byte_range else 200,
+        media_type=media_doc["content_type"],
+        headers=headers
+    )
 
 @api_router.get("/admin/applications")
 async def get_pending_applications(request: Request, authorization: Optional[str] = Header(None)):
@@ -677,7 +1134,10 @@ async def approve_artist(artist_id: str, approval: ApprovalRequest, request: Req
     if approval.approved:
         update_data["approved_at"] = datetime.now(timezone.utc).isoformat()
     
-    await db.artists.update_one({"artist_id": artist_id}, {"$set": update_data})
+    result = await db.artists.update_one({"artist_id": artist_id}, {"$set": update_data})
+    if result.matched_count:
+        await cache.invalidate(f"artist:{artist_id}", "artists:public")
+        event_log.record(f"artist.{new_status}", actor_id=user.user_id, artist_id=artist_id)
     
     return {"message": f"Artist {new_status}"}
 
@@ -699,23 +1159,194 @@ async def get_admin_analytics(request: Request, authorization: Optional[str] = H
         "pending_applications": pending_applications
     }
 
+@api_router.get("/admin/db-stats")
+async def get_db_stats(request: Request, authorization: Optional[str] = Header(None)):
+    user = await get_current_user(request, authorization)
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    
+    return {"slow_query_ms": db_monitor.slow_query_ms, "routes": db_route_stats.snapshot()}
+
+async def require_admin(request: Request, authorization: Optional[str] = Header(None)) -> User:
+    user = await get_current_user(request, authorization)
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user
+
+@api_router.get("/admin/profiler")
+async def get_profiler_summary(user: User = Depends(require_admin)):
+    return request_profiler.summary()
+
+@api_router.put("/admin/profiler")
+async def update_profiler(data: dict, user: User = Depends(require_admin)):
+    sample_rate = data.get('sample_rate')
+    if not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+    request_profiler.sample_rate = float(sample_rate)
+    return request_profiler.summary()
+
+@api_router.delete("/admin/profiler")
+async def reset_profiler(user: User = Depends(require_admin)):
+    request_profiler.reset()
+    return {"message": "Profiler data cleared"}
+
+@api_router.get("/admin/loop-lag")
+async def get_loop_lag(limit: int = 5, user: User = Depends(require_admin)):
+    return loop_watchdog.snapshot(limit=max(1, min(limit, 20)))
+
+@api_router.delete("/admin/loop-lag")
+async def reset_loop_lag(user: User = Depends(require_admin)):
+    loop_watchdog.reset()
+    return {"message": "Loop lag data cleared"}
+
+@api_router.get("/admin/reports/transactions")
+async def get_transaction_report(start: Optional[str] = None, end: Optional[str] = None,
+                                 artist_id: Optional[str] = None, user: User = Depends(require_admin)):
+    for value in (start, end):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="start and end must be ISO dates")
+    return await transaction_archive.daily_report(start, end, artist_id)
+
+@api_router.post("/admin/archive/transactions")
+async def archive_transactions(user: User = Depends(require_admin)):
+    try:
+        return await transaction_archive.run_once()
+    except ArchiveNotConfigured as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/admin/profiler/profile")
+async def download_profile(format: str = "speedscope", route: Optional[str] = None,
+                           user: User = Depends(require_admin)):
+    if format == "collapsed":
+        return PlainTextResponse(
+            request_profiler.collapsed(route),
+            headers={"Content-Disposition": 'attachment; filename="profile.collapsed.txt"'}
+        )
+    if format != "speedscope":
+        raise HTTPException(status_code=400, detail="format must be speedscope or collapsed")
+    return JSONResponse(
+        request_profiler.speedscope(route),
+        headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'}
+    )
+
 @api_router.post("/webhook/stripe")
 async def stripe_webhook(request: Request):
     body = await request.body()
     signature = request.headers.get("Stripe-Signature")
     
-    host_url = str(request.base_url)
-    webhook_url = f"{host_url}api/webhook/stripe"
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
+    stripe_checkout = stripe_checkout_for(request)
     
     try:
-        webhook_response = await stripe_checkout.handle_webhook(body, signature)
+        async with metrics.track_upstream("stripe", "handle_webhook"):
+            webhook_response = await stripe_checkout.handle_webhook(body, signature)
         return {"received": True}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@api_router.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    if not warmup.ready:
+        status = "failed" if warmup.failed_step else "warming_up"
+        return JSONResponse({"status": status, **warmup.status()}, status_code=503)
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), float(os.environ.get('READINESS_PING_TIMEOUT_SECONDS', '2')))
+    except Exception as e:
+        return JSONResponse({"status": "unavailable", "error": str(e)}, status_code=503)
+    return {"status": "ready", **warmup.status()}
+
 app.include_router(api_router)
+# Innermost, so the tasks they track are the ones that run the endpoints.
+app.add_middleware(ProfilerMiddleware, profiler=request_profiler)
+app.add_middleware(WatchdogMiddleware, watchdog=loop_watchdog)
+
+@app.middleware("http")
+async def db_instrumentation(request: Request, call_next):
+    stats = RequestDBStats()
+    token = current_db_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_db_stats.reset(token)
+    
+    route = request.scope.get("route")
+    if route is not None:
+        db_route_stats.record(f"{request.method} {route.path}", stats)
+    response.headers["Server-Timing"] = stats.server_timing()
+    return response
+
+@app.middleware("http")
+async def renew_session_cookie(request: Request, call_next):
+    response = await call_next(request)
+    renewed = getattr(request.state, "renewed_session", None)
+    if renewed:
+        set_session_cookie(response, *renewed)
+    return response
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    metrics.http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_requests_in_flight.dec()
+        route = request.scope.get("route")
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status,
+        )
+
+# Scrapers authenticate with METRICS_TOKEN; without one only local clients (sidecars) may scrape.
+metrics_token = os.environ.get('METRICS_TOKEN')
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    if metrics_token:
+        allowed = hmac.compare_digest((authorization or "").encode(), f"Bearer {metrics_token}".encode())
+    else:
+        allowed = request.client is not None and request.client.host in LOOPBACK_HOSTS
+    if not allowed:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# Rate limits are per client: behind the ingress every anonymous request carries the
+# ingress address, so the default rate rules only apply once TRUST_X_FORWARDED_FOR=true
+# lets clients be told apart. Set ADMISSION_RATE_LIMITS to override either way.
+trust_forwarded_for = os.environ.get('TRUST_X_FORWARDED_FOR', 'false').lower() == 'true'
+DEFAULT_RATE_LIMITS = (
+    'POST /api/auth/google-session=0.5/10:ip,POST /api/auth/email-signup=0.5/10:ip,'
+    'GET /api/auth/me=10/30,GET /api/artists/*=20/60,GET /api/artist/*=20/60'
+)
 
+app.add_middleware(
+    AdmissionMiddleware,
+    concurrency_rules=parse_rules(os.environ.get(
+        'ADMISSION_CONCURRENCY_LIMITS',
+        'GET /api/artists/search=16/64,POST /api/subscribe/checkout=8/32,POST /api/media/upload=4/8'
+    )),
+    rate_rules=parse_rules(os.environ.get(
+        'ADMISSION_RATE_LIMITS', DEFAULT_RATE_LIMITS if trust_forwarded_for else ''
+    )),
+    # Only sessions seen by authenticate() recently get their own bucket.
+    session_validator=lambda token: auth_cache.get(token) is not None,
+    queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', '5')),
+    retry_after=int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', '1')),
+    trust_forwarded_for=trust_forwarded_for,
+)
+app.add_middleware(ReadinessGate, is_ready=lambda: warmup.ready, allow=("/api/health/", "/metrics"))
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -723,6 +1354,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=compression_min_size,
+    gzip_level=int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4')),
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -730,8 +1367,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
+async def ensure_indexes():
+    await asyncio.gather(
+        unique_keys.ensure_indexes(db),
+        session_store.ensure_indexes(),
+        stats_view.ensure_indexes(),
+        db.gated_content.create_index("content_id", unique=True),
+        db.media.create_index("media_id", unique=True),
+        db.subscriptions.create_index([("fan_user_id", 1), ("artist_id", 1), ("status", 1)]),
+        # Newest approved artists top up a short trending list.
+        db.artists.create_index([("status", 1), ("approved_at", -1)]),
+        subscription_scheduler.ensure_indexes(),
+        event_log.ensure_indexes(),
+        trending_ranker.ensure_indexes(),
+        similar_artists.ensure_indexes(),
+        transaction_archive.ensure_indexes()
+    )
+
+async def backfill_content_excerpts():
+    async for doc in db.gated_content.find(
+        {"excerpt": {"$exists": False}}, {"_id": 1, "content_text": 1}
+    ):
+        await db.gated_content.update_one(
+            {"_id": doc["_id"], "excerpt": {"$exists": False}},
+            {"$set": content_bodies.body_fields(doc.get("content_text"), content_codec, content_compress_min_bytes)}
+        )
+
+async def refresh_unresolved_change(change: dict):
+    # No document to take the artist from (a delete without pre-images, or an
+    # update whose lookup found nothing): per-artist cache keys expire with
+    # their TTL, the stats view is rebuilt.
+    logger.warning(f"Could not resolve artist for {change['operationType']} {change.get('documentKey')}, rebuilding stats")
+    await stats_view.rebuild()
+
+async def on_artist_change(change: dict):
+    doc = changed_document(change)
+    keys = ["artists:public"]
+    if doc.get("artist_id"):
+        keys.append(f"artist:{doc['artist_id']}")
+        if change["operationType"] == "delete":
+            await db.artist_stats.delete_one({"artist_id": doc["artist_id"]})
+        else:
+            await stats_view.refresh(doc["artist_id"])
+    await cache.invalidate(*keys, users=[doc["user_id"]] if doc.get("user_id") else [])
+    if not doc.get("artist_id"):
+        await refresh_unresolved_change(change)
+
+async def on_tier_change(change: dict):
+    doc = changed_document(change)
+    if not doc.get("artist_id"):
+        await refresh_unresolved_change(change)
+        return
+    await cache.invalidate(f"tiers:{doc['artist_id']}")
+    await stats_view.refresh(doc["artist_id"])
+
+async def on_subscription_change(change: dict):
+    doc = changed_document(change)
+    if not doc.get("artist_id"):
+        await refresh_unresolved_change(change)
+        return
+    await stats_view.refresh(doc["artist_id"])
+
+async def on_trending_recomputed(ranked: int):
+    await cache.invalidate("artists:public", *(f"artists:trending:{n}" for n in range(1, MAX_TRENDING + 1)))
+
+def start_change_watcher():
+    global change_watcher
+    change_watcher = ChangeStreamWatcher(
+        db,
+        {
+            "artists": on_artist_change,
+            "subscription_tiers": on_tier_change,
+            "subscriptions": on_subscription_change,
+        },
+        db.change_stream_state,
+        name=os.environ.get('CHANGE_STREAM_WATCHER_NAME', 'default'),
+        on_resync=stats_view.rebuild,
+        pre_images=os.environ.get('CHANGE_STREAM_PRE_IMAGES', 'true').lower() == 'true',
+    )
+    change_watcher.start()
+
+async def prime_mongo_pool():
+    connections = int(os.environ.get('WARMUP_MONGO_CONNECTIONS', '4'))
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+
+async def load_revocations():
+    if token_signer:
+        await revocation_list.ensure_indexes()
+        await revocation_list.load()
+
+async def ensure_default_admin():
     admin_exists = await db.users.find_one({"role": "admin"}, {"_id": 0})
     if not admin_exists:
         admin_id = f"user_{uuid.uuid4().hex[:12]}"
@@ -743,15 +1468,75 @@ async def startup_event():
             "picture": None,
             "created_at": datetime.now(timezone.utc).isoformat()
         })
-        session_token = "admin_session_default"
-        await db.user_sessions.insert_one({
-            "user_id": admin_id,
-            "session_token": session_token,
-            "expires_at": datetime.now(timezone.utc) + timedelta(days=365),
-            "created_at": datetime.now(timezone.utc)
-        })
+        session_token = await session_store.create(admin_id, "admin_session_default", ttl=timedelta(days=365))
         logger.info(f"Default admin created. Email: admin@favatis.com, Session Token: {session_token}")
 
+async def prefill_public_cache():
+    warm_request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    await get_public_artists(warm_request)
+    for limit in (6, 12):
+        await get_trending_artists(warm_request, limit)
+
+async def start_background_jobs():
+    if os.environ.get('CHANGE_STREAMS_ENABLED', 'false').lower() == 'true':
+        start_change_watcher()
+    scheduler_interval = float(os.environ.get('SUBSCRIPTION_SCHEDULER_INTERVAL_SECONDS', '60'))
+    if scheduler_interval > 0:
+        subscription_scheduler.start(scheduler_interval)
+    trending_interval = float(os.environ.get('TRENDING_INTERVAL_SECONDS', '600'))
+    if trending_interval > 0:
+        trending_ranker.start(trending_interval, on_recompute=on_trending_recomputed)
+    similar_interval = float(os.environ.get('SIMILAR_ARTISTS_INTERVAL_SECONDS', '3600'))
+    if similar_interval > 0:
+        similar_artists.start(similar_interval)
+    archive_interval = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '0'))
+    if archive_interval > 0:
+        if transaction_archive.root is None:
+            logger.error("ARCHIVE_INTERVAL_SECONDS is set but ARCHIVE_ROOT is not; transaction archiving disabled")
+        else:
+            transaction_archive.start(archive_interval)
+    sweep_interval = float(os.environ.get('SESSION_SWEEP_INTERVAL_SECONDS', '0'))
+    if sweep_interval > 0:
+        session_store.start_sweeper(sweep_interval)
+    if token_signer:
+        revocation_list.start_refresher(float(os.environ.get('REVOCATION_REFRESH_SECONDS', '30')))
+
+def is_permanent_warmup_error(e: Exception) -> bool:
+    # Server-side command errors (a unique index that existing data violates, a
+    # bad option) fail the same way on every retry; connection errors and timeouts do not.
+    return isinstance(e, OperationFailure) and not isinstance(e, (ExecutionTimeout, WTimeoutError))
+
+warmup = Warmup([
+    ("mongo", prime_mongo_pool),
+    ("indexes", ensure_indexes),
+    ("backfill", backfill_content_excerpts),
+    ("revocations", load_revocations),
+    ("admin", ensure_default_admin),
+    ("public_cache", prefill_public_cache),
+    ("background_jobs", start_background_jobs),
+], is_permanent=is_permanent_warmup_error)
+
+@app.on_event("startup")
+async def startup_event():
+    await cache.start()
+    event_log.start()
+    if os.environ.get('LOOP_WATCHDOG_ENABLED', 'true').lower() == 'true':
+        loop_watchdog.start()
+    warmup.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await warmup.stop()
+    await session_store.stop_sweeper()
+    await subscription_scheduler.stop()
+    await trending_ranker.stop()
+    await similar_artists.stop()
+    await transaction_archive.stop()
+    await loop_watchdog.stop()
+    if change_watcher:
+        await change_watcher.stop()
+    await revocation_list.stop_refresher()
+    await event_log.stop()
+    await cache.close()
+    thumbnail_renderer.shutdown()
     client.close()
\ No newline at end of file
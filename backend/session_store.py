@@ -0,0 +1,131 @@
+"""
+Session storage for user_sessions.
+
+Expired sessions are removed by a TTL index on expires_at (with an optional
+background sweeper as a fallback), each user keeps at most
+max_sessions_per_user live sessions, and sliding expiration renews a session
+with at most one write per renew_interval. A renewed session is flagged with
+"renewed" so the caller can re-issue the cookie with the new lifetime.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class SessionStore:
+    def __init__(self, collection, ttl: timedelta = timedelta(days=7), max_sessions_per_user: int = 5,
+                 renew_interval: timedelta = timedelta(hours=1)):
+        self.collection = collection
+        self.ttl = ttl
+        self.max_sessions_per_user = max_sessions_per_user
+        self.renew_interval = renew_interval
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("session_token", unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.collection.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
+
+    async def create(self, user_id: str, session_token: Optional[str] = None, ttl: Optional[timedelta] = None,
+                     enforce_cap: bool = True) -> str:
+        session_token = session_token or f"session_{uuid.uuid4().hex}"
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.insert_one({
+                "user_id": user_id,
+                "session_token": session_token,
+                "expires_at": now + (ttl or self.ttl),
+                "created_at": now
+            })
+        except DuplicateKeyError:
+            # A retried login can bring back the provider's token for the same
+            # user; extend that session instead of failing.
+            result = await self.collection.update_one(
+                {"session_token": session_token, "user_id": user_id},
+                {"$set": {"expires_at": now + (ttl or self.ttl)}}
+            )
+            if not result.matched_count:
+                raise
+        if enforce_cap:
+            await self._enforce_cap(user_id)
+        return session_token
+
+    async def _enforce_cap(self, user_id: str):
+        stale = await self.collection.find(
+            {"user_id": user_id}, {"_id": 1}
+        ).sort([("created_at", DESCENDING), ("_id", DESCENDING)]).skip(self.max_sessions_per_user).to_list(None)
+        if stale:
+            await self.collection.delete_many({"_id": {"$in": [s["_id"] for s in stale]}})
+
+    def expires_at(self, session: dict) -> datetime:
+        return _as_utc(session["expires_at"])
+
+    def is_expired(self, session: dict) -> bool:
+        return self.expires_at(session) < datetime.now(timezone.utc)
+
+    async def get(self, session_token: str) -> Optional[dict]:
+        session = await self.collection.find_one(
+            {"session_token": session_token}, {"_id": 0, "user_id": 1, "expires_at": 1}
+        )
+        if session and not self.is_expired(session):
+            await self._renew(session_token, session)
+        return session
+
+    async def _renew(self, session_token: str, session: dict):
+        # Only extend once the session has aged a full renew_interval, and
+        # guard on expires_at so concurrent requests issue a single write.
+        now = datetime.now(timezone.utc)
+        threshold = now + self.ttl - self.renew_interval
+        expires_at = _as_utc(session["expires_at"])
+        if expires_at > threshold:
+            return
+        new_expiry = now + self.ttl
+        await self.collection.update_one(
+            {"session_token": session_token, "expires_at": session["expires_at"]},
+            {"$set": {"expires_at": new_expiry}}
+        )
+        session["expires_at"] = new_expiry
+        session["renewed"] = True
+
+    async def delete(self, session_token: str):
+        await self.collection.delete_one({"session_token": session_token})
+
+    async def sweep(self) -> int:
+        result = await self.collection.delete_many({"expires_at": {"$lt": datetime.now(timezone.utc)}})
+        return result.deleted_count
+
+    def start_sweeper(self, interval: float):
+        async def _run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    deleted = await self.sweep()
+                    if deleted:
+                        logger.info(f"Swept {deleted} expired sessions")
+                except Exception:
+                    logger.exception("Session sweep failed")
+
+        self._sweeper = asyncio.create_task(_run())
+
+    async def stop_sweeper(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
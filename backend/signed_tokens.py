@@ -0,0 +1,154 @@
+"""
+Stateless signed session tokens.
+
+A token is "st1.<payload>.<signature>" where payload is base64url-encoded
+compact JSON carrying the user fields needed to build a User (user_id, role,
+email, name, picture, created_at), an expiry and a token id, and signature is
+an HMAC-SHA256 over the payload. Logged-out token ids are kept in a small
+revocation list that lives in memory and is persisted to Mongo (with a TTL
+on the original expiry) so other workers and restarts pick it up.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PREFIX = "st1."
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class ExpiredToken(InvalidToken):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX)
+
+
+class TokenSigner:
+    def __init__(self, secret: str, ttl: timedelta = timedelta(days=7)):
+        self._key = secret.encode()
+        self.ttl = ttl
+
+    def _sign(self, payload: bytes) -> bytes:
+        return _b64encode(hmac.new(self._key, payload, hashlib.sha256).digest()).encode("ascii")
+
+    def issue(self, user_doc: dict, ttl: Optional[timedelta] = None) -> str:
+        created_at = user_doc["created_at"]
+        claims = {
+            "uid": user_doc["user_id"],
+            "role": user_doc["role"],
+            "email": user_doc["email"],
+            "name": user_doc["name"],
+            "pic": user_doc.get("picture"),
+            "ca": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+            "exp": int((datetime.now(timezone.utc) + (ttl or self.ttl)).timestamp()),
+            "jti": uuid.uuid4().hex[:16],
+        }
+        if user_doc.get("spotify_link"):
+            claims["sp"] = user_doc["spotify_link"]
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{TOKEN_PREFIX}{payload}.{self._sign(payload.encode('ascii')).decode('ascii')}"
+
+    def verify(self, token: str) -> dict:
+        if not is_signed_token(token):
+            raise InvalidToken("Not a signed token")
+        # Tokens come straight from cookies and headers; anything that is not
+        # ASCII, or not shaped like a token, is rejected as invalid.
+        try:
+            payload, signature = token[len(TOKEN_PREFIX):].encode("ascii").split(b".", 1)
+        except (UnicodeEncodeError, ValueError):
+            raise InvalidToken("Malformed token")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidToken("Bad signature")
+        try:
+            claims = json.loads(_b64decode(payload))
+            expired = claims["exp"] < datetime.now(timezone.utc).timestamp()
+        except (ValueError, TypeError, KeyError):
+            raise InvalidToken("Malformed payload")
+        if expired:
+            raise ExpiredToken("Token expired")
+        return claims
+
+    @staticmethod
+    def user_fields(claims: dict) -> dict:
+        return {
+            "user_id": claims["uid"],
+            "role": claims["role"],
+            "email": claims["email"],
+            "name": claims["name"],
+            "picture": claims.get("pic"),
+            "spotify_link": claims.get("sp"),
+            "created_at": datetime.fromisoformat(claims["ca"]),
+        }
+
+
+class RevocationList:
+    def __init__(self, collection):
+        self.collection = collection
+        self._revoked = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("jti", unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def load(self):
+        now = datetime.now(timezone.utc)
+        docs = await self.collection.find(
+            {"expires_at": {"$gt": now}}, {"_id": 0, "jti": 1, "expires_at": 1}
+        ).to_list(None)
+        self._revoked = {d["jti"]: d["expires_at"].replace(tzinfo=timezone.utc).timestamp() for d in docs}
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, exp: float):
+        self._revoked[jti] = exp
+
+    async def revoke(self, claims: dict):
+        expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+        self.add(claims["jti"], claims["exp"])
+        await self.collection.update_one(
+            {"jti": claims["jti"]},
+            {"$setOnInsert": {"jti": claims["jti"], "expires_at": expires_at}},
+            upsert=True
+        )
+
+    def start_refresher(self, interval: float):
+        async def _run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.load()
+                except Exception:
+                    logger.exception("Revocation list refresh failed")
+
+        self._refresher = asyncio.create_task(_run())
+
+    async def stop_refresher(self):
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
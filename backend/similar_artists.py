@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Similar-artist recommendations from co-subscriptions.
+
+Builds a sparse fan x artist matrix (1 where the fan has ever held an
+active subscription to the artist) and computes item-item cosine similarity
+as D^-1/2 (X^T X) D^-1/2 with SciPy sparse products. For each approved artist
+the top-K neighbours, with their names and images, are written to
+similar_artists, so serving is a single lookup by artist_id. NumPy and SciPy
+are imported when the job first runs, not when the API starts.
+
+Runs periodically inside the API (SIMILAR_ARTISTS_INTERVAL_SECONDS) or once
+from the command line:
+    python similar_artists.py [--top-k 10] [--min-overlap 2]
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+
+import job_leases
+
+logger = logging.getLogger(__name__)
+
+LEASE_ID = "similar_artists"
+
+
+def build_matrix(fan_index: Sequence[int], artist_index: Sequence[int], n_fans: int, n_artists: int):
+    import numpy as np
+    from scipy import sparse
+    data = np.ones(len(fan_index), dtype=np.float32)
+    matrix = sparse.csr_matrix((data, (fan_index, artist_index)), shape=(n_fans, n_artists))
+    matrix.data[:] = 1.0  # repeat subscriptions to the same artist count once
+    return matrix
+
+
+def top_k_similar(matrix, k: int, min_overlap: int = 1) -> List[List[Tuple[int, float]]]:
+    """Per artist column, the k most similar other columns as (index, cosine) pairs."""
+    import numpy as np
+    from scipy import sparse
+    co = (matrix.T @ matrix).tocsr()
+    counts = co.diagonal()
+    co.setdiag(0)
+    co.eliminate_zeros()
+    if min_overlap > 1:
+        co.data[co.data < min_overlap] = 0
+        co.eliminate_zeros()
+
+    inv_norms = np.zeros_like(counts, dtype=np.float64)
+    nonzero = counts > 0
+    inv_norms[nonzero] = 1.0 / np.sqrt(counts[nonzero])
+    scaling = sparse.diags(inv_norms)
+    similarity = (scaling @ co @ scaling).tocsr()
+
+    neighbours = []
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            scores, columns = scores[keep], columns[keep]
+        order = np.lexsort((columns, -scores))
+        neighbours.append([(int(columns[i]), float(scores[i])) for i in order])
+    return neighbours
+
+
+class SimilarArtists:
+    def __init__(self, db, top_k: int = 10, min_overlap: int = 1):
+        self.db = db
+        self.top_k = top_k
+        self.min_overlap = min_overlap
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.db.similar_artists.create_index("artist_id", unique=True)
+
+    async def load(self) -> Tuple[List[int], List[int], Dict[str, int], Dict[str, int]]:
+        fans, artists = {}, {}
+        fan_index, artist_index = [], []
+        cursor = self.db.subscriptions.find(
+            {"status": {"$in": ["active", "expired"]}}, {"_id": 0, "fan_user_id": 1, "artist_id": 1}
+        ).batch_size(10000)
+        async for sub in cursor:
+            fan_index.append(fans.setdefault(sub["fan_user_id"], len(fans)))
+            artist_index.append(artists.setdefault(sub["artist_id"], len(artists)))
+        return fan_index, artist_index, fans, artists
+
+    async def recompute(self) -> int:
+        fan_index, artist_index, fans, artists = await self.load()
+        approved = {
+            a["artist_id"]: a for a in await self.db.artists.find(
+                {"status": "approved"}, {"_id": 0, "artist_id": 1, "name": 1, "profile_image": 1}
+            ).to_list(None)
+        }
+        if not artists:
+            await self.db.similar_artists.delete_many({})
+            return 0
+
+        def compute():
+            # Both steps (and the first NumPy/SciPy import) stay off the event loop.
+            matrix = build_matrix(fan_index, artist_index, len(fans), len(artists))
+            # Asking for a few extra neighbours leaves room to drop unapproved ones.
+            return top_k_similar(matrix, self.top_k + 5, self.min_overlap)
+
+        neighbours = await asyncio.to_thread(compute)
+
+        artist_ids = list(artists)
+        computed_at = datetime.now(timezone.utc).isoformat()
+        ops = []
+        for column, artist_id in enumerate(artist_ids):
+            if artist_id not in approved:
+                continue
+            similar = []
+            for other, score in neighbours[column]:
+                other_doc = approved.get(artist_ids[other])
+                if other_doc:
+                    similar.append({**other_doc, "score": round(score, 4)})
+                if len(similar) == self.top_k:
+                    break
+            ops.append(UpdateOne(
+                {"artist_id": artist_id},
+                {"$set": {"neighbors": similar, "computed_at": computed_at}},
+                upsert=True
+            ))
+        if ops:
+            await self.db.similar_artists.bulk_write(ops, ordered=False)
+        await self.db.similar_artists.delete_many({"computed_at": {"$ne": computed_at}})
+        return len(ops)
+
+    async def get(self, artist_id: str) -> list:
+        doc = await self.db.similar_artists.find_one({"artist_id": artist_id}, {"_id": 0, "neighbors": 1})
+        return doc["neighbors"] if doc else []
+
+    def start(self, interval: float):
+        async def _run():
+            while True:
+                try:
+                    if await job_leases.claim(self.db.job_leases, LEASE_ID, interval * 0.9):
+                        stored = await self.recompute()
+                        logger.info(f"Similar artists recomputed for {stored} artists")
+                except Exception:
+                    logger.exception("Similar artists recompute failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(_run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def main():
+    import argparse
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Recompute similar-artist recommendations")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-overlap", type=int, default=1)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME')
+    if not mongo_url or not db_name:
+        print("✗ MONGO_URL and DB_NAME must be set in .env file")
+        return 1
+
+    async def run():
+        client = AsyncIOMotorClient(mongo_url)
+        try:
+            job = SimilarArtists(client[db_name], top_k=args.top_k, min_overlap=args.min_overlap)
+            await job.ensure_indexes()
+            return await job.recompute()
+        finally:
+            client.close()
+
+    stored = asyncio.run(run())
+    print(f"✓ Stored similar artists for {stored} artists")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Request coalescing for identical concurrent reads.
+
+When a cold key is requested by many clients at once (a shared artist page),
+the first caller starts the read and every caller that arrives while it is in
+flight awaits the same task instead of issuing its own query; all of them get
+its result or its exception. The read runs in its own task, so a leader whose
+client disconnects does not cancel it for the others. Keys are released as
+soon as the read finishes; forget() releases them early so that callers
+arriving after a write start a fresh read rather than joining one that may
+predate it.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+import metrics
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        group = key.split(":", 1)[0]
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+            metrics.single_flight_calls.inc(group=f"{self.name}:{group}", result="leader")
+        else:
+            metrics.single_flight_calls.inc(group=f"{self.name}:{group}", result="coalesced")
+        return await asyncio.shield(task)
+
+    def forget(self, *keys: str):
+        for key in keys:
+            self._calls.pop(key, None)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
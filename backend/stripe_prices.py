@@ -0,0 +1,73 @@
+"""
+Reusable Stripe Price objects for subscription tiers.
+
+Each tier gets one Price (with an inline Product) the first time it is
+needed; its id is stored in the tier's stripe_price_id so later checkouts
+reference it instead of sending an ad-hoc amount. Creation uses an
+idempotency key derived from the tier, and the id is written with a
+conditional update, so concurrent workers provisioning the same tier end up
+with a single Price. Failures are remembered per tier for retry_after seconds
+so callers can fall back to amount-based checkout without hammering Stripe.
+Set api_base to point at a local stub such as stripe-mock.
+"""
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PriceProvisioner:
+    def __init__(self, collection, api_key: str, api_base: Optional[str] = None, currency: str = "usd",
+                 retry_after: float = 300.0):
+        self.collection = collection
+        self.api_key = api_key
+        self.api_base = api_base
+        self.currency = currency
+        self.retry_after = retry_after
+        self._client = None
+        self._failed_until = {}
+
+    @property
+    def client(self):
+        # The stripe package is imported on first use to keep API startup fast.
+        if self._client is None:
+            import stripe
+            base_addresses = {"api": self.api_base} if self.api_base else None
+            self._client = stripe.StripeClient(self.api_key, base_addresses=base_addresses,
+                                               http_client=stripe.HTTPXClient())
+        return self._client
+
+    async def ensure_price(self, tier_doc: dict) -> Optional[str]:
+        """Return the tier's Stripe Price id, creating it if needed; None if Stripe is unavailable."""
+        if tier_doc.get("stripe_price_id"):
+            return tier_doc["stripe_price_id"]
+        tier_id = tier_doc["tier_id"]
+        if self._failed_until.get(tier_id, 0) > time.monotonic():
+            return None
+
+        unit_amount = int(round(float(tier_doc["price"]) * 100))
+        try:
+            price = await self.client.v1.prices.create_async(
+                {
+                    "currency": self.currency,
+                    "unit_amount": unit_amount,
+                    "product_data": {"name": tier_doc["name"], "metadata": {"tier_id": tier_id}},
+                    "metadata": {"tier_id": tier_id, "artist_id": tier_doc["artist_id"]},
+                },
+                {"idempotency_key": f"tier-price-{tier_id}-{unit_amount}"},
+            )
+        except Exception:
+            logger.exception(f"Creating Stripe price for {tier_id} failed")
+            self._failed_until[tier_id] = time.monotonic() + self.retry_after
+            return None
+
+        self._failed_until.pop(tier_id, None)
+        result = await self.collection.update_one(
+            {"tier_id": tier_id, "stripe_price_id": None},
+            {"$set": {"stripe_price_id": price.id}}
+        )
+        if result.modified_count:
+            return price.id
+        stored = await self.collection.find_one({"tier_id": tier_id}, {"_id": 0, "stripe_price_id": 1})
+        return (stored or {}).get("stripe_price_id") or price.id
@@ -0,0 +1,140 @@
+"""
+Background processing of due subscriptions.
+
+An active subscription whose ends_at has passed is either renewed (when the
+fan has prepaid further periods, counted in renewals_remaining) or expired.
+Each tick claims up to batch_size due subscriptions, oldest ends_at first via
+the (status, ends_at) index, by stamping them with a lease (lease_owner,
+lease_until); other workers skip leased documents until the lease runs out,
+so a crashed worker's batch is picked up again later. Every transition is a
+single conditional update on the lease and the claimed ends_at, so a
+subscription is renewed or expired exactly once even if leases overlap.
+
+Timestamps are ISO-8601 UTC strings like the rest of the subscriptions
+collection, which keeps them ordered for the range queries.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Optional
+
+from pymongo import ASCENDING
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SubscriptionScheduler:
+    def __init__(self, collection, period: timedelta = timedelta(days=30), batch_size: int = 200,
+                 concurrency: int = 8, lease: timedelta = timedelta(minutes=2),
+                 on_transition: Optional[Callable[[dict, str], None]] = None):
+        self.collection = collection
+        self.period = period
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self.on_transition = on_transition
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", ASCENDING), ("ends_at", ASCENDING)])
+
+    def period_end(self, start: datetime) -> str:
+        return (start + self.period).isoformat()
+
+    async def claim_batch(self) -> list:
+        now = _now()
+        now_iso = now.isoformat()
+        unleased = {"$or": [{"lease_until": None}, {"lease_until": {"$lt": now_iso}}]}
+        candidates = await self.collection.find(
+            {"status": "active", "ends_at": {"$ne": None, "$lte": now_iso}, **unleased},
+            {"_id": 1}
+        ).sort("ends_at", ASCENDING).limit(self.batch_size).to_list(self.batch_size)
+        if not candidates:
+            return []
+
+        claim = f"{self.worker_id}:{uuid.uuid4().hex[:8]}"
+        await self.collection.update_many(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, "status": "active", **unleased},
+            {"$set": {"lease_owner": claim, "lease_until": (now + self.lease).isoformat()}}
+        )
+        return await self.collection.find(
+            {"lease_owner": claim},
+            {"_id": 1, "subscription_id": 1, "fan_user_id": 1, "artist_id": 1, "tier_id": 1,
+             "ends_at": 1, "lease_owner": 1}
+        ).to_list(None)
+
+    async def process(self, sub: dict) -> str:
+        claimed = {"_id": sub["_id"], "lease_owner": sub["lease_owner"], "ends_at": sub["ends_at"]}
+        release = {"lease_owner": "", "lease_until": ""}
+
+        new_end = self.period_end(datetime.fromisoformat(sub["ends_at"]))
+        renewed = await self.collection.update_one(
+            {**claimed, "renewals_remaining": {"$gt": 0}},
+            {"$set": {"ends_at": new_end, "renewed_at": _now().isoformat()},
+             "$inc": {"renewals_remaining": -1}, "$unset": release}
+        )
+        if renewed.modified_count:
+            return "renewed"
+
+        expired = await self.collection.update_one(
+            {**claimed, "renewals_remaining": {"$not": {"$gt": 0}}},
+            {"$set": {"status": "expired", "expired_at": _now().isoformat()}, "$unset": release}
+        )
+        if expired.modified_count:
+            return "expired"
+        # A payment added a renewal between the two updates; the lease still
+        # holds, so the renewal branch will match on the next attempt.
+        if await self.collection.count_documents({**claimed, "renewals_remaining": {"$gt": 0}}):
+            return await self.process(sub)
+        return "lease_lost"
+
+    async def run_once(self) -> dict:
+        counts = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def handle(sub):
+            async with semaphore:
+                try:
+                    result = await self.process(sub)
+                except Exception:
+                    logger.exception(f"Processing subscription {sub.get('subscription_id')} failed")
+                    result = "error"
+            counts[result] = counts.get(result, 0) + 1
+            if self.on_transition and result in ("renewed", "expired"):
+                self.on_transition(sub, result)
+
+        while True:
+            batch = await self.claim_batch()
+            if not batch:
+                return counts
+            await asyncio.gather(*(handle(sub) for sub in batch))
+            if len(batch) < self.batch_size:
+                return counts
+
+    def start(self, interval: float):
+        async def _run():
+            while True:
+                try:
+                    counts = await self.run_once()
+                    if counts:
+                        logger.info(f"Subscription scheduler: {counts}")
+                except Exception:
+                    logger.exception("Subscription scheduler tick failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(_run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,255 @@
+"""
+Cold archive of payment transactions.
+
+Checkout attempts are only needed in Mongo while they can still change: a
+paid transaction is kept for paid_after, an unpaid one (abandoned checkout;
+Stripe sessions expire within a day) for abandoned_after. Older ones are
+moved in batches into Parquet files under root, partitioned by creation day
+(root/date=YYYY-MM-DD/part-*.parquet), and then deleted from the collection.
+Files are written before documents are deleted, so an interrupted run can
+leave a row in both places; readers keep one row per transaction_id.
+
+query() reads archived partitions (pruned by date) and the live collection
+together for a bounded range; daily_report() totals any range with a Mongo
+$group and an Arrow group_by, so admin reports see the full history without
+loading it. Archiving deletes payment
+records from Mongo, so there is no default root: it must be configured
+explicitly and point at durable storage shared by every API worker (not a
+pod's local disk), otherwise a redeploy loses the archived records and each
+replica reports from a different archive.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import job_leases
+
+logger = logging.getLogger(__name__)
+
+LEASE_ID = "transaction_archive"
+
+
+class ArchiveNotConfigured(RuntimeError):
+    pass
+
+STRING_FIELDS = ("transaction_id", "session_id", "user_id", "artist_id", "tier_id", "currency", "status",
+                 "payment_status", "metadata")
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema(
+        [(name, pa.string()) for name in STRING_FIELDS]
+        + [("amount", pa.float64()), ("created_at", pa.string()), ("archived_at", pa.string())]
+    )
+
+
+def _row(doc: dict, archived_at: str) -> dict:
+    row = {name: doc.get(name) for name in STRING_FIELDS}
+    row["metadata"] = json.dumps(doc.get("metadata") or {}, sort_keys=True)
+    row["amount"] = float(doc["amount"]) if doc.get("amount") is not None else None
+    row["created_at"] = doc["created_at"]
+    row["archived_at"] = archived_at
+    return row
+
+
+class TransactionArchive:
+    def __init__(self, db, root: Optional[Path] = None, paid_after: timedelta = timedelta(days=90),
+                 abandoned_after: timedelta = timedelta(days=7), batch_size: int = 5000):
+        self.db = db
+        self.collection = db.payment_transactions
+        self.root = Path(root) if root else None
+        self.paid_after = paid_after
+        self.abandoned_after = abandoned_after
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def eligible(self, now: datetime) -> dict:
+        return {"$or": [
+            {"payment_status": "paid", "created_at": {"$lt": (now - self.paid_after).isoformat()}},
+            {"payment_status": {"$ne": "paid"}, "created_at": {"$lt": (now - self.abandoned_after).isoformat()}},
+        ]}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("payment_status", 1), ("created_at", 1)])
+
+    def _write_partitions(self, rows: List[dict]) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        by_day = defaultdict(list)
+        for row in rows:
+            by_day[row["created_at"][:10]].append(row)
+        schema = _schema()
+        for day, day_rows in by_day.items():
+            directory = self.root / f"date={day}"
+            directory.mkdir(parents=True, exist_ok=True)
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp_path = directory / f".{name}.tmp"
+            pq.write_table(pa.Table.from_pylist(day_rows, schema=schema), tmp_path, compression="zstd")
+            os.replace(tmp_path, directory / name)
+        return len(by_day)
+
+    def _require_root(self):
+        if self.root is None:
+            raise ArchiveNotConfigured("ARCHIVE_ROOT must point at durable shared storage to archive transactions")
+
+    async def run_once(self, now: Optional[datetime] = None) -> dict:
+        self._require_root()
+        now = now or datetime.now(timezone.utc)
+        condition = self.eligible(now)
+        archived = partitions = 0
+        while True:
+            docs = await self.collection.find(condition).sort("created_at", 1).limit(self.batch_size).to_list(
+                self.batch_size)
+            if not docs:
+                break
+            archived_at = datetime.now(timezone.utc).isoformat()
+            partitions += await asyncio.to_thread(self._write_partitions, [_row(d, archived_at) for d in docs])
+            result = await self.collection.delete_many({"_id": {"$in": [d["_id"] for d in docs]}, **condition})
+            archived += result.deleted_count
+            if len(docs) < self.batch_size:
+                break
+        return {"archived": archived, "partitions_written": partitions}
+
+    def _scan(self, start: Optional[str], end: Optional[str], artist_id: Optional[str], exclude=()):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if self.root is None or not self.root.exists():
+            return None, None
+        dataset = ds.dataset(
+            self.root, format="parquet", schema=_schema().append(pa.field("date", pa.string())),
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+            ignore_prefixes=[".", "_"],
+        )
+        # Day partitions outside the range are skipped without opening their files.
+        clauses = [
+            (ds.field("date") >= start[:10]) & (ds.field("created_at") >= start) if start else None,
+            (ds.field("date") <= end[:10]) & (ds.field("created_at") < end) if end else None,
+            ds.field("artist_id") == artist_id if artist_id else None,
+            ~ds.field("transaction_id").isin(list(exclude)) if exclude else None,
+        ]
+        expression = None
+        for clause in filter(lambda c: c is not None, clauses):
+            expression = clause if expression is None else expression & clause
+        return dataset, expression
+
+    def _read_archive(self, start: str, end: str, artist_id: Optional[str]) -> List[dict]:
+        dataset, expression = self._scan(start, end, artist_id)
+        if dataset is None:
+            return []
+        return dataset.to_table(columns=_schema().names, filter=expression).to_pylist()
+
+    def _archive_totals(self, start: Optional[str], end: Optional[str], artist_id: Optional[str],
+                        exclude) -> List[dict]:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        dataset, expression = self._scan(start, end, artist_id, exclude)
+        if dataset is None:
+            return []
+        columns = ["transaction_id", "created_at", "payment_status", "amount"]
+        # An interrupted run can archive a row twice; the copies are identical, so grouping
+        # on every column keeps one of each before the per-day totals.
+        rows = dataset.to_table(columns=columns, filter=expression).group_by(columns).aggregate([])
+        days = pa.table({
+            "date": pc.utf8_slice_codeunits(rows["created_at"], 0, 10),
+            "paid": pc.fill_null(pc.equal(rows["payment_status"], "paid"), False),
+            "amount": pc.fill_null(rows["amount"], 0.0),
+        })
+        totals = days.group_by(["date", "paid"]).aggregate([("amount", "sum"), ("amount", "count")])
+        return [{"date": row["date"], "paid": row["paid"], "count": row["amount_count"], "amount": row["amount_sum"]}
+                for row in totals.to_pylist()]
+
+    def _live_filter(self, start: Optional[str], end: Optional[str], artist_id: Optional[str]) -> dict:
+        created = {k: v for k, v in (("$gte", start), ("$lt", end)) if v}
+        return {**({"created_at": created} if created else {}), **({"artist_id": artist_id} if artist_id else {})}
+
+    async def query(self, start: str, end: str, artist_id: Optional[str] = None) -> List[dict]:
+        """Transactions created in [start, end) from the archive and the live collection, oldest first.
+
+        Every row is loaded, so the range is required; daily_report() aggregates unbounded ranges.
+        """
+        if not start or not end:
+            raise ValueError("query() needs both start and end")
+        archived = await asyncio.to_thread(self._read_archive, start, end, artist_id)
+        live = await self.collection.find(self._live_filter(start, end, artist_id), {"_id": 0}).to_list(None)
+
+        rows = {}
+        for row in archived:
+            row["metadata"] = json.loads(row["metadata"]) if row.get("metadata") else {}
+            row["archived"] = True
+            rows[row["transaction_id"]] = row
+        for doc in live:
+            rows[doc["transaction_id"]] = {**doc, "archived": False}
+        return sorted(rows.values(), key=lambda r: r["created_at"])
+
+    async def daily_report(self, start: Optional[str] = None, end: Optional[str] = None,
+                           artist_id: Optional[str] = None) -> dict:
+        """Per-day paid and unpaid totals, grouped by Mongo and Arrow rather than loaded row by row."""
+        live_filter = self._live_filter(start, end, artist_id)
+        # Only documents old enough to be archived can also sit in a partition.
+        still_live = {doc["transaction_id"] async for doc in self.collection.find(
+            {"$and": [live_filter, self.eligible(datetime.now(timezone.utc))]}, {"_id": 0, "transaction_id": 1})}
+        archived = await asyncio.to_thread(self._archive_totals, start, end, artist_id, still_live)
+        live = [{"date": doc["_id"]["date"], "paid": doc["_id"]["paid"], "count": doc["count"], "amount": doc["amount"]}
+                async for doc in self.collection.aggregate([
+                    {"$match": live_filter},
+                    {"$group": {
+                        "_id": {"date": {"$substr": ["$created_at", 0, 10]}, "paid": {"$eq": ["$payment_status", "paid"]}},
+                        "count": {"$sum": 1},
+                        "amount": {"$sum": "$amount"},
+                    }},
+                ])]
+
+        days = defaultdict(lambda: {"paid_count": 0, "paid_amount": 0.0, "unpaid_count": 0})
+        for group in archived + live:
+            day = days[group["date"]]
+            if group["paid"]:
+                day["paid_count"] += group["count"]
+                day["paid_amount"] += group["amount"] or 0.0
+            else:
+                day["unpaid_count"] += group["count"]
+        report = [{"date": date, **values, "paid_amount": round(values["paid_amount"], 2)}
+                  for date, values in sorted(days.items())]
+        return {
+            "days": report,
+            "totals": {
+                "paid_count": sum(d["paid_count"] for d in report),
+                "paid_amount": round(sum(d["paid_amount"] for d in report), 2),
+                "unpaid_count": sum(d["unpaid_count"] for d in report),
+            },
+            "archived_rows": sum(group["count"] for group in archived),
+        }
+
+    def start(self, interval: float):
+        self._require_root()
+
+        async def _run():
+            while True:
+                try:
+                    if await job_leases.claim(self.db.job_leases, LEASE_ID, interval * 0.9):
+                        result = await self.run_once()
+                        if result["archived"]:
+                            logger.info(f"Archived payment transactions: {result}")
+                except Exception:
+                    logger.exception("Transaction archive run failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(_run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
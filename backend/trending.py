@@ -0,0 +1,130 @@
+"""
+Trending artist ranking.
+
+An artist's score is the sum of its recent activity with exponential time
+decay: every new subscription counts 1 and every content post counts
+content_weight, each halved for every half_life of age. Activity is counted
+per UTC day inside the window by aggregation on the server, so a recompute
+reads one row per (artist, day) rather than one per subscription.
+
+Scores are written to artist_rankings, which is indexed on (score desc,
+artist_id) so top() is answered from the index alone, and copied onto the
+artist documents as trending_score (removed when it drops to zero), so the
+full public list is one find sorted by the (status, trending_score desc,
+artist_id) index (PUBLIC_ORDER). Recomputation runs
+periodically; a lease in job_leases lets only one worker do it per interval.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+import job_leases
+
+logger = logging.getLogger(__name__)
+
+LEASE_ID = "trending_ranking"
+
+PUBLIC_ORDER = [("trending_score", DESCENDING), ("artist_id", ASCENDING)]
+
+
+class TrendingRanker:
+    def __init__(self, db, half_life: timedelta = timedelta(days=7), window: timedelta = timedelta(days=60),
+                 content_weight: float = 0.5):
+        self.db = db
+        self.rankings = db.artist_rankings
+        self.half_life = half_life
+        self.window = window
+        self.content_weight = content_weight
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await asyncio.gather(
+            self.rankings.create_index([("score", DESCENDING), ("artist_id", ASCENDING)]),
+            self.rankings.create_index("artist_id", unique=True),
+            self.db.artists.create_index([("status", ASCENDING)] + PUBLIC_ORDER),
+            self.db.subscriptions.create_index("started_at"),
+            self.db.gated_content.create_index("created_at"),
+        )
+
+    def _decay(self, day: str, now: datetime) -> float:
+        age = now - datetime.fromisoformat(f"{day}T12:00:00+00:00")
+        return 0.5 ** (max(age, timedelta(0)) / self.half_life)
+
+    async def _daily_counts(self, collection, field: str, since: str):
+        return await collection.aggregate([
+            {"$match": {field: {"$gte": since}}},
+            {"$group": {"_id": {"artist_id": "$artist_id", "day": {"$substr": [f"${field}", 0, 10]}},
+                        "count": {"$sum": 1}}},
+        ]).to_list(None)
+
+    async def recompute(self) -> int:
+        now = datetime.now(timezone.utc)
+        since = (now - self.window).isoformat()
+        approved = set(await self.db.artists.distinct("artist_id", {"status": "approved"}))
+
+        scores = defaultdict(float)
+        for weight, collection, field in ((1.0, self.db.subscriptions, "started_at"),
+                                          (self.content_weight, self.db.gated_content, "created_at")):
+            for row in await self._daily_counts(collection, field, since):
+                artist_id = row["_id"]["artist_id"]
+                if artist_id in approved:
+                    scores[artist_id] += weight * row["count"] * self._decay(row["_id"]["day"], now)
+
+        computed_at = now.isoformat()
+        ranked = {artist_id: round(score, 6) for artist_id, score in scores.items() if score > 0}
+        if ranked:
+            await asyncio.gather(
+                self.rankings.bulk_write([
+                    UpdateOne({"artist_id": artist_id}, {"$set": {"score": score, "computed_at": computed_at}},
+                              upsert=True)
+                    for artist_id, score in ranked.items()
+                ], ordered=False),
+                self.db.artists.bulk_write([
+                    UpdateOne({"artist_id": artist_id}, {"$set": {"trending_score": score}})
+                    for artist_id, score in ranked.items()
+                ], ordered=False),
+            )
+        await asyncio.gather(
+            self.rankings.delete_many({"computed_at": {"$ne": computed_at}}),
+            self.db.artists.update_many(
+                {"artist_id": {"$nin": list(ranked)}, "trending_score": {"$exists": True}},
+                {"$unset": {"trending_score": ""}}
+            ),
+        )
+        return len(ranked)
+
+    async def top(self, limit: int) -> List[str]:
+        docs = await self.rankings.find(
+            {}, {"_id": 0, "artist_id": 1, "score": 1}
+        ).sort([("score", DESCENDING), ("artist_id", ASCENDING)]).limit(limit).to_list(limit)
+        return [d["artist_id"] for d in docs]
+
+    async def claim(self, interval: float) -> bool:
+        return await job_leases.claim(self.db.job_leases, LEASE_ID, interval * 0.9)
+
+    def start(self, interval: float, on_recompute=None):
+        async def _run():
+            while True:
+                try:
+                    if await self.claim(interval):
+                        ranked = await self.recompute()
+                        if on_recompute:
+                            await on_recompute(ranked)
+                except Exception:
+                    logger.exception("Trending recompute failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(_run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
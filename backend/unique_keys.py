@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unique indexes on user and artist identifiers, and a check for data that
+would violate them.
+
+Databases created before these indexes existed can hold duplicate emails,
+user_ids or artist profiles per user, and creating the index then fails.
+ensure_indexes() reports the conflicting values before re-raising, so the
+failed warmup step says which documents to merge. Run this module before
+deploying to list conflicts ahead of time:
+
+Run with: python unique_keys.py [--limit 50]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+
+UNIQUE_KEYS = [("users", "email"), ("users", "user_id"), ("artists", "artist_id"), ("artists", "user_id")]
+
+
+async def find_duplicates(db, collection: str, field: str, limit: int = 20) -> list:
+    """Values of field held by more than one document, most duplicated first."""
+    pipeline = [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return [(doc["_id"], doc["count"]) async for doc in db[collection].aggregate(pipeline)]
+
+
+async def _ensure(db, collection: str, field: str):
+    try:
+        await db[collection].create_index(field, unique=True)
+    except OperationFailure:
+        duplicates = await find_duplicates(db, collection, field)
+        if duplicates:
+            logger.error(f"Cannot create unique index on {collection}.{field}; duplicated values "
+                         f"(value, count): {duplicates}. Merge or remove them, then restart.")
+        raise
+
+
+async def ensure_indexes(db):
+    await asyncio.gather(*(_ensure(db, collection, field) for collection, field in UNIQUE_KEYS))
+
+
+async def check(db, limit: int) -> int:
+    conflicts = 0
+    for collection, field in UNIQUE_KEYS:
+        duplicates = await find_duplicates(db, collection, field, limit)
+        conflicts += len(duplicates)
+        if not duplicates:
+            print(f"✓ {collection}.{field}: no duplicates")
+            continue
+        print(f"✗ {collection}.{field}: {len(duplicates)}{'+' if len(duplicates) == limit else ''} duplicated values")
+        for value, count in duplicates:
+            print(f"    {value!r} x{count}")
+    return conflicts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50, help="duplicated values to list per key")
+    parser.add_argument("--db-name", help="defaults to DB_NAME from .env")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(ROOT_DIR / '.env')
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = args.db_name or os.environ.get('DB_NAME')
+    if not mongo_url or not db_name:
+        print("Error: MONGO_URL and DB_NAME must be set in .env file")
+        return 1
+
+    async def run() -> int:
+        client = AsyncIOMotorClient(mongo_url)
+        try:
+            return await check(client[db_name], args.limit)
+        finally:
+            client.close()
+
+    return 1 if asyncio.run(run()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
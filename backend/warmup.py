@@ -0,0 +1,126 @@
+"""
+Startup warmup that gates readiness.
+
+The process starts serving immediately (so liveness probes pass) and runs
+its warmup steps in the background: reaching Mongo and priming the pool,
+checking indexes, loading state and prefilling caches. Readiness stays false
+until every step has succeeded once; a failing step is retried with
+exponential backoff rather than crashing the process, so a pod that starts
+before Mongo is reachable simply becomes ready later. Errors that retrying
+cannot fix (is_permanent, e.g. an index that existing duplicates violate)
+stop warmup instead: the step is reported as failed in status() and the
+process stays unready until the fault is fixed and it is restarted.
+
+ReadinessGate answers 503 for everything except the health endpoints until
+warmup has finished, so no request is served before indexes exist and the
+token revocation list is loaded, whether or not the orchestrator is
+configured to probe readiness.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupFailed(RuntimeError):
+    pass
+
+
+class Warmup:
+    def __init__(self, steps: List[Tuple[str, Callable[[], Awaitable]]], retry_delay: float = 1.0,
+                 max_retry_delay: float = 30.0, is_permanent: Callable[[Exception], bool] = lambda e: False):
+        self.steps = steps
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.is_permanent = is_permanent
+        self.ready = False
+        self.failed_step: Optional[str] = None
+        self.current: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.attempts = {}
+        self.durations_ms = {}
+        self.total_ms: Optional[float] = None
+        self._done = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        start = time.perf_counter()
+        for name, step in self.steps:
+            self.current = name
+            delay = self.retry_delay
+            while True:
+                self.attempts[name] = self.attempts.get(name, 0) + 1
+                step_start = time.perf_counter()
+                try:
+                    await step()
+                    break
+                except Exception as e:
+                    self.last_error = f"{name}: {e}"
+                    if self.is_permanent(e):
+                        self.failed_step = name
+                        self.current = None
+                        self._done.set()
+                        logger.error(f"Warmup step {name} failed permanently, staying unready: {e}")
+                        return
+                    logger.warning(f"Warmup step {name} failed, retrying in {delay:.1f}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+            self.durations_ms[name] = round((time.perf_counter() - step_start) * 1000, 3)
+        self.total_ms = round((time.perf_counter() - start) * 1000, 3)
+        self.current = None
+        self.last_error = None
+        self.ready = True
+        self._done.set()
+        logger.info(f"Warmup complete in {self.total_ms}ms: {self.durations_ms}")
+
+    def start(self):
+        self.ready = False
+        self.failed_step = None
+        self.attempts, self.durations_ms, self.total_ms = {}, {}, None
+        self._done = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def wait(self, timeout: Optional[float] = None):
+        await asyncio.wait_for(self._done.wait(), timeout)
+        if self.failed_step:
+            raise WarmupFailed(self.last_error)
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "current_step": self.current,
+            "failed_step": self.failed_step,
+            "last_error": self.last_error,
+            "attempts": dict(self.attempts),
+            "durations_ms": dict(self.durations_ms),
+            "total_ms": self.total_ms,
+        }
+
+
+class ReadinessGate:
+    def __init__(self, app, is_ready: Callable[[], bool], allow: Tuple[str, ...] = (), retry_after: int = 1):
+        self.app = app
+        self.is_ready = is_ready
+        self.allow = tuple(allow)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.is_ready() or scope["path"].startswith(self.allow):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse({"detail": "Service is starting, retry shortly"}, status_code=503,
+                                headers={"Retry-After": str(self.retry_after)})
+        await response(scope, receive, send)
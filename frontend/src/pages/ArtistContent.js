@@ -301,9 +301,9 @@ export default function ArtistContent() {
                       </div>
                     </div>
 
-                    {item.content_text && (
+                    {item.excerpt && (
                       <div className="mb-4">
-                        <p className="text-foreground whitespace-pre-wrap line-clamp-3">{item.content_text}</p>
+                        <p className="text-foreground whitespace-pre-wrap line-clamp-3">{item.excerpt}</p>
                       </div>
                     )}
 
@@ -17,6 +17,7 @@ export default function ArtistDashboard() {
   const [editing, setEditing] = useState(false);
   const [formData, setFormData] = useState({ name: '', bio: '', profile_image: '' });
   const [loading, setLoading] = useState(true);
+  const [uploading, setUploading] = useState(false);
 
   useEffect(() => {
     if (location.state?.user) {
@@ -91,6 +92,31 @@ export default function ArtistDashboard() {
     }
   };
 
+  const handleImageUpload = async (e) => {
+    const file = e.target.files?.[0];
+    if (!file) return;
+    setUploading(true);
+    try {
+      const response = await fetch(`${BACKEND_URL}/api/media/upload`, {
+        method: 'POST',
+        headers: { 'Content-Type': file.type },
+        credentials: 'include',
+        body: file
+      });
+
+      if (!response.ok) throw new Error('Failed to upload image');
+
+      const media = await response.json();
+      setFormData((prev) => ({ ...prev, profile_image: media.thumbnails['512'] || media.url }));
+      toast.success('Image uploaded');
+    } catch (error) {
+      toast.error(error.message);
+    } finally {
+      setUploading(false);
+      e.target.value = '';
+    }
+  };
+
   const handleSubmitForReview = async () => {
     try {
       const response = await fetch(`${BACKEND_URL}/api/artist/submit`, {
@@ -253,6 +279,15 @@ export default function ArtistDashboard() {
                     placeholder="https://..."
                     data-testid="image-url-input"
                   />
+                  <Input
+                    type="file"
+                    accept="image/jpeg,image/png,image/webp,image/gif"
+                    onChange={handleImageUpload}
+                    disabled={uploading}
+                    className="h-11"
+                    data-testid="image-upload-input"
+                  />
+                  {uploading && <p className="text-sm text-muted-foreground">Uploading...</p>}
                 </div>
 
                 <div className="flex gap-3">
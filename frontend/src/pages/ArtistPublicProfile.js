@@ -11,10 +11,15 @@ export default function ArtistPublicProfile() {
   const navigate = useNavigate();
   const [artist, setArtist] = useState(null);
   const [tiers, setTiers] = useState([]);
+  const [similar, setSimilar] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     fetchArtistData();
+    fetch(`${BACKEND_URL}/api/artist/${artistId}/similar`)
+      .then((res) => (res.ok ? res.json() : []))
+      .then(setSimilar)
+      .catch(() => setSimilar([]));
   }, [artistId]);
 
   const fetchArtistData = async () => {
@@ -198,6 +203,33 @@ export default function ArtistPublicProfile() {
               </div>
             )}
           </div>
+
+          {similar.length > 0 && (
+            <div className="mt-16" data-testid="similar-artists">
+              <h2 className="text-3xl font-bold font-display text-primary mb-6 text-center">Fans Also Support</h2>
+              <div className="grid grid-cols-2 md:grid-cols-5 gap-4">
+                {similar.map((other) => (
+                  <Link
+                    key={other.artist_id}
+                    to={`/artist/${other.artist_id}`}
+                    className="group text-center"
+                    data-testid={`similar-artist-${other.artist_id}`}
+                  >
+                    <div className="aspect-square rounded-xl overflow-hidden bg-slate-100 mb-2">
+                      {other.profile_image ? (
+                        <img src={other.profile_image} alt={other.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300" />
+                      ) : (
+                        <div className="w-full h-full flex items-center justify-center bg-gradient-to-br from-primary/20 to-accent/20">
+                          <Music2 className="h-10 w-10 text-primary/40" />
+                        </div>
+                      )}
+                    </div>
+                    <p className="text-sm font-medium text-foreground group-hover:text-primary">{other.name}</p>
+                  </Link>
+                ))}
+              </div>
+            </div>
+          )}
         </div>
       </div>
     </div>
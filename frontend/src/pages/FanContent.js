@@ -12,6 +12,8 @@ export default function FanContent() {
   const [content, setContent] = useState([]);
   const [artist, setArtist] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [fullText, setFullText] = useState({});
+  const [expanding, setExpanding] = useState(null);
 
   useEffect(() => {
     checkAuthAndFetchContent();
@@ -51,6 +53,24 @@ export default function FanContent() {
     }
   };
 
+  const expandContent = async (contentId) => {
+    setExpanding(contentId);
+    try {
+      const res = await fetch(`${BACKEND_URL}/api/content/${contentId}`, {
+        credentials: 'include'
+      });
+      if (!res.ok) {
+        throw new Error('Failed to load content');
+      }
+      const data = await res.json();
+      setFullText((prev) => ({ ...prev, [contentId]: data.content_text }));
+    } catch (error) {
+      toast.error('Failed to load content');
+    } finally {
+      setExpanding(null);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -115,9 +135,21 @@ export default function FanContent() {
                     </div>
                   </div>
 
-                  {item.content_text && (
+                  {item.excerpt && (
                     <div className="prose prose-sm max-w-none mb-4">
-                      <p className="text-foreground whitespace-pre-wrap">{item.content_text}</p>
+                      <p className="text-foreground whitespace-pre-wrap">{fullText[item.content_id] ?? item.excerpt}</p>
+                      {item.has_more && fullText[item.content_id] === undefined && (
+                        <Button
+                          variant="link"
+                          size="sm"
+                          className="px-0"
+                          onClick={() => expandContent(item.content_id)}
+                          disabled={expanding === item.content_id}
+                          data-testid={`read-more-${item.content_id}`}
+                        >
+                          {expanding === item.content_id ? 'Loading...' : 'Read more'}
+                        </Button>
+                      )}
                     </div>
                   )}
 
@@ -8,6 +8,14 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 export default function Landing() {
   const navigate = useNavigate();
   const [menuOpen, setMenuOpen] = useState(false);
+  const [trending, setTrending] = useState([]);
+
+  useEffect(() => {
+    fetch(`${BACKEND_URL}/api/artists/trending?limit=6`)
+      .then((res) => (res.ok ? res.json() : []))
+      .then(setTrending)
+      .catch(() => setTrending([]));
+  }, []);
 
   return (
     <div className="min-h-screen bg-white">
@@ -89,6 +97,50 @@ export default function Landing() {
         </div>
       </div>
 
+      {/* Trending Artists */}
+      {trending.length > 0 && (
+        <div className="py-20" data-testid="trending-section">
+          <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
+            <div className="text-center mb-12">
+              <h2 className="text-4xl md:text-5xl font-semibold tracking-tight font-display text-primary mb-4">
+                Trending Artists
+              </h2>
+              <p className="text-base md:text-lg leading-relaxed text-muted-foreground font-sans max-w-2xl mx-auto">
+                The artists fans are subscribing to right now
+              </p>
+            </div>
+
+            <div className="grid grid-cols-2 sm:grid-cols-3 lg:grid-cols-6 gap-6">
+              {trending.map((artist) => (
+                <Link
+                  key={artist.artist_id}
+                  to={`/artist/${artist.artist_id}`}
+                  className="group"
+                  data-testid={`trending-artist-${artist.artist_id}`}
+                >
+                  <div className="aspect-square rounded-xl overflow-hidden bg-slate-100 mb-3">
+                    {artist.profile_image ? (
+                      <img
+                        src={artist.profile_image}
+                        alt={artist.name}
+                        className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
+                      />
+                    ) : (
+                      <div className="w-full h-full flex items-center justify-center bg-gradient-to-br from-primary/20 to-accent/20">
+                        <Music2 className="h-10 w-10 text-primary/40" />
+                      </div>
+                    )}
+                  </div>
+                  <h3 className="text-base font-semibold font-display text-primary group-hover:text-accent transition-colors truncate">
+                    {artist.name}
+                  </h3>
+                </Link>
+              ))}
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* Features Section */}
       <div className="py-20 bg-gradient-to-b from-white to-slate-50">
         <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
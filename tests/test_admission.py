@@ -0,0 +1,119 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import metrics  # noqa: E402
+from admission import AdmissionMiddleware, ConcurrencyLimiter, TokenBuckets, parse_rules  # noqa: E402
+
+
+def test_parse_rules_matches_methods_segments_and_prefixes():
+    search, artist, public = parse_rules("GET /api/artists/search=4/8, GET /api/artist/{id}/tiers=2/3, /api/public/*=1")
+    assert (search.first, search.second) == (4, 8)
+    assert search.matches("GET", "/api/artists/search") and not search.matches("POST", "/api/artists/search")
+    assert artist.matches("GET", "/api/artist/a1/tiers") and not artist.matches("GET", "/api/artist/a1/b/tiers")
+    assert public.matches("DELETE", "/api/public/x/y") and (public.first, public.second) == (1, 1)
+
+
+def test_token_bucket_refills_per_key():
+    buckets = TokenBuckets(rate=10, burst=2)
+    assert buckets.take("a") == 0 and buckets.take("a") == 0
+    assert 0 < buckets.take("a") <= 0.1
+    assert buckets.take("b") == 0
+
+
+def test_limiter_queues_then_sheds():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=0.05)
+        assert await limiter.acquire() is None
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert await limiter.acquire() == "queue_full"
+        limiter.release()
+        assert await waiter is None
+        assert limiter.active == 1
+        assert await limiter.acquire() == "queue_timeout"
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_middleware_sheds_excess_and_rate_limits_per_session():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionMiddleware(
+        app,
+        concurrency_rules=parse_rules("GET /slow=1/1"),
+        rate_rules=parse_rules("GET /public=1/2"),
+        queue_timeout=5,
+        retry_after=2,
+        session_validator=lambda token: token in {"fan-token", "other"},
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.create_task(client.get("/slow"))
+            queued = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.05)
+            shed = await client.get("/slow")
+            assert shed.status_code == 503 and shed.headers["retry-after"] == "2"
+            assert (await client.get("/other")).status_code == 200
+            release.set()
+            assert [r.status_code for r in await asyncio.gather(running, queued)] == [200, 200]
+
+            fan = {"Authorization": "Bearer fan-token"}
+            codes = [(await client.get("/public", headers=fan)).status_code for _ in range(3)]
+            assert codes == [200, 200, 429]
+            assert (await client.get("/public", headers={"Authorization": "Bearer other"})).status_code == 200
+
+    before = metrics.admission_shed.value(route="GET /slow", reason="queue_full")
+    asyncio.run(scenario())
+    assert metrics.admission_shed.value(route="GET /slow", reason="queue_full") == before + 1
+    assert metrics.admission_shed.value(route="GET /public", reason="rate_limited") >= 1
+
+
+def test_unvalidated_tokens_and_ip_rules_share_the_address_bucket():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionMiddleware(
+        app,
+        rate_rules=parse_rules("POST /login=1/2:ip, GET /public=1/2"),
+        trust_forwarded_for=True,
+        session_validator=lambda token: token == "valid",
+    )
+    assert [r.by_ip for r in middleware.rate_rules] == [True, False]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            forged = [(await client.get("/public", headers={"Cookie": f"session_token=random{n}"})).status_code
+                      for n in range(3)]
+            assert forged == [200, 200, 429]
+            assert (await client.get("/public", headers={"Cookie": "session_token=valid"})).status_code == 200
+
+            valid = {"Authorization": "Bearer valid"}
+            logins = [(await client.post("/login", headers=valid)).status_code for _ in range(3)]
+            assert logins == [200, 200, 429]
+
+            # Only the proxy-appended (last) X-Forwarded-For entry identifies the client.
+            spoofed = [(await client.post("/login", headers={"X-Forwarded-For": f"10.0.0.{n}, 203.0.113.7"})).status_code
+                       for n in range(3)]
+            assert spoofed == [200, 200, 429]
+
+    asyncio.run(scenario())
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from benchmark import compare  # noqa: E402
+
+
+def result(errors=0, p95=100.0, rps=200.0):
+    return {"requests": 50, "errors": errors, "p50_ms": 50.0, "p95_ms": p95, "p99_ms": p95, "throughput_rps": rps}
+
+
+def test_errors_above_baseline_are_regressions_even_when_fast():
+    baseline = {"checkout": result(), "auth_me": result(errors=2)}
+    results = {"checkout": result(errors=50, p95=5.0, rps=5000.0), "auth_me": result(errors=2)}
+
+    assert compare(results, baseline, 0.2) == ["checkout: errors 0 -> 50"]
+
+
+def test_errors_without_a_baseline_are_reported():
+    assert compare({"checkout": result(errors=3)}, {}, 0.2) == ["checkout: 3 errors with no baseline"]
+    assert compare({"checkout": result()}, {}, 0.2) == []
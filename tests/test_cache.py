@@ -0,0 +1,102 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from cache import Cache, InvalidationBus, MemoryBackend, RedisBackend  # noqa: E402
+
+
+def test_memory_backend_expires_entries():
+    async def scenario():
+        cache = Cache(MemoryBackend(), InvalidationBus(), default_ttl=0.05)
+        await cache.set("artist:1", b"{}")
+        assert await cache.get("artist:1") == b"{}"
+        await asyncio.sleep(0.06)
+        assert await cache.get("artist:1") is None
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_reaches_other_workers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        workers = [
+            Cache(MemoryBackend(), InvalidationBus(fakeredis.aioredis.FakeRedis(server=server)))
+            for _ in range(2)
+        ]
+        received = []
+        workers[1].bus.subscribe(received.append)
+        for worker in workers:
+            await worker.start()
+            await worker.set("artist:1", b"{}")
+
+        await workers[0].invalidate("artist:1", users=["user_1"])
+        for _ in range(50):
+            if received:
+                break
+            await asyncio.sleep(0.02)
+
+        assert received == [{"keys": ["artist:1"], "users": ["user_1"]}]
+        assert await workers[0].get("artist:1") is None
+        assert await workers[1].get("artist:1") is None
+        for worker in workers:
+            await worker.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_shares_values():
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis()
+        writer = Cache(RedisBackend(redis), InvalidationBus())
+        reader = Cache(RedisBackend(redis), InvalidationBus())
+        await writer.set("tiers:1", b"[]")
+        assert await reader.get("tiers:1") == b"[]"
+        await writer.invalidate("tiers:1")
+        assert await reader.get("tiers:1") is None
+
+    asyncio.run(scenario())
+
+
+def test_render_invalidated_mid_read_is_not_cached():
+    async def scenario():
+        cache = Cache(MemoryBackend(), InvalidationBus())
+        generation = cache.generation("tiers:a1")
+        # A tier is written (and the key invalidated) while the old tiers are being rendered.
+        await cache.invalidate("tiers:a1")
+        await cache.set("tiers:a1", b"[old]", generation=generation)
+        assert await cache.get("tiers:a1") is None
+
+        await cache.set("tiers:a1", b"[new]", generation=cache.generation("tiers:a1"))
+        assert await cache.get("tiers:a1") == b"[new]"
+
+    asyncio.run(scenario())
+
+
+def test_malformed_invalidation_does_not_stop_the_listener():
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis()
+        worker = Cache(MemoryBackend(), InvalidationBus(redis))
+        received = []
+        worker.bus.subscribe(received.append)
+        await worker.start()
+        await worker.set("artist:1", b"{}")
+
+        await redis.publish(worker.bus.channel, "not json")
+        await redis.publish(worker.bus.channel, '["keys"]')
+        await redis.publish(worker.bus.channel, '{"keys": ["artist:1"], "origin": "elsewhere"}')
+        for _ in range(50):
+            if received:
+                break
+            await asyncio.sleep(0.02)
+
+        assert received == [{"keys": ["artist:1"]}]
+        assert await worker.get("artist:1") is None
+        await worker.close()
+
+    asyncio.run(scenario())
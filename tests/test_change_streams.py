@@ -0,0 +1,199 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from pymongo.errors import OperationFailure  # noqa: E402
+
+from change_streams import ArtistStatsView, ChangeStreamWatcher, changed_document  # noqa: E402
+
+
+class ScriptedStream:
+    def __init__(self, changes):
+        self.changes = changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.changes:
+            await asyncio.Event().wait()
+        change = self.changes.pop(0)
+        if isinstance(change, Exception):
+            raise change
+        return change
+
+
+class ScriptedCollection:
+    """Replays changes after the resume token the watcher asks for."""
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.opened_with = []
+        self.before_change = []
+
+    def watch(self, full_document=None, start_after=None, full_document_before_change=None):
+        self.opened_with.append(start_after)
+        self.before_change.append(full_document_before_change)
+        position = 0
+        if start_after is not None:
+            position = next(i for i, c in enumerate(self.changes) if c["_id"] == start_after) + 1
+        return ScriptedStream(self.changes[position:])
+
+
+def change(n, artist_id):
+    return {"_id": {"_data": f"token{n}"}, "operationType": "insert", "fullDocument": {"artist_id": artist_id}}
+
+
+async def drain(watcher, received, count):
+    watcher.start()
+    for _ in range(100):
+        if len(received) >= count:
+            break
+        await asyncio.sleep(0.01)
+    await watcher.stop()
+
+
+def test_watcher_resumes_from_persisted_token():
+    async def scenario():
+        state = mongomock_motor.AsyncMongoMockClient().watcher_test.change_stream_state
+        tiers = ScriptedCollection([change(1, "artist_a"), change(2, "artist_b")])
+        received = []
+
+        async def handler(event):
+            received.append(event["fullDocument"]["artist_id"])
+
+        await drain(ChangeStreamWatcher({"subscription_tiers": tiers}, {"subscription_tiers": handler}, state),
+                    received, 2)
+        tiers.changes.append(change(3, "artist_c"))
+        await drain(ChangeStreamWatcher({"subscription_tiers": tiers}, {"subscription_tiers": handler}, state),
+                    received, 3)
+
+        assert received == ["artist_a", "artist_b", "artist_c"]
+        assert tiers.opened_with == [None, {"_data": "token2"}]
+
+    asyncio.run(scenario())
+
+
+def test_watcher_resyncs_when_history_is_lost():
+    async def scenario():
+        state = mongomock_motor.AsyncMongoMockClient().watcher_lost.change_stream_state
+        await state.insert_one({"_id": "default:artists", "resume_token": {"_data": "gone"}})
+        artists = ScriptedCollection([change(1, "artist_a")])
+        received, resyncs = [], []
+        replay = artists.watch
+
+        def watch(full_document=None, start_after=None):
+            if start_after == {"_data": "gone"}:
+                artists.opened_with.append(start_after)
+                return ScriptedStream([OperationFailure("history lost", code=286)])
+            return replay(full_document, start_after)
+
+        artists.watch = watch
+
+        async def handler(event):
+            received.append(event["_id"]["_data"])
+
+        async def on_resync():
+            resyncs.append(True)
+
+        watcher = ChangeStreamWatcher({"artists": artists}, {"artists": handler}, state, on_resync=on_resync)
+        await drain(watcher, received, 1)
+
+        assert resyncs == [True]
+        assert artists.opened_with == [{"_data": "gone"}, None]
+        assert received == ["token1"]
+        assert (await state.find_one({"_id": "default:artists"}))["resume_token"] == {"_data": "token1"}
+
+    asyncio.run(scenario())
+
+
+def test_artist_stats_view_counts_active_subscriptions():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().stats_view_test
+        await db.artists.insert_many([{"artist_id": "artist_a"}, {"artist_id": "artist_b"}])
+        await db.subscription_tiers.insert_one({"artist_id": "artist_a"})
+        await db.subscriptions.insert_many([
+            {"artist_id": "artist_a", "status": "active"},
+            {"artist_id": "artist_a", "status": "expired"},
+        ])
+        await db.artist_stats.insert_one({"artist_id": "artist_gone", "subscriber_count": 9})
+
+        view = ArtistStatsView(db)
+        await view.rebuild()
+
+        assert await view.get("artist_a") == {"artist_id": "artist_a", "subscriber_count": 1, "tier_count": 1}
+        assert await view.get("artist_b") == {"artist_id": "artist_b", "subscriber_count": 0, "tier_count": 0}
+        assert await view.get("artist_gone") is None
+
+    asyncio.run(scenario())
+
+
+def test_failing_handler_skips_the_event_after_max_failures():
+    async def scenario():
+        state = mongomock_motor.AsyncMongoMockClient().watcher_poison.change_stream_state
+        tiers = ScriptedCollection([change(1, "poison"), change(2, "artist_b")])
+        attempts, received = [], []
+
+        async def handler(event):
+            artist_id = event["fullDocument"]["artist_id"]
+            if artist_id == "poison":
+                attempts.append(artist_id)
+                raise ValueError("cannot handle")
+            received.append(artist_id)
+
+        watcher = ChangeStreamWatcher({"subscription_tiers": tiers}, {"subscription_tiers": handler}, state,
+                                      retry_delay=0, max_handler_failures=3)
+        await drain(watcher, received, 1)
+
+        assert attempts == ["poison"] * 3
+        assert received == ["artist_b"]
+        assert tiers.opened_with == [None, None, None]
+
+    asyncio.run(scenario())
+
+
+def test_deletes_resolve_through_pre_images():
+    class Database(dict):
+        def __init__(self, collections, fail=()):
+            super().__init__(collections)
+            self.fail = fail
+            self.commands = []
+
+        async def command(self, name, collection, **options):
+            if collection in self.fail:
+                raise OperationFailure("not supported", code=72)
+            self.commands.append((name, collection, options))
+
+    async def scenario():
+        state = mongomock_motor.AsyncMongoMockClient().watcher_images.change_stream_state
+        deleted = {"_id": {"_data": "token1"}, "operationType": "delete", "documentKey": {"_id": 1},
+                   "fullDocumentBeforeChange": {"_id": 1, "artist_id": "artist_a"}}
+        tiers, artists = ScriptedCollection([deleted]), ScriptedCollection([])
+        db = Database({"subscription_tiers": tiers, "artists": artists}, fail={"artists"})
+        received = []
+
+        async def handler(event):
+            received.append(changed_document(event).get("artist_id"))
+
+        watcher = ChangeStreamWatcher(db, {"subscription_tiers": handler, "artists": handler}, state, pre_images=True)
+        await drain(watcher, received, 1)
+
+        assert received == ["artist_a"]
+        assert db.commands == [("collMod", "subscription_tiers", {"changeStreamPreAndPostImages": {"enabled": True}})]
+        assert tiers.before_change == ["whenAvailable"]
+        assert artists.before_change == [None]
+        assert changed_document({"operationType": "delete", "documentKey": {"_id": 1}}) == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import content_bodies  # noqa: E402
+
+
+def test_short_body_is_stored_plain():
+    fields = content_bodies.body_fields("Short post", codec="gzip")
+    assert fields == {"excerpt": "Short post", "has_more": False, "content_text": "Short post"}
+
+
+def test_long_body_is_compressed_and_excerpted():
+    text = "verse " * 2000
+    fields = content_bodies.body_fields(text, codec="gzip", min_compress_bytes=1024)
+    assert fields["content_text"] is None
+    assert fields["content_encoding"] == "gzip"
+    assert len(fields["content_body"]) < len(text) // 10
+    assert fields["has_more"] and len(fields["excerpt"]) <= content_bodies.EXCERPT_LENGTH + 1
+    assert content_bodies.read_body(fields) == text
+
+
+def test_excerpt_skips_leading_whitespace():
+    text = " " * 300 + "\n\nFirst line of the post " + "word " * 100
+    fields = content_bodies.body_fields(text)
+    assert fields["excerpt"].startswith("First line of the post")
+    assert fields["excerpt"].endswith("…") and fields["has_more"]
+    assert content_bodies.make_excerpt(" " * 400) == ""
+    assert content_bodies.body_fields(" " * 400)["has_more"] is False
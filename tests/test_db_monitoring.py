@@ -0,0 +1,76 @@
+import logging
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from db_monitoring import DBCommandMonitor, RequestDBStats, RouteDBStats, current_db_stats, filter_shape  # noqa: E402
+
+
+def event(request_id, command_name, command=None, duration_ms=1.0, reply=None):
+    return SimpleNamespace(
+        connection_id=("localhost", 27017), request_id=request_id, database_name="favatis",
+        command_name=command_name, command=command or {}, duration_micros=int(duration_ms * 1000), reply=reply,
+    )
+
+
+def test_filter_shape_hides_values_but_keeps_structure():
+    shape = filter_shape({"artist_id": "a1", "status": {"$in": ["active", "expired"]}, "$or": [{"x": 1}, {"y": 2}]})
+    assert shape == {"artist_id": "?", "status": {"$in": ["?"]}, "$or": [{"x": "?"}]}
+    assert filter_shape([]) == []
+
+
+def test_commands_are_attributed_to_the_current_request(caplog):
+    monitor = DBCommandMonitor(slow_query_ms=50)
+    stats = RequestDBStats()
+    token = current_db_stats.set(stats)
+    try:
+        find = {"find": "artists", "filter": {"artist_id": "a1"}}
+        monitor.started(event(1, "find", find))
+        monitor.started(event(2, "ping"))
+        monitor.started(event(3, "update", {"update": "artists", "updates": [{"q": {"artist_id": "a1"}}]}))
+    finally:
+        current_db_stats.reset(token)
+    # Replies arrive on other threads, outside the request's context.
+    with caplog.at_level(logging.WARNING, logger="db_monitoring"):
+        monitor.succeeded(event(1, "find", duration_ms=80, reply={"cursor": {"firstBatch": [{}, {}]}}))
+        monitor.succeeded(event(2, "ping"))
+        monitor.failed(event(3, "update", duration_ms=5))
+
+    assert (stats.calls, stats.documents, stats.errors) == (2, 2, 1)
+    assert round(stats.duration_ms, 3) == 85.0
+    assert 'db;dur=85.0;desc="2 queries, 2 docs"' == stats.server_timing()
+    assert len(caplog.records) == 1
+    assert "find favatis.artists filter={'artist_id': '?'} docs=2" in caplog.records[0].getMessage()
+
+
+def test_concurrent_records_are_not_lost():
+    stats = RequestDBStats()
+
+    def worker():
+        for _ in range(10000):
+            stats.record(0.5, documents=1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (stats.calls, stats.documents, stats.duration_ms) == (80000, 80000, 40000.0)
+
+
+def test_route_stats_aggregate_per_route():
+    routes = RouteDBStats()
+    for calls in (1, 3):
+        stats = RequestDBStats()
+        for _ in range(calls):
+            stats.record(2.0, documents=1)
+        routes.record("GET /api/artist/{artist_id}", stats)
+
+    snapshot = routes.snapshot()["GET /api/artist/{artist_id}"]
+    assert snapshot["requests"] == 2 and snapshot["calls"] == 4 and snapshot["max_calls"] == 3
+    assert snapshot["avg_calls"] == 2.0 and snapshot["avg_duration_ms"] == 4.0
+    routes.reset()
+    assert routes.snapshot() == {}
@@ -0,0 +1,278 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+COLLECTION_OPS = [
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "delete_one",
+    "delete_many", "find_one_and_update", "count_documents", "replace_one",
+]
+
+
+@pytest.fixture(scope="module")
+def server():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MONGO_URL", "mongodb://localhost:27017")
+        mp.setenv("DB_NAME", "favatis_round_trips")
+        mp.setenv("SESSION_TOKEN_MODE", "opaque")
+        for job in ("SUBSCRIPTION_SCHEDULER", "TRENDING", "SIMILAR_ARTISTS"):
+            mp.setenv(f"{job}_INTERVAL_SECONDS", "0")
+        # Audit events are flushed in the background; keep them out of the per-request counts.
+        mp.setenv("EVENT_LOG_FLUSH_INTERVAL_SECONDS", "3600")
+        mp.syspath_prepend(str(BACKEND_DIR))
+        import motor.motor_asyncio
+        mp.setattr(motor.motor_asyncio, "AsyncIOMotorClient",
+                   lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient())
+        sys.modules.pop("server", None)
+        import server
+        yield server
+        sys.modules.pop("server", None)
+
+
+@pytest.fixture
+def client(server):
+    with TestClient(server.app) as test_client:
+        test_client.portal.call(server.warmup.wait, 10)
+        yield test_client
+
+
+@pytest.fixture
+def db_calls(monkeypatch):
+    """Record (collection, operation) for every awaited Mongo round trip."""
+    calls = []
+
+    def counting(cls, name, collection_of):
+        original = getattr(cls, name)
+
+        async def wrapper(self, *args, **kwargs):
+            calls.append((collection_of(self), name))
+            return await original(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, name, wrapper)
+
+    for op in COLLECTION_OPS:
+        counting(mongomock_motor.AsyncMongoMockCollection, op, lambda c: c.name)
+    counting(mongomock_motor.AsyncCursor, "to_list", lambda c: c.collection.name)
+    return calls
+
+
+def signup(client, email, role="fan"):
+    response = client.post("/api/auth/email-signup", json={"email": email, "name": "Round Trip", "role": role})
+    assert response.status_code == 200
+    return response.cookies["session_token"]
+
+
+def apply(client, email):
+    response = client.post("/api/artist/apply", json={
+        "email": email,
+        "name": "Applicant",
+        "spotify_link": "https://open.spotify.com/artist/roundtrip",
+    })
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['session_token']}"}
+
+
+def test_email_signup_round_trips(client, db_calls):
+    signup(client, "signup@round.trip")
+    assert db_calls == [("users", "insert_one"), ("user_sessions", "insert_one")]
+
+
+def test_email_signup_duplicate_is_single_insert(client, db_calls):
+    signup(client, "dupe@round.trip")
+    db_calls.clear()
+
+    response = client.post("/api/auth/email-signup", json={"email": "dupe@round.trip", "name": "Dupe", "role": "fan"})
+    assert response.status_code == 400
+    assert db_calls == [("users", "insert_one")]
+
+
+def test_apply_as_artist_round_trips(client, db_calls):
+    apply(client, "apply@round.trip")
+    assert sorted(db_calls) == [("artists", "insert_one"), ("user_sessions", "insert_one"), ("users", "insert_one")]
+
+
+def test_update_artist_profile_round_trips(client, db_calls):
+    headers = apply(client, "update@round.trip")
+    db_calls.clear()
+
+    response = client.put("/api/artist/profile", json={"bio": "New bio"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["bio"] == "New bio"
+    assert db_calls == [
+        ("user_sessions", "find_one"),
+        ("users", "find_one"),
+        ("artists", "find_one"),
+        ("artists", "find_one_and_update"),
+    ]
+
+
+def test_artist_endpoints_reuse_cached_artist_context(client, db_calls):
+    headers = apply(client, "cached@round.trip")
+    assert client.get("/api/artist/profile", headers=headers).status_code == 200
+    db_calls.clear()
+
+    assert client.put("/api/artist/profile", json={"bio": "Cached"}, headers=headers).status_code == 200
+    assert client.get("/api/artist/tiers", headers=headers).status_code == 200
+    assert client.get("/api/artist/content", headers=headers).status_code == 200
+    assert db_calls == [
+        ("artists", "find_one_and_update"),
+        ("subscription_tiers", "to_list"),
+        ("gated_content", "to_list"),
+    ]
+
+
+def test_google_session_round_trips(client, db_calls, monkeypatch):
+    import aiohttp
+
+    class FakeResponse:
+        status = 200
+
+        async def json(self):
+            return {"email": "google@round.trip", "name": "Google User", "picture": None,
+                    "session_token": "session_google_round_trip"}
+
+    class FakeRequest:
+        async def __aenter__(self):
+            return FakeResponse()
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeClientSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def get(self, *args, **kwargs):
+            return FakeRequest()
+
+    monkeypatch.setattr(aiohttp, "ClientSession", FakeClientSession)
+
+    response = client.post("/api/auth/google-session", json={"session_id": "abc"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "google@round.trip"
+    assert db_calls == [
+        ("users", "find_one_and_update"),
+        ("user_sessions", "insert_one"),
+        ("user_sessions", "to_list"),
+    ]
+
+
+def test_readiness_follows_warmup(client, server):
+    assert client.get("/api/health/live").status_code == 200
+    ready = client.get("/api/health/ready")
+    assert ready.status_code == 200
+    assert set(ready.json()["durations_ms"]) == {name for name, _ in server.warmup.steps}
+
+
+def test_concurrent_public_reads_share_one_query(client, server, db_calls, monkeypatch):
+    import httpx
+
+    headers = apply(client, "popular@round.trip")
+    artist_id = client.get("/api/artist/profile", headers=headers).json()["artist_id"]
+    db_calls.clear()
+
+    # mongomock answers without yielding; give the query some latency so the requests overlap.
+    to_list = mongomock_motor.AsyncCursor.to_list
+
+    async def slow_to_list(self, *args, **kwargs):
+        await asyncio.sleep(0.05)
+        return await to_list(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock_motor.AsyncCursor, "to_list", slow_to_list)
+
+    async def burst():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as async_client:
+            return await asyncio.gather(*(async_client.get(f"/api/artist/{artist_id}/tiers") for _ in range(20)))
+
+    responses = client.portal.call(burst)
+    assert {r.status_code for r in responses} == {200}
+    assert db_calls == [("subscription_tiers", "to_list")]
+
+
+def test_renewed_session_reissues_the_cookie(client, server):
+    from datetime import datetime, timezone, timedelta
+
+    token = signup(client, "renew@round.trip")
+    aged = datetime.now(timezone.utc) + timedelta(days=server.session_ttl_days) - timedelta(hours=2)
+    client.portal.call(server.db.user_sessions.update_one, {"session_token": token}, {"$set": {"expires_at": aged}})
+    server.auth_cache.invalidate_key(server.token_key(token))
+
+    # The cookie is Secure, so the plain-http test client will not send it by itself.
+    headers = {"Cookie": f"session_token={token}"}
+    response = client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    cookie = response.headers["set-cookie"]
+    assert f"session_token={token}" in cookie
+    max_age = int(cookie.split("Max-Age=")[1].split(";")[0])
+    assert server.session_ttl_days * 24 * 60 * 60 - 60 < max_age <= server.session_ttl_days * 24 * 60 * 60
+    assert "set-cookie" not in client.get("/api/auth/me", headers=headers).headers
+
+
+def test_deleted_tier_invalidates_through_its_pre_image(client, server):
+    headers = apply(client, "deleted-tier@round.trip")
+    artist_id = client.get("/api/artist/profile", headers=headers).json()["artist_id"]
+    assert client.get(f"/api/artist/{artist_id}/tiers").status_code == 200
+    assert client.portal.call(server.cache.get, f"tiers:{artist_id}") is not None
+
+    change = {"_id": {"_data": "t1"}, "operationType": "delete", "documentKey": {"_id": 1},
+              "fullDocumentBeforeChange": {"_id": 1, "tier_id": "tier_x", "artist_id": artist_id}}
+    client.portal.call(server.on_tier_change, change)
+    assert client.portal.call(server.cache.get, f"tiers:{artist_id}") is None
+    assert client.portal.call(server.stats_view.get, artist_id)["tier_count"] == 0
+
+
+def test_invalidated_keys_are_rebuilt_from_the_primary(client, server, monkeypatch):
+    assert server.read_db_for("tiers:primary") is server.public_db
+    server.apply_invalidation({"keys": ["tiers:primary"]})
+    assert server.read_db_for("tiers:primary") is server.db
+    assert server.read_db_for("tiers:other") is server.public_db
+
+    monkeypatch.setitem(server.primary_reads_until, "tiers:primary", 0)
+    assert server.read_db_for("tiers:primary") is server.public_db
+    assert "tiers:primary" not in server.primary_reads_until
+
+
+def test_metrics_require_the_scrape_token(client, server, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(server, "metrics_token", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+def test_stats_for_unknown_artists_are_not_stored(client, server, monkeypatch):
+    monkeypatch.setattr(server, "change_watcher", object())
+    response = client.get("/api/artist/artist_crawled/stats")
+    assert response.status_code == 200
+    assert response.json()["subscriber_count"] == 0
+    assert client.portal.call(server.stats_view.get, "artist_crawled") is None
+
+
+def test_readiness_reports_a_permanently_failed_step(client, server, monkeypatch):
+    from pymongo.errors import DuplicateKeyError, ExecutionTimeout
+
+    assert server.is_permanent_warmup_error(DuplicateKeyError("E11000 duplicate key error"))
+    assert not server.is_permanent_warmup_error(ExecutionTimeout("operation exceeded time limit"))
+    monkeypatch.setattr(server.warmup, "ready", False)
+    monkeypatch.setattr(server.warmup, "failed_step", "indexes")
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "failed" and response.json()["failed_step"] == "indexes"
+
+
+def test_trending_top_up_sort_is_indexed(client, server):
+    indexes = client.portal.call(server.db.artists.index_information)
+    assert [("status", 1), ("approved_at", -1)] in [info["key"] for info in indexes.values()]
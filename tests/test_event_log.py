@@ -0,0 +1,127 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from event_log import EventLog  # noqa: E402
+
+
+class CountingCollection:
+    def __init__(self, collection, fail=0):
+        self.collection = collection
+        self.fail = fail
+        self.batches = []
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("mongo unavailable")
+        self.batches.append(len(docs))
+        return await self.collection.insert_many(docs, ordered=ordered)
+
+
+def test_record_only_buffers_and_flush_writes_in_batches():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().event_log_test
+        collection = CountingCollection(db.events)
+        log = EventLog(collection, max_batch=3)
+        for n in range(7):
+            log.record("content.created", actor_id="artist_a", content_id=f"c{n}")
+        assert collection.batches == []
+        assert log.pending == 7
+
+        assert await log.flush() == 7
+        assert collection.batches == [3, 3, 1]
+        doc = await db.events.find_one({"data.content_id": "c0"})
+        assert doc["type"] == "content.created"
+        assert doc["actor_id"] == "artist_a"
+        assert doc["event_id"] and doc["at"]
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_wakes_the_flusher_before_the_interval():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().event_log_test
+        collection = CountingCollection(db.events)
+        log = EventLog(collection, max_batch=2, flush_interval=3600)
+        log.start()
+        log.record("user.login", actor_id="u1")
+        await asyncio.sleep(0.05)
+        assert collection.batches == []
+        log.record("user.login", actor_id="u2")
+        await asyncio.sleep(0.05)
+        assert collection.batches == [2]
+        await log.stop()
+
+    asyncio.run(scenario())
+
+
+def test_buffer_is_bounded_and_stop_flushes_the_rest():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().event_log_test
+        log = EventLog(db.events, max_batch=100, flush_interval=3600, max_buffer=5)
+        log.start()
+        for n in range(8):
+            log.record("tier.created", actor_id="artist_a", n=n)
+        assert log.pending == 5
+        await log.stop()
+        assert log.pending == 0
+        assert sorted(d["data"]["n"] for d in await db.events.find().to_list(None)) == [0, 1, 2, 3, 4]
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_is_kept_for_the_next_attempt():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().event_log_test
+        collection = CountingCollection(db.events, fail=1)
+        log = EventLog(collection, max_batch=10)
+        log.record("subscription.activated", actor_id="fan", n=1)
+        log.record("subscription.activated", actor_id="fan", n=2)
+        with pytest.raises(ConnectionError):
+            await log.flush()
+        log.record("subscription.activated", actor_id="fan", n=3)
+        assert log.pending == 3
+
+        assert await log.flush() == 3
+        assert [d["data"]["n"] for d in await db.events.find().sort("at", 1).to_list(None)] == [1, 2, 3]
+
+    asyncio.run(scenario())
+
+
+def test_batch_partly_written_before_a_failure_is_not_retried_forever():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().event_log_test
+
+        class LostReply:
+            """Writes the first two events, then fails as if the reply timed out."""
+
+            def __init__(self):
+                self.failed = False
+
+            async def insert_many(self, docs, ordered=True):
+                if not self.failed:
+                    self.failed = True
+                    await db.events.insert_many(docs[:2], ordered=ordered)
+                    raise TimeoutError("no reply from server")
+                return await db.events.insert_many(docs, ordered=ordered)
+
+        log = EventLog(LostReply(), max_batch=10)
+        for n in range(3):
+            log.record("user.login", actor_id=f"u{n}", n=n)
+        with pytest.raises(TimeoutError):
+            await log.flush()
+        assert log.pending == 3
+
+        log.record("user.login", actor_id="u3", n=3)
+        assert await log.flush() == 4
+        assert log.pending == 0
+        assert sorted(d["data"]["n"] for d in await db.events.find().to_list(None)) == [0, 1, 2, 3]
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loop_watchdog import LoopWatchdog, WatchdogMiddleware  # noqa: E402
+
+
+def build_every_profile():
+    time.sleep(0.25)
+
+
+async def app(scope, receive, send):
+    scope["route"] = SimpleNamespace(path="/api/artists/public")
+    if scope["path"] == "/blocking":
+        build_every_profile()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def blocking_background_job():
+    time.sleep(0.2)
+
+
+def test_blocking_handlers_are_attributed_to_route_and_stack():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+
+    async def scenario():
+        watchdog.start()
+        try:
+            transport = httpx.ASGITransport(app=WatchdogMiddleware(app, watchdog))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                assert (await client.get("/fast")).status_code == 200
+                await asyncio.sleep(0.05)
+                assert (await client.get("/blocking")).status_code == 200
+                await asyncio.sleep(0.05)
+            await asyncio.create_task(blocking_background_job())
+            await asyncio.sleep(0.05)
+        finally:
+            await watchdog.stop()
+
+    asyncio.run(scenario())
+    snapshot = watchdog.snapshot()
+    assert snapshot["lag_ms"]["max"] >= 200
+
+    (offender,) = snapshot["routes"]["GET /api/artists/public"]
+    assert offender["count"] == 1 and offender["max_ms"] >= 200
+    assert any(frame.startswith("build_every_profile") for frame in offender["stack"])
+
+    background = snapshot["routes"]["task blocking_background_job"]
+    assert background[0]["stack"][-1].startswith("blocking_background_job")
+
+    watchdog.reset()
+    assert watchdog.snapshot()["routes"] == {}
+
+
+def test_short_lags_are_not_recorded_as_stalls():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.5)
+    watchdog.record_lag(0.02)
+    assert watchdog.snapshot()["routes"] == {}
+    watchdog.record_lag(0.6)
+    assert watchdog.snapshot()["routes"]["unattributed"][0]["count"] == 1
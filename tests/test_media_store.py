@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from media_store import (  # noqa: E402
+    EmptyObject, GridFSObjectStore, LocalObjectStore, ObjectTooLarge, parse_range, render_thumbnails,
+)
+
+DATA = bytes(range(256)) * 40
+
+
+async def stream(data, chunk_size=1000):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+async def read_range(store, key, start, end):
+    return b"".join([chunk async for chunk in store.iter_range(key, start, end)])
+
+
+def test_local_store_deduplicates_by_content_hash(tmp_path):
+    async def scenario():
+        store = LocalObjectStore(tmp_path, chunk_size=4096)
+        key, size, created = await store.put_stream(stream(DATA))
+        assert (key, size, created) == (hashlib.sha256(DATA).hexdigest(), len(DATA), True)
+        assert await store.put_stream(stream(DATA, 777)) == (key, len(DATA), False)
+        assert await store.size(key) == len(DATA)
+        assert await read_range(store, key, 100, 9999) == DATA[100:10000]
+        assert list((tmp_path / "tmp").iterdir()) == []
+
+    asyncio.run(scenario())
+
+
+def test_local_store_rejects_oversized_upload(tmp_path):
+    async def scenario():
+        store = LocalObjectStore(tmp_path)
+        with pytest.raises(ObjectTooLarge):
+            await store.put_stream(stream(DATA), max_bytes=len(DATA) - 1)
+        assert list((tmp_path / "tmp").iterdir()) == []
+        assert await store.size(hashlib.sha256(DATA).hexdigest()) is None
+
+    asyncio.run(scenario())
+
+
+def test_local_store_rejects_empty_upload(tmp_path):
+    async def scenario():
+        store = LocalObjectStore(tmp_path)
+        with pytest.raises(EmptyObject):
+            await store.put_stream(stream(b""))
+        assert list((tmp_path / "tmp").iterdir()) == []
+        assert await store.size(hashlib.sha256(b"").hexdigest()) is None
+
+    asyncio.run(scenario())
+
+
+def test_gridfs_store_deduplicates_and_rejects_empty_uploads():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    mongomock_gridfs = pytest.importorskip("mongomock.gridfs")
+    mongomock_gridfs.enable_gridfs_integration()
+
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().gridfs_test
+        store = GridFSObjectStore(db, chunk_size=4096)
+        key, size, created = await store.put_stream(stream(DATA))
+        assert (key, size, created) == (hashlib.sha256(DATA).hexdigest(), len(DATA), True)
+        assert await store.put_stream(stream(DATA, 777)) == (key, len(DATA), False)
+        assert await store.put_bytes(DATA) == (key, False)
+        assert await store.get_bytes(key) == DATA
+        assert await store.size(key) == len(DATA)
+        assert await read_range(store, key, 100, 9999) == DATA[100:10000]
+
+        with pytest.raises(ObjectTooLarge):
+            await store.put_stream(stream(DATA[::-1]), max_bytes=len(DATA) - 1)
+        with pytest.raises(EmptyObject):
+            await store.put_stream(stream(b""))
+        assert [f["filename"] for f in await store.files.find().to_list(None)] == [key]
+
+    asyncio.run(scenario())
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+def test_render_thumbnails_bounds_size():
+    image_module = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image_module.new("RGB", (1000, 500)).save(buffer, "PNG")
+    thumbnails = render_thumbnails(buffer.getvalue(), [128])
+    with image_module.open(io.BytesIO(thumbnails[128])) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert thumbnail.size == (128, 64)
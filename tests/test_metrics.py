@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from metrics import MetricsRegistry  # noqa: E402
+
+
+def test_counter_and_gauge_render_one_sample_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    requests.inc(route="/b")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert requests.value(route="/a") == 3
+    assert requests.value(route="/missing") == 0
+    assert in_flight.value() == 1
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a"} 3\n'
+        'requests_total{route="/b"} 1\n'
+        "# HELP in_flight In flight.\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 1\n"
+    )
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ("reason",))
+    errors.inc(reason='bad "quote"\\path\nnext')
+
+    assert 'errors_total{reason="bad \\"quote\\"\\\\path\\nnext"} 1' in registry.render().splitlines()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.5, 0.1))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.observe(value, route="/a")
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="0.5"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.45',
+        'latency_seconds_count{route="/a"} 4',
+    ]
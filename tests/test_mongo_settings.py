@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import mongo_settings  # noqa: E402
+
+
+def test_client_options_from_environment():
+    options = mongo_settings.client_options({
+        "MONGO_MAX_POOL_SIZE": "64",
+        "MONGO_MIN_POOL_SIZE": "4",
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS": "2000",
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS": "3000",
+        "MONGO_COMPRESSORS": "zlib",
+        "MONGO_ZLIB_LEVEL": "3",
+        "MONGO_READ_PREFERENCE": "primaryPreferred",
+    })
+    client = MongoClient("mongodb://localhost:27017", connect=False, **options)
+    try:
+        assert client.options.pool_options.max_pool_size == 64
+        assert client.options.pool_options.min_pool_size == 4
+        assert client.options.server_selection_timeout == 3
+        assert client.read_preference.mongos_mode == "primaryPreferred"
+        assert options["compressors"] == "zlib" and options["zlibCompressionLevel"] == 3
+    finally:
+        client.close()
+    assert mongo_settings.client_options({}) == {}
+
+
+def test_missing_compressor_support_is_skipped(monkeypatch):
+    monkeypatch.setitem(mongo_settings.COMPRESSOR_MODULES, "snappy", "module_that_is_not_installed")
+    assert mongo_settings.available_compressors("snappy, zlib") == ["zlib"]
+    with pytest.raises(ValueError):
+        mongo_settings.available_compressors("lz4")
+
+
+def test_public_reads_prefer_secondaries_with_bounded_staleness():
+    preference = mongo_settings.public_read_preference({})
+    assert isinstance(preference, SecondaryPreferred) and preference.max_staleness == 120
+    assert isinstance(mongo_settings.public_read_preference({"MONGO_PUBLIC_READ_PREFERENCE": "primary"}), Primary)
+    unbounded = mongo_settings.public_read_preference({"MONGO_PUBLIC_MAX_STALENESS_SECONDS": "0"})
+    assert unbounded.max_staleness == -1
+    with pytest.raises(ValueError):
+        mongo_settings.public_read_preference({"MONGO_PUBLIC_MAX_STALENESS_SECONDS": "30"})
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from request_profiler import ProfilerMiddleware, RequestProfiler  # noqa: E402
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def slow_lookup():
+    await asyncio.sleep(0.05)
+
+
+async def app(scope, receive, send):
+    scope["route"] = SimpleNamespace(path="/api/item/{item_id}")
+    busy_loop(0.05)
+    await slow_lookup()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def run_requests(profiler, headers, count=1):
+    async def scenario():
+        transport = httpx.ASGITransport(app=ProfilerMiddleware(app, profiler))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(count):
+                assert (await client.get("/api/item/1", headers=headers)).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_debug_header_profiles_running_and_waiting_time_per_route():
+    profiler = RequestProfiler(interval=0.002, debug_token="secret")
+    run_requests(profiler, {"X-Debug-Profile": "wrong"})
+    assert profiler.summary()["routes"] == {}
+
+    run_requests(profiler, {"X-Debug-Profile": "secret"}, count=2)
+    route = profiler.summary()["routes"]["GET /api/item/{item_id}"]
+    assert route["requests"] == 2 and route["samples"] > 10
+
+    collapsed = profiler.collapsed().splitlines()
+    running = [line for line in collapsed if ";[running];" in line and "busy_loop" in line]
+    waiting = [line for line in collapsed if ";[waiting];" in line and "slow_lookup" in line]
+    assert running and waiting
+    assert all(line.startswith("GET /api/item/{item_id};") for line in collapsed)
+
+    profile = profiler.speedscope()
+    (sampled,) = profile["profiles"]
+    frames = profile["shared"]["frames"]
+    assert sampled["name"] == "GET /api/item/{item_id}" and len(sampled["samples"]) == len(sampled["weights"])
+    assert any(frames[i]["name"].startswith("busy_loop") for stack in sampled["samples"] for i in stack)
+
+    profiler.reset()
+    assert profiler.collapsed() == "\n"
+
+
+def test_sample_rate_selects_requests():
+    profiler = RequestProfiler(sample_rate=1.0, interval=0.002)
+    run_requests(profiler, {})
+    assert profiler.summary()["routes"]["GET /api/item/{item_id}"]["requests"] == 1
@@ -0,0 +1,83 @@
+import gzip
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import response_compression  # noqa: E402
+from response_compression import CompressionMiddleware, choose_encoding  # noqa: E402
+
+BODY = b'{"artists": [' + b",".join([b'{"name": "Artist", "bio": "Repetitive bio"}'] * 200) + b"]}"
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([BODY[:1000], BODY[1000:]]), media_type="application/json")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def raw_get(client, path, accept_encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_choose_encoding_honours_q_values():
+    assert choose_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert choose_encoding("br;q=0, gzip", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("identity", ["br", "gzip"]) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+
+
+def test_large_json_is_gzipped_and_small_is_not():
+    client = make_app()
+    response, raw = raw_get(client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(raw) == BODY
+
+    response, raw = raw_get(client, "/small", "gzip")
+    assert "content-encoding" not in response.headers
+    assert raw == b'{"ok": true}'
+
+
+def test_streaming_response_is_compressed_incrementally():
+    response, raw = raw_get(make_app(), "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == BODY
+
+
+def test_already_encoded_response_passes_through():
+    response, raw = raw_get(make_app(), "/precompressed", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw) == BODY
+
+
+def test_packed_variants_round_trip():
+    variants = response_compression.precompress(BODY, minimum_size=500)
+    assert set(variants) == {"identity", *response_compression.available_encodings()}
+    unpacked = response_compression.unpack_variants(response_compression.pack_variants(variants))
+    assert unpacked == variants
+    assert gzip.decompress(unpacked["gzip"]) == BODY
+    assert response_compression.unpack_variants(b"[]") == {"identity": b"[]"}
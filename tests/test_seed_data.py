@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import content_bodies  # noqa: E402
+from seed_data import COLLECTIONS, Generator, run  # noqa: E402
+
+
+def snapshot(db) -> dict:
+    return {name: sorted((repr(sorted(doc.items())) for doc in db[name].find({}, {"_id": 0})))
+            for name in COLLECTIONS}
+
+
+def test_dataset_does_not_depend_on_batch_size_or_workers():
+    client = mongomock.MongoClient()
+    serial, parallel = client.seed_serial, client.seed_parallel
+
+    run(serial, Generator(7, 300, 0.1, "gzip", 256), batch_size=1000, workers=1)
+    run(parallel, Generator(7, 300, 0.1, "gzip", 256), batch_size=17, workers=4)
+
+    assert snapshot(serial) == snapshot(parallel)
+    assert serial.users.count_documents({}) == 300
+    assert serial.subscriptions.count_documents({}) > 0
+
+
+def test_seeded_content_matches_the_stored_schema():
+    db = mongomock.MongoClient().seed_content
+    run(db, Generator(7, 300, 0.1, "gzip", 256), batch_size=100, workers=2)
+
+    texts = list(db.gated_content.find({"content_type": "text"}))
+    assert texts and any(doc.get("content_encoding") == "gzip" for doc in texts)
+    for doc in texts:
+        body = content_bodies.read_body(doc)
+        assert doc["excerpt"] == content_bodies.make_excerpt(body)
+        assert doc["has_more"] == (len(body.strip()) > content_bodies.EXCERPT_LENGTH)
+    for doc in db.gated_content.find({"content_type": {"$ne": "text"}}):
+        assert doc["excerpt"] is None and doc["has_more"] is False
@@ -0,0 +1,81 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from pymongo.errors import DuplicateKeyError  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+
+def make_store(**kwargs):
+    collection = mongomock_motor.AsyncMongoMockClient().session_test.user_sessions
+    return SessionStore(collection, **kwargs)
+
+
+def test_cap_keeps_only_the_newest_sessions():
+    async def scenario():
+        store = make_store(max_sessions_per_user=2)
+        await store.ensure_indexes()
+        tokens = [await store.create("user_a", f"token_{n}") for n in range(4)]
+        await store.create("user_b", "token_b")
+
+        remaining = await store.collection.find({"user_id": "user_a"}).to_list(None)
+        assert sorted(s["session_token"] for s in remaining) == tokens[2:]
+        assert await store.get("token_b") is not None
+
+    asyncio.run(scenario())
+
+
+def test_retried_login_with_the_same_token_extends_the_session():
+    async def scenario():
+        store = make_store(ttl=timedelta(days=7))
+        await store.ensure_indexes()
+        await store.create("user_a", "provider_token", ttl=timedelta(hours=1))
+        assert await store.create("user_a", "provider_token") == "provider_token"
+
+        sessions = await store.collection.find({"session_token": "provider_token"}).to_list(None)
+        assert len(sessions) == 1
+        assert store.expires_at(sessions[0]) > datetime.now(timezone.utc) + timedelta(days=6)
+
+        with pytest.raises(DuplicateKeyError):
+            await store.create("user_b", "provider_token")
+
+    asyncio.run(scenario())
+
+
+def test_renewal_writes_at_most_once_per_interval():
+    async def scenario():
+        store = make_store(ttl=timedelta(days=7), renew_interval=timedelta(hours=1))
+        await store.create("user_a", "fresh")
+        session = await store.get("fresh")
+        assert "renewed" not in session
+
+        aged = datetime.now(timezone.utc) + timedelta(days=6, hours=22)
+        await store.collection.update_one({"session_token": "fresh"}, {"$set": {"expires_at": aged}})
+        session = await store.get("fresh")
+        assert session["renewed"] is True
+        assert store.expires_at(session) > datetime.now(timezone.utc) + timedelta(days=6, hours=23)
+
+        assert "renewed" not in await store.get("fresh")
+
+    asyncio.run(scenario())
+
+
+def test_expired_sessions_are_not_renewed_and_are_swept():
+    async def scenario():
+        store = make_store()
+        await store.create("user_a", "expired", ttl=timedelta(seconds=-1))
+        await store.create("user_a", "live")
+
+        session = await store.get("expired")
+        assert store.is_expired(session) and "renewed" not in session
+        assert await store.sweep() == 1
+        assert [s["session_token"] for s in await store.collection.find().to_list(None)] == ["live"]
+
+    asyncio.run(scenario())
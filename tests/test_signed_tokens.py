@@ -0,0 +1,84 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from signed_tokens import ExpiredToken, InvalidToken, RevocationList, TokenSigner, _b64encode  # noqa: E402
+
+USER = {
+    "user_id": "user_1",
+    "role": "fan",
+    "email": "fan@example.com",
+    "name": "Fan",
+    "picture": None,
+    "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+}
+
+
+def test_issued_token_round_trips_to_user_fields():
+    signer = TokenSigner("secret")
+    claims = signer.verify(signer.issue(USER))
+    fields = TokenSigner.user_fields(claims)
+    assert fields["user_id"] == "user_1" and fields["role"] == "fan"
+    assert fields["created_at"] == USER["created_at"]
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    signer = TokenSigner("secret")
+    token = signer.issue(USER)
+    prefix, payload, signature = token.split(".")
+    forged_payload = _b64encode(b'{"uid":"admin","role":"admin","exp":9999999999}')
+
+    for bad in (
+        f"{prefix}.{forged_payload}.{signature}",
+        f"{prefix}.{payload}.{signature[:-2]}AA",
+        TokenSigner("other secret").issue(USER),
+    ):
+        with pytest.raises(InvalidToken):
+            signer.verify(bad)
+
+
+@pytest.mark.parametrize("token", [
+    "session_opaque", "st1.", "st1.nodot", "st1.é.x", "st1.abc.é", "st1.abc.def", "st1.%%%.%%%",
+])
+def test_malformed_tokens_raise_invalid_token(token):
+    with pytest.raises(InvalidToken):
+        TokenSigner("secret").verify(token)
+
+
+def test_validly_signed_payload_without_expiry_is_invalid():
+    signer = TokenSigner("secret")
+    payload = _b64encode(b'["not", "claims"]').encode()
+    with pytest.raises(InvalidToken):
+        signer.verify(f"st1.{payload.decode()}.{signer._sign(payload).decode()}")
+
+
+def test_expired_token_raises_expired():
+    signer = TokenSigner("secret")
+    with pytest.raises(ExpiredToken):
+        signer.verify(signer.issue(USER, ttl=timedelta(seconds=-1)))
+
+
+def test_revocation_is_shared_through_the_collection():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient().tokens_test.revoked_tokens
+        signer = TokenSigner("secret")
+        claims = signer.verify(signer.issue(USER))
+
+        worker_a, worker_b = RevocationList(collection), RevocationList(collection)
+        await worker_a.ensure_indexes()
+        await worker_a.revoke(claims)
+        await worker_a.revoke(claims)
+        assert worker_a.is_revoked(claims["jti"])
+        assert not worker_b.is_revoked(claims["jti"])
+        await worker_b.load()
+        assert worker_b.is_revoked(claims["jti"])
+        assert await collection.count_documents({}) == 1
+
+    asyncio.run(scenario())
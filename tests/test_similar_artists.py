@@ -0,0 +1,56 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("scipy")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from similar_artists import SimilarArtists, build_matrix, top_k_similar  # noqa: E402
+
+
+def test_cosine_neighbours_from_co_subscriptions():
+    # fans 0-2 back artists 0 and 1, fan 3 backs 0 and 2, fan 1 subscribed to artist 0 twice
+    matrix = build_matrix([0, 0, 1, 1, 1, 2, 2, 3, 3], [0, 1, 0, 0, 1, 0, 1, 0, 2], 4, 3)
+    neighbours = top_k_similar(matrix, k=5)
+
+    assert [other for other, _ in neighbours[0]] == [1, 2]
+    assert neighbours[0][0][1] == pytest.approx(3 / (4 * 3) ** 0.5)
+    assert neighbours[1] == [(0, pytest.approx(3 / (4 * 3) ** 0.5))]
+    assert neighbours[2] == [(0, pytest.approx(1 / 4 ** 0.5))]
+
+    assert [other for other, _ in top_k_similar(matrix, k=1)[0]] == [1]
+    assert top_k_similar(matrix, k=5, min_overlap=2)[2] == []
+
+
+def test_recompute_stores_approved_neighbours_for_lookup():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().similar_test
+        await db.artists.insert_many([
+            {"artist_id": "a", "status": "approved", "name": "A", "profile_image": None},
+            {"artist_id": "b", "status": "approved", "name": "B", "profile_image": "b.png"},
+            {"artist_id": "c", "status": "approved", "name": "C", "profile_image": None},
+            {"artist_id": "hidden", "status": "pending", "name": "Hidden", "profile_image": None},
+        ])
+        await db.subscriptions.insert_many(
+            [{"fan_user_id": f"fan{i}", "artist_id": artist, "status": "active"}
+             for i in range(3) for artist in ("a", "b", "hidden")]
+            + [{"fan_user_id": "fan3", "artist_id": "a", "status": "expired"},
+               {"fan_user_id": "fan3", "artist_id": "c", "status": "active"},
+               {"fan_user_id": "fan4", "artist_id": "c", "status": "pending"}]
+        )
+        await db.similar_artists.insert_one({"artist_id": "gone", "neighbors": [], "computed_at": "old"})
+
+        job = SimilarArtists(db, top_k=1)
+        await job.ensure_indexes()
+        assert await job.recompute() == 3
+
+        assert await job.get("a") == [{"artist_id": "b", "name": "B", "profile_image": "b.png", "score": 0.866}]
+        assert [n["artist_id"] for n in await job.get("c")] == ["a"]
+        assert await job.get("hidden") == []
+        assert await job.get("gone") == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import metrics  # noqa: E402
+from single_flight import SingleFlight  # noqa: E402
+
+
+def calls(result):
+    return metrics.single_flight_calls.value(group="test:artist", result=result)
+
+
+def test_concurrent_callers_share_one_call_and_result():
+    async def scenario():
+        flight = SingleFlight("test")
+        started = []
+        release = asyncio.Event()
+
+        async def read():
+            started.append(1)
+            await release.wait()
+            return {"artist_id": "a1"}
+
+        leaders, coalesced = calls("leader"), calls("coalesced")
+        waiters = [asyncio.create_task(flight.do("artist:a1", read)) for _ in range(10)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert started == [1]
+        assert all(r is results[0] for r in results)
+        assert flight.in_flight == 0
+        assert calls("leader") - leaders == 1
+        assert calls("coalesced") - coalesced == 9
+
+        # Once finished, the next caller starts a new read.
+        await flight.do("artist:a1", read)
+        assert started == [1, 1]
+
+    asyncio.run(scenario())
+
+
+def test_exception_is_shared_by_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def read():
+            await asyncio.sleep(0.01)
+            raise LookupError("Artist not found")
+
+        results = await asyncio.gather(*(flight.do("artist:missing", read) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, LookupError) for r in results)
+        assert flight.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_does_not_cancel_the_shared_read():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def read():
+            await asyncio.sleep(0.02)
+            return "tiers"
+
+        leader = asyncio.create_task(flight.do("tiers:a1", read))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("tiers:a1", read))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "tiers"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+
+
+def test_forget_makes_later_callers_start_a_fresh_read():
+    async def scenario():
+        flight = SingleFlight("test")
+        versions = iter(["before write", "after write"])
+
+        async def read():
+            value = next(versions)
+            await asyncio.sleep(0.01)
+            return value
+
+        first = asyncio.create_task(flight.do("artist:a1", read))
+        await asyncio.sleep(0)
+        flight.forget("artist:a1")
+        second = asyncio.create_task(flight.do("artist:a1", read))
+        assert await first == "before write"
+        assert await second == "after write"
+        assert flight.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("stripe")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from stripe_prices import PriceProvisioner  # noqa: E402
+
+
+@pytest.fixture
+def stripe_stub():
+    """Minimal local Stripe API: POST /v1/prices, honouring idempotency keys."""
+    state = {"requests": [], "fail": False, "prices": {}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            key = self.headers.get("Idempotency-Key")
+            state["requests"].append((self.path, key, body))
+            if state["fail"]:
+                self.send_response(500)
+                payload = {"error": {"type": "api_error", "message": "stub failure"}}
+            else:
+                self.send_response(200)
+                price_id = state["prices"].setdefault(key, f"price_stub_{len(state['prices']) + 1}")
+                payload = {"id": price_id, "object": "price"}
+            data = json.dumps(payload).encode()
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+
+
+def make_tier(collection, tier_id):
+    tier = {"tier_id": tier_id, "artist_id": "artist_1", "name": "Gold", "price": 4.99, "stripe_price_id": None}
+    return collection.insert_one(dict(tier)), tier
+
+
+def test_price_is_created_once_and_stored(stripe_stub):
+    async def scenario():
+        tiers = mongomock_motor.AsyncMongoMockClient().prices_test.subscription_tiers
+        provisioner = PriceProvisioner(tiers, "sk_test_stub", api_base=stripe_stub["url"])
+        insert, tier = make_tier(tiers, "tier_gold")
+        await insert
+
+        first, second = await asyncio.gather(provisioner.ensure_price(tier), provisioner.ensure_price(dict(tier)))
+        stored = await tiers.find_one({"tier_id": "tier_gold"})
+        assert first == second == stored["stripe_price_id"] == "price_stub_1"
+        assert await provisioner.ensure_price(stored) == "price_stub_1"
+
+        paths = {path for path, _, _ in stripe_stub["requests"]}
+        keys = {key for _, key, _ in stripe_stub["requests"]}
+        assert paths == {"/v1/prices"}
+        assert keys == {"tier-price-tier_gold-499"}
+        assert "unit_amount=499" in stripe_stub["requests"][0][2]
+
+    asyncio.run(scenario())
+
+
+def test_failures_back_off(stripe_stub):
+    async def scenario():
+        stripe_stub["fail"] = True
+        tiers = mongomock_motor.AsyncMongoMockClient().prices_fail.subscription_tiers
+        provisioner = PriceProvisioner(tiers, "sk_test_stub", api_base=stripe_stub["url"])
+        insert, tier = make_tier(tiers, "tier_fail")
+        await insert
+
+        assert await provisioner.ensure_price(tier) is None
+        attempts = len(stripe_stub["requests"])
+        assert await provisioner.ensure_price(tier) is None
+        assert len(stripe_stub["requests"]) == attempts
+        assert (await tiers.find_one({"tier_id": "tier_fail"}))["stripe_price_id"] is None
+
+    asyncio.run(scenario())
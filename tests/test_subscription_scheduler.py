@@ -0,0 +1,71 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from subscription_scheduler import SubscriptionScheduler  # noqa: E402
+
+
+def subscription(n, ends_in, renewals=0, **extra):
+    now = datetime.now(timezone.utc)
+    return {"subscription_id": f"sub_{n}", "fan_user_id": f"user_{n}", "artist_id": "artist_1", "tier_id": "tier_1",
+            "status": "active", "started_at": now.isoformat(), "ends_at": (now + ends_in).isoformat(),
+            "renewals_remaining": renewals, **extra}
+
+
+async def statuses(collection):
+    docs = await collection.find({}, {"_id": 0, "subscription_id": 1, "status": 1, "renewals_remaining": 1}).to_list(None)
+    return {d["subscription_id"]: (d["status"], d.get("renewals_remaining")) for d in docs}
+
+
+def test_due_subscriptions_are_renewed_or_expired_in_batches():
+    async def scenario():
+        subs = mongomock_motor.AsyncMongoMockClient().scheduler_test.subscriptions
+        await subs.insert_many(
+            [subscription(i, -timedelta(days=1)) for i in range(5)]
+            + [subscription("prepaid", -timedelta(hours=1), renewals=1),
+               subscription("current", timedelta(days=10)),
+               subscription("legacy", timedelta(0), ends_at=None)]
+        )
+        transitions = []
+        scheduler = SubscriptionScheduler(subs, batch_size=2, concurrency=2,
+                                          on_transition=lambda sub, result: transitions.append(result))
+
+        assert await scheduler.run_once() == {"expired": 5, "renewed": 1}
+        assert sorted(transitions) == ["expired"] * 5 + ["renewed"]
+        result = await statuses(subs)
+        assert result["sub_0"] == ("expired", 0)
+        assert result["sub_prepaid"] == ("active", 0)
+        assert result["sub_current"] == ("active", 0)
+        assert result["sub_legacy"] == ("active", 0)
+        prepaid = await subs.find_one({"subscription_id": "sub_prepaid"})
+        assert datetime.fromisoformat(prepaid["ends_at"]) > datetime.now(timezone.utc) + timedelta(days=29)
+        assert "lease_owner" not in prepaid
+        assert await scheduler.run_once() == {}
+
+    asyncio.run(scenario())
+
+
+def test_leased_subscriptions_are_skipped_until_lease_expires():
+    async def scenario():
+        subs = mongomock_motor.AsyncMongoMockClient().scheduler_lease.subscriptions
+        future = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+        past = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+        await subs.insert_many([
+            subscription("held", -timedelta(days=1), lease_owner="other:1", lease_until=future),
+            subscription("stale", -timedelta(days=1), lease_owner="crashed:1", lease_until=past),
+        ])
+        scheduler = SubscriptionScheduler(subs)
+
+        assert await scheduler.run_once() == {"expired": 1}
+        result = await statuses(subs)
+        assert result["sub_held"][0] == "active"
+        assert result["sub_stale"][0] == "expired"
+
+    asyncio.run(scenario())
@@ -0,0 +1,106 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from transaction_archive import ArchiveNotConfigured, TransactionArchive  # noqa: E402
+
+NOW = datetime(2026, 6, 1, 12, tzinfo=timezone.utc)
+
+
+def txn(n, days_old, payment_status, artist_id="artist_a", amount=5.0):
+    return {
+        "transaction_id": f"txn_{n}",
+        "session_id": f"cs_{n}",
+        "user_id": "user_fan",
+        "artist_id": artist_id,
+        "tier_id": "tier_1",
+        "amount": amount,
+        "currency": "usd",
+        "status": "completed" if payment_status == "paid" else "pending",
+        "payment_status": payment_status,
+        "metadata": {"tier_id": "tier_1"},
+        "created_at": (NOW - timedelta(days=days_old)).isoformat(),
+    }
+
+
+def test_old_settled_and_abandoned_transactions_move_to_day_partitions(tmp_path):
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().archive_test
+        await db.payment_transactions.insert_many([
+            txn(1, 120, "paid"),
+            txn(2, 120, "initiated"),
+            txn(3, 100, "paid", artist_id="artist_b", amount=9.5),
+            txn(4, 30, "paid"),
+            txn(5, 30, "initiated"),
+            txn(6, 2, "initiated"),
+        ])
+        archive = TransactionArchive(db, tmp_path, paid_after=timedelta(days=90),
+                                     abandoned_after=timedelta(days=7), batch_size=2)
+        assert await archive.run_once(now=NOW) == {"archived": 4, "partitions_written": 3}
+        assert await archive.run_once(now=NOW) == {"archived": 0, "partitions_written": 0}
+
+        live = sorted(d["transaction_id"] for d in await db.payment_transactions.find({}).to_list(None))
+        assert live == ["txn_4", "txn_6"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["date=2026-02-01", "date=2026-02-21", "date=2026-05-02"]
+
+        rows = await archive.query(start="2026-01-01", end="2026-07-01")
+        assert [r["transaction_id"] for r in rows] == ["txn_1", "txn_2", "txn_3", "txn_5", "txn_4", "txn_6"]
+        assert rows[0]["metadata"] == {"tier_id": "tier_1"} and rows[0]["archived"] is True
+        assert rows[-1]["archived"] is False
+
+        in_range = await archive.query(start="2026-02-15", end="2026-05-15")
+        assert [r["transaction_id"] for r in in_range] == ["txn_3", "txn_5", "txn_4"]
+        assert [r["transaction_id"] for r in await archive.query("2026-01-01", "2026-07-01", "artist_b")] == ["txn_3"]
+        with pytest.raises(ValueError):
+            await archive.query(start="2026-01-01", end=None)
+
+        report = await archive.daily_report()
+        assert report["totals"] == {"paid_count": 3, "paid_amount": 19.5, "unpaid_count": 3}
+        assert report["archived_rows"] == 4
+        assert report["days"][0] == {"date": "2026-02-01", "paid_count": 1, "paid_amount": 5.0, "unpaid_count": 1}
+
+    asyncio.run(scenario())
+
+
+def test_rows_left_in_both_places_are_reported_once(tmp_path):
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().archive_dupes
+        archive = TransactionArchive(db, tmp_path)
+        await db.payment_transactions.insert_one(txn(1, 120, "paid"))
+        await archive.run_once(now=NOW)
+        # An interrupted run wrote the partition but never deleted the document.
+        await db.payment_transactions.insert_one(txn(1, 120, "paid"))
+        assert [r["transaction_id"] for r in await archive.query("2026-01-01", "2026-07-01")] == ["txn_1"]
+        assert (await archive.daily_report())["totals"]["paid_count"] == 1
+
+        # The next run archives it again, leaving two identical rows in the archive only.
+        await archive.run_once(now=NOW)
+        assert await db.payment_transactions.count_documents({}) == 0
+        report = await archive.daily_report()
+        assert report["totals"] == {"paid_count": 1, "paid_amount": 5.0, "unpaid_count": 0}
+        assert report["archived_rows"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_archiving_requires_an_explicit_root():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().archive_unconfigured
+        archive = TransactionArchive(db)
+        await db.payment_transactions.insert_one(txn(1, 120, "paid"))
+        with pytest.raises(ArchiveNotConfigured):
+            await archive.run_once(now=NOW)
+        with pytest.raises(ArchiveNotConfigured):
+            archive.start(60)
+        assert await db.payment_transactions.count_documents({}) == 1
+        assert (await archive.daily_report())["totals"]["paid_count"] == 1
+
+    asyncio.run(scenario())
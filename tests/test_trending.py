@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from trending import PUBLIC_ORDER, TrendingRanker  # noqa: E402
+
+
+def days_ago(n):
+    return (datetime.now(timezone.utc) - timedelta(days=n)).isoformat()
+
+
+def test_recent_activity_outranks_older_activity():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().trending_test
+        await db.artists.insert_many([
+            {"artist_id": "artist_fresh", "status": "approved"},
+            {"artist_id": "artist_old", "status": "approved"},
+            {"artist_id": "artist_posting", "status": "approved"},
+            {"artist_id": "artist_pending", "status": "pending"},
+        ])
+        await db.subscriptions.insert_many(
+            [{"artist_id": "artist_fresh", "started_at": days_ago(1)} for _ in range(3)]
+            + [{"artist_id": "artist_old", "started_at": days_ago(20)} for _ in range(5)]
+            + [{"artist_id": "artist_old", "started_at": days_ago(90)} for _ in range(50)]
+            + [{"artist_id": "artist_pending", "started_at": days_ago(0)} for _ in range(9)]
+        )
+        await db.gated_content.insert_many([{"artist_id": "artist_posting", "created_at": days_ago(0)}])
+        await db.artist_rankings.insert_one({"artist_id": "artist_removed", "score": 99.0, "computed_at": "old"})
+        await db.artists.insert_one({"artist_id": "artist_faded", "status": "approved", "trending_score": 42.0})
+
+        ranker = TrendingRanker(db, half_life=timedelta(days=7), window=timedelta(days=60))
+        assert await ranker.recompute() == 3
+        assert await ranker.top(10) == ["artist_fresh", "artist_old", "artist_posting"]
+        assert await ranker.top(1) == ["artist_fresh"]
+
+        public = await db.artists.find({"status": "approved"}).sort(PUBLIC_ORDER).to_list(None)
+        assert [a["artist_id"] for a in public] == ["artist_fresh", "artist_old", "artist_posting", "artist_faded"]
+        assert "trending_score" not in public[-1]
+
+    asyncio.run(scenario())
+
+
+def test_only_one_worker_claims_each_interval():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().trending_claims
+        first, second = TrendingRanker(db), TrendingRanker(db)
+        assert await first.claim(600) is True
+        assert await second.claim(600) is False
+        await db.job_leases.update_one({}, {"$set": {"until": days_ago(1)}})
+        assert await second.claim(600) is True
+
+    asyncio.run(scenario())
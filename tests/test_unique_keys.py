@@ -0,0 +1,37 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from pymongo.errors import OperationFailure  # noqa: E402
+
+import unique_keys  # noqa: E402
+
+
+def test_existing_duplicates_are_named_when_the_index_fails(caplog):
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient().unique_keys_test
+        await db.users.insert_many([
+            {"user_id": "user_a", "email": "same@example.com"},
+            {"user_id": "user_b", "email": "same@example.com"},
+            {"user_id": "user_c", "email": "other@example.com"},
+        ])
+        await db.artists.insert_many([{"artist_id": "artist_a", "user_id": "user_a"},
+                                      {"artist_id": "artist_b", "user_id": "user_b"}])
+
+        assert await unique_keys.find_duplicates(db, "users", "email") == [("same@example.com", 2)]
+        assert await unique_keys.check(db, limit=10) == 1
+        with caplog.at_level(logging.ERROR, logger="unique_keys"), pytest.raises(OperationFailure):
+            await unique_keys.ensure_indexes(db)
+
+        await db.users.delete_one({"user_id": "user_b"})
+        await unique_keys.ensure_indexes(db)
+
+    asyncio.run(scenario())
+    assert "users.email" in caplog.text and "same@example.com" in caplog.text
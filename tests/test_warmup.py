@@ -0,0 +1,98 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from warmup import ReadinessGate, Warmup, WarmupFailed  # noqa: E402
+
+
+def test_steps_run_in_order_and_failures_are_retried():
+    calls = []
+    failures = {"mongo": 2}
+
+    def step(name):
+        async def run():
+            calls.append(name)
+            if failures.get(name):
+                failures[name] -= 1
+                raise ConnectionError("not reachable")
+        return run
+
+    async def scenario():
+        warmup = Warmup([("mongo", step("mongo")), ("indexes", step("indexes"))], retry_delay=0.01)
+        warmup.start()
+        await asyncio.sleep(0)
+        assert warmup.ready is False and warmup.status()["current_step"] == "mongo"
+        await warmup.wait(timeout=5)
+        return warmup
+
+    warmup = asyncio.run(scenario())
+    assert calls == ["mongo", "mongo", "mongo", "indexes"]
+    status = warmup.status()
+    assert status["ready"] is True and status["last_error"] is None
+    assert status["attempts"] == {"mongo": 3, "indexes": 1}
+    assert set(status["durations_ms"]) == {"mongo", "indexes"}
+
+
+def test_stop_cancels_pending_warmup():
+    async def never_ready():
+        await asyncio.sleep(60)
+
+    async def scenario():
+        warmup = Warmup([("mongo", never_ready)])
+        warmup.start()
+        await asyncio.sleep(0)
+        await warmup.stop()
+        return warmup
+
+    assert asyncio.run(scenario()).ready is False
+
+
+def test_gate_rejects_everything_but_health_until_ready():
+    httpx = pytest.importorskip("httpx")
+    ready = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    gate = ReadinessGate(app, is_ready=lambda: bool(ready), allow=("/api/health/",), retry_after=3)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=gate)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            early = await client.get("/api/auth/me")
+            assert early.status_code == 503 and early.headers["retry-after"] == "3"
+            assert (await client.get("/api/health/live")).status_code == 200
+            ready.append(True)
+            assert (await client.get("/api/auth/me")).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_permanent_failure_stops_warmup_and_is_reported():
+    calls = []
+
+    async def indexes():
+        calls.append("indexes")
+        raise ValueError("E11000 duplicate key error")
+
+    async def later():
+        calls.append("later")
+
+    async def scenario():
+        warmup = Warmup([("indexes", indexes), ("later", later)], retry_delay=0.01,
+                        is_permanent=lambda e: isinstance(e, ValueError))
+        warmup.start()
+        with pytest.raises(WarmupFailed):
+            await warmup.wait(timeout=5)
+        return warmup
+
+    warmup = asyncio.run(scenario())
+    assert calls == ["indexes"]
+    status = warmup.status()
+    assert status["ready"] is False and status["failed_step"] == "indexes"
+    assert "duplicate key" in status["last_error"]